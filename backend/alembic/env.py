@@ -5,7 +5,7 @@ from alembic import context
 
 from app.core.config import settings
 from app.db.base import Base  
-from app.models import book  
+from app.models import book, catalog  
 
 target_metadata = Base.metadata
 
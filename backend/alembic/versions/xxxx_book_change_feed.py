@@ -0,0 +1,91 @@
+"""change feed: per-book change sequence and tombstones
+
+Revision ID: xxxx_book_change_feed
+Revises: xxxx_book_day_stats
+Create Date: 2026-10-18 19:02:14.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "xxxx_book_change_feed"
+down_revision = "xxxx_book_day_stats"
+branch_labels = None
+depends_on = None
+
+
+PG_FEED = [
+    "ALTER TABLE book ALTER COLUMN change_seq SET DEFAULT nextval('book_change_seq')",
+    "CREATE OR REPLACE FUNCTION book_change_lock() RETURNS trigger LANGUAGE plpgsql AS $$ "
+    "BEGIN PERFORM 1 FROM catalog_version WHERE id = 1 FOR UPDATE; RETURN NULL; END $$",
+    "CREATE TRIGGER book_change_lock BEFORE INSERT OR UPDATE OR DELETE ON book "
+    "FOR EACH STATEMENT EXECUTE FUNCTION book_change_lock()",
+    "CREATE OR REPLACE FUNCTION book_change_touch() RETURNS trigger LANGUAGE plpgsql AS $$ "
+    "BEGIN NEW.change_seq := nextval('book_change_seq'); RETURN NEW; END $$",
+    "CREATE TRIGGER book_change_touch BEFORE UPDATE ON book FOR EACH ROW EXECUTE FUNCTION book_change_touch()",
+    "CREATE OR REPLACE FUNCTION book_change_tombstone() RETURNS trigger LANGUAGE plpgsql AS $$ "
+    "BEGIN INSERT INTO book_tombstone (book_id, change_seq) SELECT id, nextval('book_change_seq') FROM old_rows "
+    "ON CONFLICT (book_id) DO UPDATE SET change_seq = excluded.change_seq; RETURN NULL; END $$",
+    "CREATE TRIGGER book_change_tombstone AFTER DELETE ON book REFERENCING OLD TABLE AS old_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION book_change_tombstone()",
+]
+
+NEXT_SEQ = "UPDATE book_change_seq SET value = value + 1 WHERE id = 1; "
+CURRENT_SEQ = "(SELECT value FROM book_change_seq WHERE id = 1)"
+SQLITE_FEED = [
+    "CREATE TRIGGER IF NOT EXISTS book_change_ai AFTER INSERT ON book BEGIN "
+    f"{NEXT_SEQ}UPDATE book SET change_seq = {CURRENT_SEQ} WHERE id = NEW.id; END",
+    "CREATE TRIGGER IF NOT EXISTS book_change_au "
+    "AFTER UPDATE OF title, author, created_at, created_by, deleted_at, deleted_by ON book BEGIN "
+    f"{NEXT_SEQ}UPDATE book SET change_seq = {CURRENT_SEQ} WHERE id = NEW.id; END",
+    "CREATE TRIGGER IF NOT EXISTS book_change_ad AFTER DELETE ON book BEGIN "
+    f"{NEXT_SEQ}INSERT INTO book_tombstone (book_id, change_seq) VALUES (OLD.id, {CURRENT_SEQ}) "
+    "ON CONFLICT (book_id) DO UPDATE SET change_seq = excluded.change_seq; END",
+]
+
+
+def upgrade() -> None:
+    op.add_column("book", sa.Column("change_seq", sa.BigInteger, nullable=True))
+    op.create_table(
+        "book_tombstone",
+        sa.Column("book_id", sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column("change_seq", sa.BigInteger, nullable=False),
+    )
+    op.create_index("ix_book_tombstone_change_seq", "book_tombstone", ["change_seq"])
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        # Existing books enter the feed in id order; no write may run until the triggers exist
+        op.execute("LOCK TABLE book IN SHARE MODE")
+        op.execute("CREATE SEQUENCE IF NOT EXISTS book_change_seq")
+        op.execute("UPDATE book SET change_seq = id")
+        op.execute("SELECT setval('book_change_seq', (SELECT coalesce(max(id), 0) + 1 FROM book), false)")
+        for stmt in PG_FEED:
+            op.execute(stmt)
+    elif dialect == "sqlite":
+        op.execute("UPDATE book SET change_seq = id")
+        op.execute("CREATE TABLE IF NOT EXISTS book_change_seq (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)")
+        op.execute("INSERT OR IGNORE INTO book_change_seq (id, value) SELECT 1, coalesce(max(id), 0) FROM book")
+        for stmt in SQLITE_FEED:
+            op.execute(stmt)
+    op.create_index("ux_book_change_seq", "book", ["change_seq"], unique=True)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    op.drop_index("ux_book_change_seq", table_name="book")
+    if dialect == "postgresql":
+        for name in ("book_change_tombstone", "book_change_touch", "book_change_lock"):
+            op.execute(f"DROP TRIGGER IF EXISTS {name} ON book")
+            op.execute(f"DROP FUNCTION IF EXISTS {name}()")
+        op.execute("ALTER TABLE book ALTER COLUMN change_seq DROP DEFAULT")
+        op.execute("DROP SEQUENCE IF EXISTS book_change_seq")
+    elif dialect == "sqlite":
+        for name in ("book_change_ad", "book_change_au", "book_change_ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS book_change_seq")
+    op.drop_index("ix_book_tombstone_change_seq", table_name="book_tombstone")
+    op.drop_table("book_tombstone")
+    # Native DROP COLUMN (SQLite 3.35+); batch mode would rebuild book and lose its triggers
+    op.execute("ALTER TABLE book DROP COLUMN change_seq")
@@ -0,0 +1,105 @@
+"""per-day book counts maintained by triggers
+
+Revision ID: xxxx_book_day_stats
+Revises: xxxx_listing_indexes
+Create Date: 2026-10-18 17:48:36.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "xxxx_book_day_stats"
+down_revision = "xxxx_listing_indexes"
+branch_labels = None
+depends_on = None
+
+
+def _day_deltas(source, sign, day):
+    return (
+        f"SELECT {day('created_at')} AS day, "
+        f"CASE WHEN deleted_at IS NULL THEN {sign} ELSE 0 END AS created_live, "
+        f"CASE WHEN deleted_at IS NULL THEN 0 ELSE {sign} END AS created_trash, "
+        f"0 AS deleted FROM {source} "
+        f"UNION ALL SELECT {day('deleted_at')}, 0, 0, {sign} FROM {source} WHERE deleted_at IS NOT NULL"
+    )
+
+
+def _apply_day_deltas(sources, day):
+    deltas = " UNION ALL ".join(_day_deltas(source, sign, day) for source, sign in sources)
+    return (
+        "INSERT INTO book_day_stats (day, created_live, created_trash, deleted) "
+        "SELECT day, sum(created_live), sum(created_trash), sum(deleted) "
+        f"FROM ({deltas}) AS d WHERE true GROUP BY day "
+        "HAVING sum(created_live) <> 0 OR sum(created_trash) <> 0 OR sum(deleted) <> 0 "
+        "ON CONFLICT (day) DO UPDATE SET "
+        "created_live = book_day_stats.created_live + excluded.created_live, "
+        "created_trash = book_day_stats.created_trash + excluded.created_trash, "
+        "deleted = book_day_stats.deleted + excluded.deleted"
+    )
+
+
+def _pg_day(column):
+    return f"CAST({column} AT TIME ZONE 'UTC' AS date)"
+
+
+def _sqlite_day(column):
+    return f"date({column})"
+
+
+PG_TRIGGERS = {
+    "insert": ("NEW TABLE AS new_rows", [("new_rows", 1)]),
+    "update": ("OLD TABLE AS old_rows NEW TABLE AS new_rows", [("old_rows", -1), ("new_rows", 1)]),
+    "delete": ("OLD TABLE AS old_rows", [("old_rows", -1)]),
+}
+
+NEW_ROW = "(SELECT NEW.created_at AS created_at, NEW.deleted_at AS deleted_at)"
+OLD_ROW = "(SELECT OLD.created_at AS created_at, OLD.deleted_at AS deleted_at)"
+SQLITE_TRIGGERS = {
+    "book_day_stats_ai": ("AFTER INSERT", [(NEW_ROW, 1)]),
+    "book_day_stats_au": ("AFTER UPDATE OF created_at, deleted_at", [(OLD_ROW, -1), (NEW_ROW, 1)]),
+    "book_day_stats_ad": ("AFTER DELETE", [(OLD_ROW, -1)]),
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "book_day_stats",
+        sa.Column("day", sa.Date, primary_key=True),
+        sa.Column("created_live", sa.BigInteger, nullable=False),
+        sa.Column("created_trash", sa.BigInteger, nullable=False),
+        sa.Column("deleted", sa.BigInteger, nullable=False),
+    )
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        # Backfill and triggers in one transaction: no write can slip in between
+        op.execute("LOCK TABLE book IN SHARE MODE")
+        op.execute(_apply_day_deltas([("book", 1)], _pg_day))
+        for name, (referencing, sources) in PG_TRIGGERS.items():
+            op.execute(
+                f"CREATE OR REPLACE FUNCTION book_day_stats_{name}() RETURNS trigger LANGUAGE plpgsql AS $$ "
+                f"BEGIN {_apply_day_deltas(sources, _pg_day)}; RETURN NULL; END $$"
+            )
+            op.execute(
+                f"CREATE TRIGGER book_day_stats_{name} AFTER {name.upper()} ON book REFERENCING {referencing} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION book_day_stats_{name}()"
+            )
+    elif dialect == "sqlite":
+        op.execute(_apply_day_deltas([("book", 1)], _sqlite_day))
+        for name, (event, sources) in SQLITE_TRIGGERS.items():
+            op.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {name} {event} ON book BEGIN "
+                f"{_apply_day_deltas(sources, _sqlite_day)}; END"
+            )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for name in PG_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS book_day_stats_{name} ON book")
+            op.execute(f"DROP FUNCTION IF EXISTS book_day_stats_{name}()")
+    elif dialect == "sqlite":
+        for name in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_table("book_day_stats")
@@ -0,0 +1,43 @@
+"""database-enforced dedup key for live books
+
+Revision ID: xxxx_book_dedup_key
+Revises: xxxx_catalog_version
+Create Date: 2026-10-18 14:05:52.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "xxxx_book_dedup_key"
+down_revision = "xxxx_catalog_version"
+branch_labels = None
+depends_on = None
+
+
+# Live duplicates that slipped past the old check-then-insert: keep the oldest,
+# move the rest to the trash (restorable) so the unique index can be built
+TRASH_LIVE_DUPLICATES = """
+UPDATE book SET deleted_at = CURRENT_TIMESTAMP, deleted_by = 'migration:dedup'
+WHERE deleted_at IS NULL AND EXISTS (
+    SELECT 1 FROM book older
+    WHERE older.deleted_at IS NULL
+      AND lower(older.title) = lower(book.title)
+      AND lower(older.author) = lower(book.author)
+      AND older.id < book.id
+)
+"""
+
+
+def upgrade() -> None:
+    op.execute(TRASH_LIVE_DUPLICATES)
+    op.create_index(
+        "ux_book_title_author_live", "book", [sa.text("lower(title)"), sa.text("lower(author)")],
+        unique=True,
+        postgresql_where=sa.text("deleted_at IS NULL"),
+        sqlite_where=sa.text("deleted_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_book_title_author_live", table_name="book")
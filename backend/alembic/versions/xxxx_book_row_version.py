@@ -0,0 +1,44 @@
+"""row version: per-book version column for If-Match
+
+Revision ID: xxxx_book_row_version
+Revises: xxxx_book_change_feed
+Create Date: 2026-10-18 21:40:03.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "xxxx_book_row_version"
+down_revision = "xxxx_book_change_feed"
+branch_labels = None
+depends_on = None
+
+
+NEXT_SEQ = "UPDATE book_change_seq SET value = value + 1 WHERE id = 1; "
+CURRENT_SEQ = "(SELECT value FROM book_change_seq WHERE id = 1)"
+
+
+def _sqlite_update_trigger(columns: str) -> str:
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS book_change_au AFTER UPDATE OF {columns} ON book BEGIN "
+        f"{NEXT_SEQ}UPDATE book SET change_seq = {CURRENT_SEQ} WHERE id = NEW.id; END"
+    )
+
+
+def upgrade() -> None:
+    # Constant default: no table rewrite on Postgres 11+, plain ADD COLUMN on SQLite
+    op.add_column("book", sa.Column("version", sa.Integer, nullable=False, server_default="1"))
+
+    if op.get_bind().dialect.name == "sqlite":
+        # The change-feed update trigger names its columns; a version-only write is a change too
+        op.execute("DROP TRIGGER IF EXISTS book_change_au")
+        op.execute(_sqlite_update_trigger("title, author, created_at, created_by, deleted_at, deleted_by, version"))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS book_change_au")
+        op.execute(_sqlite_update_trigger("title, author, created_at, created_by, deleted_at, deleted_by"))
+    # Native DROP COLUMN (SQLite 3.35+); batch mode would rebuild book and lose its triggers
+    op.execute("ALTER TABLE book DROP COLUMN version")
@@ -0,0 +1,28 @@
+"""catalog version counter
+
+Revision ID: xxxx_catalog_version
+Revises: xxxx_search_indexes
+Create Date: 2026-10-18 11:40:05.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "xxxx_catalog_version"
+down_revision = "xxxx_search_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    table = op.create_table(
+        "catalog_version",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("version", sa.BigInteger, nullable=False),
+    )
+    op.bulk_insert(table, [{"id": 1, "version": 0}])
+
+
+def downgrade() -> None:
+    op.drop_table("catalog_version")
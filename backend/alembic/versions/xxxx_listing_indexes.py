@@ -0,0 +1,38 @@
+"""partial composite indexes for the live and trash listings
+
+Revision ID: xxxx_listing_indexes
+Revises: xxxx_book_dedup_key
+Create Date: 2026-10-18 16:21:09.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "xxxx_listing_indexes"
+down_revision = "xxxx_book_dedup_key"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Live listing: WHERE deleted_at IS NULL ORDER BY created_at DESC, id DESC
+    op.create_index(
+        "ix_book_live_created", "book", [sa.text("created_at DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text("deleted_at IS NULL"),
+        sqlite_where=sa.text("deleted_at IS NULL"),
+    )
+    # Trash listing: WHERE deleted_at IS NOT NULL ORDER BY deleted_at DESC, id DESC
+    op.create_index(
+        "ix_book_trash_deleted", "book", [sa.text("deleted_at DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text("deleted_at IS NOT NULL"),
+        sqlite_where=sa.text("deleted_at IS NOT NULL"),
+    )
+    # Every non-null deleted_at is in ix_book_trash_deleted now
+    op.drop_index("ix_book_deleted_at", table_name="book")
+
+
+def downgrade() -> None:
+    op.create_index("ix_book_deleted_at", "book", ["deleted_at"])
+    op.drop_index("ix_book_trash_deleted", table_name="book")
+    op.drop_index("ix_book_live_created", table_name="book")
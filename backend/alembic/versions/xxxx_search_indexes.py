@@ -0,0 +1,57 @@
+"""search indexes (pg_trgm on Postgres, FTS5 on SQLite)
+
+Revision ID: xxxx_search_indexes
+Revises: xxxx_init_schema
+Create Date: 2026-10-18 09:12:31.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "xxxx_search_indexes"
+down_revision = "xxxx_init_schema"
+branch_labels = None
+depends_on = None
+
+
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5("
+    "title, author, content='book', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN "
+    "INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END",
+    "CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN "
+    "INSERT INTO book_fts(book_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); END",
+    "CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, author ON book BEGIN "
+    "INSERT INTO book_fts(book_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); "
+    "INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END",
+    "INSERT INTO book_fts(book_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            "ix_book_title_trgm", "book", [sa.text("lower(title) gin_trgm_ops")],
+            postgresql_using="gin",
+        )
+        op.create_index(
+            "ix_book_author_trgm", "book", [sa.text("lower(author) gin_trgm_ops")],
+            postgresql_using="gin",
+        )
+    elif dialect == "sqlite":
+        for stmt in SQLITE_FTS:
+            op.execute(stmt)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.drop_index("ix_book_author_trgm", table_name="book")
+        op.drop_index("ix_book_title_trgm", table_name="book")
+    elif dialect == "sqlite":
+        for trigger in ("book_fts_au", "book_fts_ad", "book_fts_ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS book_fts")
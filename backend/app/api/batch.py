@@ -0,0 +1,280 @@
+from __future__ import annotations
+import io
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, Literal, Set
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import read_cache
+from app.db.session import DbSession, get_session
+from app.models.book import Book
+from app.schemas.book import (
+    BatchItemResult,
+    BatchResult,
+    BookBatchCreate,
+    BookBatchDelete,
+    BookBatchUpdate,
+    BookIds,
+    BookImportResult,
+    BookOut,
+)
+from app.services.catalog_version import bump_version
+from app.services.importer import import_stream, insert_ignoring_duplicates
+from app.services.suggest import suggest_index
+
+# Included ahead of the books router: "/books/trash:restore" would otherwise hit PUT /books/{book_id}
+router = APIRouter()
+
+# Uploads up to this size are buffered in memory, larger ones spill to a temp file
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+def _dialect(db: DbSession) -> str:
+    return db.get_bind().dialect.name
+
+def _result(results: List[BatchItemResult]) -> BatchResult:
+    ok = sum(1 for r in results if r.status < 400)
+    return BatchResult(succeeded=ok, failed=len(results) - ok, results=results)
+
+async def _commit(db: DbSession, tags: List[str], bumped: bool = False) -> None:
+    if not bumped:
+        await bump_version(db)
+    await db.commit()
+    await read_cache.invalidate(*tags)
+    suggest_index.poke()
+
+@router.post("/books:batch", response_model=BatchResult)
+async def batch_create_books(
+    payload: BookBatchCreate,
+    db: DbSession = Depends(get_session),
+):
+    """Create many books with one INSERT ... ON CONFLICT DO NOTHING; duplicates (in the table or the batch) get 409.
+
+    Only the dedup index decides what is a duplicate, so case folding is the database's
+    ``lower()`` (ASCII-only on SQLite) for duplicates within the batch too.
+    """
+    to_insert, positions = [], {}
+    for index, item in enumerate(payload.items):
+        key = (item.title, item.author)
+        positions.setdefault(key, []).append(index)
+        to_insert.append({"title": item.title, "author": item.author, "created_by": item.created_by or "system"})
+
+    # Rows skipped by the dedup index are simply missing from RETURNING. A returned row has
+    # the exact title and author it was sent with, and of several items that collide the
+    # first one is inserted, so it belongs to the first unmatched item with that spelling
+    books = (
+        await db.scalars(insert_ignoring_duplicates(_dialect(db)).returning(Book), to_insert)
+    ).all()
+    results: Dict[int, BatchItemResult] = {}
+    for book in books:
+        index = positions[(book.title, book.author)].pop(0)
+        results[index] = BatchItemResult(
+            index=index, status=201, id=book.id, book=BookOut.model_validate(book)
+        )
+    for indexes in positions.values():
+        for index in indexes:
+            results[index] = BatchItemResult(index=index, status=409, detail="Book already exists")
+    if books:
+        await _commit(db, ["live", *(f"book:{book.id}" for book in books)])
+
+    return _result([results[i] for i in range(len(payload.items))])
+
+def _update_rows(s: Session, changes: Dict[int, dict]) -> Set[int]:
+    """
+    Apply each book's changes; returns the ids whose change would duplicate a live book.
+
+    One executemany UPDATE per changed column set first. If that collides, it is rolled
+    back to its savepoint and the books are updated one by one, each in a savepoint of
+    its own, so only the colliding ones fail.
+    """
+    groups: Dict[tuple, List[dict]] = {}
+    for book_id, values in changes.items():
+        # An executemany UPDATE needs the same columns in every row
+        groups.setdefault(tuple(sorted(values)), []).append({"id": book_id, **values})
+    try:
+        with s.begin_nested():
+            for rows in groups.values():
+                s.execute(update(Book).values(version=Book.version + 1), rows)
+        return set()
+    except IntegrityError:
+        pass
+
+    conflicts = set()
+    for book_id, values in changes.items():
+        try:
+            with s.begin_nested():
+                s.execute(update(Book).where(Book.id == book_id).values(**values, version=Book.version + 1))
+        except IntegrityError:
+            conflicts.add(book_id)
+    return conflicts
+
+@router.patch("/books:batch", response_model=BatchResult)
+async def batch_update_books(
+    payload: BookBatchUpdate,
+    db: DbSession = Depends(get_session),
+):
+    """Apply per-book partial updates with one executemany UPDATE; deleted or unknown ids get 404.
+
+    A change that would make two live books share a title and author gets 409 for that
+    book alone; the others are still applied.
+    """
+    ids = {item.id for item in payload.items}
+    # Bump first. The change-feed trigger takes the catalog row lock before any statement on
+    # book, so a writer that locks book rows itself must already hold it, or it can deadlock
+    # against a plain write. It also starts the write transaction, so on SQLite the savepoints
+    # in _update_rows nest inside it
+    await bump_version(db)
+    live = set(
+        (await db.scalars(
+            select(Book.id).where(Book.id.in_(ids), Book.deleted_at.is_(None)).with_for_update()
+        )).all()
+    )
+
+    changes: Dict[int, dict] = {}
+    for item in payload.items:
+        if item.id in live:
+            changes.setdefault(item.id, {}).update(item.model_dump(exclude_unset=True, exclude={"id"}))
+    changes = {book_id: values for book_id, values in changes.items() if values}
+    conflicts = await db.run_sync(_update_rows, changes) if changes else set()
+
+    books: Dict[int, BookOut] = {}
+    if live - conflicts:
+        rows = (await db.scalars(select(Book).where(Book.id.in_(live - conflicts)))).all()
+        books = {row.id: BookOut.model_validate(row) for row in rows}
+    changed = set(changes) - conflicts
+    if changed:
+        await _commit(db, ["live", *(f"book:{book_id}" for book_id in changed)], bumped=True)
+    else:
+        # Nothing written: give back the catalog row lock without a new version
+        await db.rollback()
+
+    results = []
+    for i, item in enumerate(payload.items):
+        if item.id in books:
+            results.append(BatchItemResult(index=i, status=200, id=item.id, book=books[item.id]))
+        elif item.id in conflicts:
+            results.append(BatchItemResult(index=i, status=409, id=item.id, detail="Book already exists"))
+        else:
+            results.append(BatchItemResult(index=i, status=404, id=item.id, detail="Book not found"))
+    return _result(results)
+
+@router.delete("/books:batch", response_model=BatchResult)
+async def batch_delete_books(
+    payload: BookBatchDelete,
+    db: DbSession = Depends(get_session),
+):
+    """Soft-delete many books with a single UPDATE ... RETURNING; already deleted or unknown ids get 404."""
+    deleted = set(
+        (await db.scalars(
+            update(Book)
+            .where(Book.id.in_(set(payload.ids)), Book.deleted_at.is_(None))
+            .values(
+                deleted_at=datetime.now(tz=timezone.utc),
+                deleted_by=payload.deleted_by or "system",
+                version=Book.version + 1,
+            )
+            .returning(Book.id)
+            .execution_options(synchronize_session=False)
+        )).all()
+    )
+    if deleted:
+        await _commit(db, ["live", "trash", *(f"book:{book_id}" for book_id in deleted)])
+
+    results = [
+        BatchItemResult(index=i, status=204, id=book_id)
+        if book_id in deleted
+        else BatchItemResult(index=i, status=404, id=book_id, detail="Book not found")
+        for i, book_id in enumerate(payload.ids)
+    ]
+    return _result(results)
+
+@router.put("/books/trash:restore", response_model=BatchResult)
+async def batch_restore_books(
+    payload: BookIds,
+    db: DbSession = Depends(get_session),
+):
+    """Restore many books from the trash with a single UPDATE ... RETURNING.
+
+    Books whose title and author are taken by a live book stay in the trash and get 409.
+    """
+    live = aliased(Book)
+    taken = (
+        select(live.id)
+        .where(
+            live.deleted_at.is_(None),
+            func.lower(live.title) == func.lower(Book.title),
+            func.lower(live.author) == func.lower(Book.author),
+        )
+        .exists()
+    )
+    try:
+        restored = {
+            book.id: BookOut.model_validate(book)
+            for book in (await db.scalars(
+                update(Book)
+                .where(Book.id.in_(set(payload.ids)), Book.deleted_at.is_not(None), ~taken)
+                .values(deleted_at=None, deleted_by=None, version=Book.version + 1)
+                .returning(Book)
+                .execution_options(synchronize_session=False)
+            )).all()
+        }
+    except IntegrityError:
+        # Two trashed copies of the same book in one request
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Batch would restore the same book twice")
+
+    blocked = set()
+    if len(restored) < len(set(payload.ids)):
+        blocked = set(
+            (await db.scalars(
+                select(Book.id).where(
+                    Book.id.in_(set(payload.ids) - set(restored)), Book.deleted_at.is_not(None)
+                )
+            )).all()
+        )
+    if restored:
+        await _commit(db, ["live", "trash", *(f"book:{book_id}" for book_id in restored)])
+
+    results = []
+    for i, book_id in enumerate(payload.ids):
+        if book_id in restored:
+            results.append(BatchItemResult(index=i, status=200, id=book_id, book=restored[book_id]))
+        elif book_id in blocked:
+            results.append(BatchItemResult(index=i, status=409, id=book_id, detail="Book already exists"))
+        else:
+            results.append(
+                BatchItemResult(index=i, status=404, id=book_id, detail="Book not found or not deleted")
+            )
+    return _result(results)
+
+@router.post("/books:import", response_model=BookImportResult)
+async def import_books(
+    request: Request,
+    format: Literal["csv", "ndjson"] = Query("csv", description="csv: header with title,author[,created_by]; ndjson: one object per line"),
+    created_by: str = Query("import", min_length=1, max_length=255, description="For rows without created_by"),
+    dedup: Literal["live", "all"] = Query("live", description="all: also skip books that only exist in the trash"),
+):
+    """
+    Bulk import from the raw request body: COPY (Postgres) or executemany (SQLite) into a
+    staging table, then one INSERT ... ON CONFLICT DO NOTHING against the dedup index.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        try:
+            report = await run_in_threadpool(import_stream, stream, format, created_by, dedup)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            stream.detach()
+
+    if report["inserted"]:
+        await read_cache.invalidate("live")
+        suggest_index.poke()
+    return report
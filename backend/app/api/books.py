@@ -1,23 +1,88 @@
 from __future__ import annotations
 from datetime import date, datetime, timedelta, timezone
-from typing import List, Optional
-
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-
-from app.db.session import SessionLocal
+from typing import List, Literal, Optional, Set
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import Select
+
+from app.api.caching import book_etag, conditional_book, conditional_read, if_match_versions, pin_read_version
+from app.api.pagination import NEXT_CURSOR_HEADER, keyset_after, next_cursor
+from app.api.responses import BOOK_COLUMNS, book_columns, fast_json, parse_fields, row_dicts
+from app.core.cache import read_cache
+from app.core.config import settings
+from app.db.replicas import get_read_session
+from app.db.session import DbSession, get_session, stream_partitions
 from app.models.book import Book
-from app.schemas.book import BookOut, BookCreate, BookUpdate
+from app.schemas.book import BookOut, BookCreate, BookPage, BookStats, BookUpdate, Suggestion
+from app.services import book_stats
+from app.services.book_writes import book_state, delete_book_row, select_book_row, update_book_row
+from app.services.catalog_version import bump_version
+from app.services.counting import estimate_rows
+from app.services.export import ENCODERS, EXPORT_COLUMNS, MEDIA_TYPES
+from app.services.importer import insert_ignoring_duplicates
+from app.services.search import apply_search
+from app.services.suggest import suggest_index
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
+TotalMode = Literal["exact", "estimate"]
+
+def _dump(rows) -> List[dict]:
+    return [BookOut.model_validate(row).model_dump(mode="json") for row in rows]
+
+def _live_tags(include_deleted: bool) -> tuple:
+    return ("live", "trash") if include_deleted else ("live",)
+
+def _dialect(db: DbSession) -> str:
+    return db.get_bind().dialect.name
+
+async def _write_unique(db: DbSession, stmt):
+    """Run a single-row write that can collide with another live book on the dedup key; that collision is a 409."""
     try:
-        yield db
-    finally:
-        db.close()
+        return (await db.execute(stmt)).first()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Book already exists")
+
+async def _write_missed(
+    db: DbSession,
+    book_id: int,
+    expected: Optional[Set[int]],
+    *,
+    trashed: bool,
+    detail: str,
+    live_detail: Optional[str] = None,
+) -> HTTPException:
+    """
+    Why a single-row write matched no row. The book is missing, or not in the trash state the
+    write needs: 404 with ``detail`` (409 with ``live_detail`` for a live book, when given).
+    Otherwise its version is not one If-Match names: 412 with the current ETag.
+    """
+    # Release the write transaction (and, on Postgres, the catalog row lock) before looking
+    await db.rollback()
+    state = await book_state(db, book_id)
+    if state is None:
+        return HTTPException(status_code=404, detail=detail)
+    if (state.deleted_at is not None) != trashed:
+        if live_detail and state.deleted_at is None:
+            return HTTPException(status_code=409, detail=live_detail)
+        return HTTPException(status_code=404, detail=detail)
+    if expected is not None and state.version not in expected:
+        return HTTPException(
+            status_code=412,
+            detail="Book has changed since it was read",
+            headers={"ETag": book_etag(state.version)},
+        )
+    # It reached the needed state only after the write looked; nothing was written
+    return HTTPException(status_code=409, detail="Book changed concurrently, retry")
+
+def _written(response: Response, row) -> dict:
+    book = dict(row._mapping)
+    response.headers["ETag"] = book_etag(book["version"])
+    return book
 
 def _start_of_day(d: date) -> datetime:
     return datetime.combine(d, datetime.min.time()).replace(tzinfo=timezone.utc)
@@ -26,204 +91,429 @@ def _end_of_day_exclusive(d: date) -> datetime:
     next_day = d + timedelta(days=1)
     return datetime.combine(next_day, datetime.min.time()).replace(tzinfo=timezone.utc)
 
-@router.get("/books", response_model=List[BookOut])
-def list_books(
-    q: Optional[str] = Query(None, description="Case-insensitive search in title"),
+def _live_books(
+    db: DbSession,
+    q: Optional[str],
+    created_from: Optional[date],
+    created_to: Optional[date],
+    include_deleted: bool,
+    rank: bool = False,
+) -> Select:
+    stmt = select(Book)
+    if not include_deleted:
+        stmt = stmt.where(Book.deleted_at.is_(None))
+    stmt = apply_search(stmt, q, _dialect(db), rank=rank)
+    if created_from:
+        stmt = stmt.where(Book.created_at >= _start_of_day(created_from))
+    if created_to:
+        stmt = stmt.where(Book.created_at < _end_of_day_exclusive(created_to))
+    return stmt
+
+def _trash_books(
+    db: DbSession,
+    q: Optional[str],
+    deleted_from: Optional[date],
+    deleted_to: Optional[date],
+    rank: bool = False,
+) -> Select:
+    stmt = select(Book).where(Book.deleted_at.is_not(None))
+    stmt = apply_search(stmt, q, _dialect(db), rank=rank)
+    if deleted_from:
+        stmt = stmt.where(Book.deleted_at >= _start_of_day(deleted_from))
+    if deleted_to:
+        stmt = stmt.where(Book.deleted_at < _end_of_day_exclusive(deleted_to))
+    return stmt
+
+async def _count(db: DbSession, stmt: Select) -> int:
+    return await db.scalar(stmt.with_only_columns(func.count(Book.id)).order_by(None)) or 0
+
+def _page_stmt(stmt: Select, kind: str, sort_col, cursor: Optional[str], ranked: bool) -> Select:
+    if cursor:
+        if ranked:
+            raise HTTPException(status_code=400, detail="cursor cannot be combined with rank")
+        stmt = stmt.where(keyset_after(sort_col, Book.id, kind, cursor))
+    return stmt.order_by(sort_col.desc(), Book.id.desc())
+
+async def _page(
+    db: DbSession,
+    filtered: Select,
+    kind: str,
+    sort_col,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    ranked: bool,
+    total_mode: str,
+    fields: List[str],
+    rollup_total: Optional[int] = None,
+) -> dict:
+    """
+    Items plus total in one statement (window count), or with a planner estimate when asked.
+
+    ``rollup_total`` is the exact total from the day rollup, passed when the filters
+    allow it; the items are then fetched without the window.
+    Returns BookPage's JSON shape built from plain column tuples; items carry only ``fields``.
+    """
+    paged = _page_stmt(filtered, kind, sort_col, cursor, ranked).offset(offset).limit(limit)
+    paged = paged.with_only_columns(*book_columns(fields, Book.id, sort_col))
+
+    estimate = None
+    if total_mode == "estimate" and rollup_total is None:
+        estimate = await db.run_sync(estimate_rows, filtered)
+        if estimate is not None and estimate < settings.COUNT_ESTIMATE_THRESHOLD:
+            estimate = None
+
+    if rollup_total is not None:
+        rows, total = (await db.execute(paged)).all(), rollup_total
+    elif estimate is not None:
+        rows, total = (await db.execute(paged)).all(), estimate
+    elif cursor:
+        # The window would only see rows after the cursor, so count the full set separately
+        rows, total = (await db.execute(paged)).all(), await _count(db, filtered)
+    else:
+        rows = (await db.execute(paged.add_columns(func.count().over().label("total")))).all()
+        # An offset past the end returns no rows to carry the window total
+        total = rows[0].total if rows else (await _count(db, filtered) if offset else 0)
+
+    token = None if ranked else next_cursor(kind, rows, limit, sort_col.key)
+    return {
+        "items": row_dicts(rows, fields),
+        "total": total,
+        "total_estimated": estimate is not None,
+        "next_cursor": token,
+    }
+
+@router.get("/books", response_model=List[BookOut], dependencies=[Depends(conditional_read)])
+async def list_books(
+    response: Response,
+    q: Optional[str] = Query(None, description="Case-insensitive search in title and author"),
     created_from: Optional[date] = Query(None, description="YYYY-MM-DD inclusive start"),
     created_to: Optional[date] = Query(None, description="YYYY-MM-DD inclusive end"),
     include_deleted: bool = Query(False, description="Include soft-deleted books"),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor from X-Next-Cursor"),
+    rank: bool = Query(False, description="Order search matches by relevance first"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of BookOut fields, e.g. id,title,author"),
+    db: DbSession = Depends(get_read_session),
 ):
-    query = db.query(Book)
-
-    if not include_deleted:
-        query = query.filter(Book.deleted_at.is_(None))
-
-    if q:
-        query = query.filter(func.lower(Book.title).like(f"%{q.lower()}%"))
-
-    if created_from:
-        query = query.filter(Book.created_at >= _start_of_day(created_from))
-    if created_to:
-        query = query.filter(Book.created_at < _end_of_day_exclusive(created_to))
+    ranked = rank and bool(q)
+    names = parse_fields(fields)
+
+    async def load():
+        stmt = _live_books(db, q, created_from, created_to, include_deleted, rank=ranked)
+        stmt = _page_stmt(stmt, "created", Book.created_at, cursor, ranked)
+        stmt = stmt.with_only_columns(*book_columns(names, Book.id, Book.created_at))
+        rows = (await db.execute(stmt.offset(offset).limit(limit))).all()
+        token = None if ranked else next_cursor("created", rows, limit, "created_at")
+        return {"items": row_dicts(rows, names), "next_cursor": token}
+
+    params = dict(q=q, created_from=created_from, created_to=created_to, include_deleted=include_deleted,
+                  limit=limit, offset=offset, cursor=cursor, rank=ranked, fields=",".join(names))
+    page = await read_cache.get_or_load("list", params, _live_tags(include_deleted), load)
+    if page["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    return fast_json(page["items"], response)
+
+@router.get("/books/count", dependencies=[Depends(conditional_read)])
+async def count_books(
+    q: Optional[str] = Query(None, description="Case-insensitive search in title and author"),
+    created_from: Optional[date] = Query(None, description="YYYY-MM-DD inclusive start"),
+    created_to: Optional[date] = Query(None, description="YYYY-MM-DD inclusive end"),
+    include_deleted: bool = Query(False, description="Include soft-deleted books"),
+    db: DbSession = Depends(get_read_session),
+):
+    async def load():
+        if not q:
+            return await book_stats.count_live(db, created_from, created_to, include_deleted)
+        return await _count(db, _live_books(db, q, created_from, created_to, include_deleted))
 
-    return (
-        query.order_by(Book.created_at.desc(), Book.id.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+    params = dict(q=q, created_from=created_from, created_to=created_to, include_deleted=include_deleted)
+    total = await read_cache.get_or_load("count", params, _live_tags(include_deleted), load)
+    return {"total": total}
 
-@router.get("/books/count")
-def count_books(
-    q: Optional[str] = Query(None, description="Case-insensitive search in title"),
+@router.get("/books/stats", response_model=BookStats, dependencies=[Depends(conditional_read)])
+async def book_stats_histogram(
+    bucket: book_stats.Bucket = Query("month", description="day or month (UTC)"),
+    start: Optional[date] = Query(None, description="YYYY-MM-DD inclusive start"),
+    end: Optional[date] = Query(None, description="YYYY-MM-DD inclusive end"),
+    db: DbSession = Depends(get_read_session),
+):
+    """Books created (split by live/trash now) and deleted per day or month, read from the day rollup."""
+    async def load():
+        return await book_stats.histogram(db, bucket, start, end)
+
+    params = dict(bucket=bucket, start=start, end=end)
+    return await read_cache.get_or_load("stats", params, ("live", "trash"), load)
+
+@router.get("/books/suggest", response_model=List[Suggestion])
+async def suggest_books(
+    response: Response,
+    prefix: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Titles and authors with a word starting with ``prefix``, from this worker's in-memory
+    index (no database query); may trail the latest writes by SUGGEST_REFRESH_INTERVAL.
+    """
+    if not settings.SUGGEST_ENABLED:
+        raise HTTPException(status_code=404, detail="Suggestions are off (set SUGGEST_ENABLED)")
+    if not suggest_index.ready:
+        raise HTTPException(status_code=503, detail="Suggest index is still loading", headers={"Retry-After": "1"})
+    return fast_json(suggest_index.search(prefix, limit), response)
+
+@router.get("/books/page", response_model=BookPage, dependencies=[Depends(conditional_read)])
+async def page_books(
+    response: Response,
+    q: Optional[str] = Query(None, description="Case-insensitive search in title and author"),
     created_from: Optional[date] = Query(None, description="YYYY-MM-DD inclusive start"),
     created_to: Optional[date] = Query(None, description="YYYY-MM-DD inclusive end"),
     include_deleted: bool = Query(False, description="Include soft-deleted books"),
-    db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor from next_cursor"),
+    rank: bool = Query(False, description="Order search matches by relevance first"),
+    total: TotalMode = Query("exact", description="exact: window count; estimate: planner statistics for large sets"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of BookOut fields, e.g. id,title,author"),
+    db: DbSession = Depends(get_read_session),
 ):
-    query = db.query(func.count(Book.id))
+    ranked = rank and bool(q)
+    names = parse_fields(fields)
+
+    async def load():
+        filtered = _live_books(db, q, created_from, created_to, include_deleted, rank=ranked)
+        known = None if q else await book_stats.count_live(db, created_from, created_to, include_deleted)
+        return await _page(
+            db, filtered, "created", Book.created_at, limit, offset, cursor, ranked, total, names, known
+        )
 
-    if not include_deleted:
-        query = query.filter(Book.deleted_at.is_(None))
+    params = dict(q=q, created_from=created_from, created_to=created_to, include_deleted=include_deleted,
+                  limit=limit, offset=offset, cursor=cursor, rank=ranked, total=total, fields=",".join(names))
+    page = await read_cache.get_or_load("page", params, _live_tags(include_deleted), load)
+    return fast_json(page, response)
 
-    if q:
-        query = query.filter(func.lower(Book.title).like(f"%{q.lower()}%"))
-    if created_from:
-        query = query.filter(Book.created_at >= _start_of_day(created_from))
-    if created_to:
-        query = query.filter(Book.created_at < _end_of_day_exclusive(created_to))
+@router.get("/books/trash", response_model=List[BookOut], dependencies=[Depends(conditional_read)])
+async def list_trash(
+    response: Response,
+    q: Optional[str] = Query(None, description="Case-insensitive search in title and author"),
+    deleted_from: Optional[date] = Query(None, description="Deleted from (inclusive)"),
+    deleted_to: Optional[date] = Query(None, description="Deleted to (inclusive)"),
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor from X-Next-Cursor"),
+    rank: bool = Query(False, description="Order search matches by relevance first"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of BookOut fields, e.g. id,title,author"),
+    db: DbSession = Depends(get_read_session),
+):
+    ranked = rank and bool(q)
+    names = parse_fields(fields)
+
+    async def load():
+        stmt = _trash_books(db, q, deleted_from, deleted_to, rank=ranked)
+        stmt = _page_stmt(stmt, "deleted", Book.deleted_at, cursor, ranked)
+        stmt = stmt.with_only_columns(*book_columns(names, Book.id, Book.deleted_at))
+        rows = (await db.execute(stmt.offset(offset).limit(limit))).all()
+        token = None if ranked else next_cursor("deleted", rows, limit, "deleted_at")
+        return {"items": row_dicts(rows, names), "next_cursor": token}
+
+    params = dict(q=q, deleted_from=deleted_from, deleted_to=deleted_to,
+                  limit=limit, offset=offset, cursor=cursor, rank=ranked, fields=",".join(names))
+    page = await read_cache.get_or_load("trash", params, ("trash",), load)
+    if page["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    return fast_json(page["items"], response)
+
+@router.get("/books/trash/count", dependencies=[Depends(conditional_read)])
+async def count_trash(
+    q: Optional[str] = Query(None, description="Case-insensitive search in title and author"),
+    deleted_from: Optional[date] = Query(None, description="Deleted from (inclusive)"),
+    deleted_to: Optional[date] = Query(None, description="Deleted to (inclusive)"),
+    db: DbSession = Depends(get_read_session),
+):
+    async def load():
+        if not q:
+            return await book_stats.count_trash(db, deleted_from, deleted_to)
+        return await _count(db, _trash_books(db, q, deleted_from, deleted_to))
 
-    total = query.scalar() or 0
+    params = dict(q=q, deleted_from=deleted_from, deleted_to=deleted_to)
+    total = await read_cache.get_or_load("trash_count", params, ("trash",), load)
     return {"total": total}
 
-@router.get("/books/trash", response_model=List[BookOut])
-def list_trash(
-    q: Optional[str] = Query(None, description="Case-insensitive search in title"),
+@router.get("/books/trash/page", response_model=BookPage, dependencies=[Depends(conditional_read)])
+async def page_trash(
+    response: Response,
+    q: Optional[str] = Query(None, description="Case-insensitive search in title and author"),
     deleted_from: Optional[date] = Query(None, description="Deleted from (inclusive)"),
     deleted_to: Optional[date] = Query(None, description="Deleted to (inclusive)"),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor from next_cursor"),
+    rank: bool = Query(False, description="Order search matches by relevance first"),
+    total: TotalMode = Query("exact", description="exact: window count; estimate: planner statistics for large sets"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of BookOut fields, e.g. id,title,author"),
+    db: DbSession = Depends(get_read_session),
 ):
-    query = db.query(Book).filter(Book.deleted_at.is_not(None))
-
-    if q:
-        query = query.filter(func.lower(Book.title).like(f"%{q.lower()}%"))
-
-    if deleted_from:
-        query = query.filter(Book.deleted_at >= _start_of_day(deleted_from))
-    if deleted_to:
-        query = query.filter(Book.deleted_at < _end_of_day_exclusive(deleted_to))
+    ranked = rank and bool(q)
+    names = parse_fields(fields)
+
+    async def load():
+        filtered = _trash_books(db, q, deleted_from, deleted_to, rank=ranked)
+        known = None if q else await book_stats.count_trash(db, deleted_from, deleted_to)
+        return await _page(
+            db, filtered, "deleted", Book.deleted_at, limit, offset, cursor, ranked, total, names, known
+        )
 
-    return (
-        query.order_by(Book.deleted_at.desc(), Book.id.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+    params = dict(q=q, deleted_from=deleted_from, deleted_to=deleted_to,
+                  limit=limit, offset=offset, cursor=cursor, rank=ranked, total=total, fields=",".join(names))
+    page = await read_cache.get_or_load("trash_page", params, ("trash",), load)
+    return fast_json(page, response)
 
-@router.get("/books/trash/count")
-def count_trash(
-    q: Optional[str] = Query(None, description="Case-insensitive search in title"),
-    deleted_from: Optional[date] = Query(None, description="Deleted from (inclusive)"),
-    deleted_to: Optional[date] = Query(None, description="Deleted to (inclusive)"),
-    db: Session = Depends(get_db),
+@router.get("/books/export", dependencies=[Depends(conditional_read)])
+async def export_books(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="ndjson: one JSON object per line; csv: with header"),
+    q: Optional[str] = Query(None, description="Case-insensitive search in title and author"),
+    created_from: Optional[date] = Query(None, description="YYYY-MM-DD inclusive start"),
+    created_to: Optional[date] = Query(None, description="YYYY-MM-DD inclusive end"),
+    include_deleted: bool = Query(False, description="Include soft-deleted books"),
+    db: DbSession = Depends(get_session),
 ):
-    query = db.query(func.count(Book.id)).filter(Book.deleted_at.isnot(None))
-    if q:
-        query = query.filter(func.lower(Book.title).like(f"%{q.lower()}%"))
-    if deleted_from:
-        query = query.filter(Book.deleted_at >= _start_of_day(deleted_from))
-    if deleted_to:
-        query = query.filter(Book.deleted_at < _end_of_day_exclusive(deleted_to))
-    total = query.scalar() or 0
-    return {"total": total}
+    """Stream every matching book (no limit) from a server-side cursor in constant memory."""
+    stmt = (
+        _live_books(db, q, created_from, created_to, include_deleted)
+        .with_only_columns(*EXPORT_COLUMNS)
+        .order_by(Book.created_at.desc(), Book.id.desc())
+    )
+    body = ENCODERS[format](stream_partitions(stmt, settings.EXPORT_BATCH_SIZE))
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="books.{format}"'},
+    )
 
 @router.put("/books/{book_id}/restore", response_model=BookOut)
-def restore_book(
+async def restore_book(
+    response: Response,
     book_id: int = Path(..., ge=1),
-    db: Session = Depends(get_db),
+    expected: Optional[Set[int]] = Depends(if_match_versions),
+    db: DbSession = Depends(get_session),
 ):
-    book = db.get(Book, book_id)
-    if not book or not book.deleted_at:
-        raise HTTPException(status_code=404, detail="Book not found or not deleted")
-
-    book.deleted_at = None
-    book.deleted_by = None
-    db.add(book)
-    db.commit()
-    db.refresh(book)
-    return book
-
-@router.get("/books/{book_id}", response_model=BookOut)
-def get_book(
+    stmt = update_book_row(book_id, {"deleted_at": None, "deleted_by": None}, trashed=True, expected=expected)
+    row = await _write_unique(db, stmt.returning(*BOOK_COLUMNS.values()))
+    if row is None:
+        raise await _write_missed(db, book_id, expected, trashed=True, detail="Book not found or not deleted")
+
+    await bump_version(db)
+    await db.commit()
+    await read_cache.invalidate("live", "trash", f"book:{book_id}")
+    suggest_index.poke()
+    return _written(response, row)
+
+@router.get("/books/{book_id}", response_model=BookOut, dependencies=[Depends(pin_read_version)])
+async def get_book(
+    request: Request,
+    response: Response,
     book_id: int = Path(..., ge=1),
     include_deleted: bool = Query(False),
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_read_session),
 ):
-    book = db.get(Book, book_id)
-    if not book or (book.deleted_at and not include_deleted):
+    async def load():
+        book = await db.get(Book, book_id)
+        if book is None:
+            # Raised, so never cached: imports add books without touching their book:<id> tags
+            raise HTTPException(status_code=404, detail="Book not found")
+        return _dump([book])[0]
+
+    book = await read_cache.get_or_load("book", {"id": book_id}, (f"book:{book_id}",), load)
+    if book["deleted_at"] and not include_deleted:
         raise HTTPException(status_code=404, detail="Book not found")
+    conditional_book(request, response, book["version"])
     return book
 
 @router.post("/books", response_model=BookOut, status_code=201)
-def create_book(
+async def create_book(
     payload: BookCreate,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: DbSession = Depends(get_session),
 ):
-    exists = (
-        db.query(Book)
-        .filter(
-            func.lower(Book.title) == payload.title.lower(),
-            func.lower(Book.author) == payload.author.lower(),
-            Book.deleted_at.is_(None),
-        )
-        .first()
+    # The partial unique index decides; no lookup first, so concurrent creates can't both win
+    book = await db.scalar(
+        insert_ignoring_duplicates(_dialect(db))
+        .values(title=payload.title, author=payload.author, created_by=payload.created_by or "system")
+        .returning(Book)
     )
-    if exists:
+    if book is None:
         raise HTTPException(status_code=409, detail="Book already exists")
 
-    book = Book(
-        title=payload.title,
-        author=payload.author,
-        created_by=payload.created_by or "system",
-    )
-    db.add(book)
-    db.commit()
-    db.refresh(book)
+    await bump_version(db)
+    await db.commit()
+    await db.refresh(book)
+    await read_cache.invalidate("live", f"book:{book.id}")
+    suggest_index.poke()
+    response.headers["ETag"] = book_etag(book.version)
     return book
 
 @router.put("/books/{book_id}", response_model=BookOut)
 @router.patch("/books/{book_id}", response_model=BookOut)
-def update_book(
+async def update_book(
     payload: BookUpdate,
+    response: Response,
     book_id: int = Path(..., ge=1),
-    db: Session = Depends(get_db),
+    expected: Optional[Set[int]] = Depends(if_match_versions),
+    db: DbSession = Depends(get_session),
 ):
-    book = db.get(Book, book_id)
-    if not book or book.deleted_at:
-        raise HTTPException(status_code=404, detail="Book not found")
-
-    for field, value in payload.model_dump(exclude_unset=True).items():
-        setattr(book, field, value)
-
-    db.add(book)
-    db.commit()
-    db.refresh(book)
-    return book
+    values = payload.model_dump(exclude_unset=True)
+    if not values:
+        # Nothing to set: no UPDATE, so no new version and no change-feed entry
+        row = (await db.execute(select_book_row(book_id, BOOK_COLUMNS.values(), expected=expected))).first()
+        if row is None:
+            raise await _write_missed(db, book_id, expected, trashed=False, detail="Book not found")
+        return _written(response, row)
+
+    stmt = update_book_row(book_id, values, expected=expected)
+    row = await _write_unique(db, stmt.returning(*BOOK_COLUMNS.values()))
+    if row is None:
+        raise await _write_missed(db, book_id, expected, trashed=False, detail="Book not found")
+
+    await bump_version(db)
+    await db.commit()
+    await read_cache.invalidate("live", f"book:{book_id}")
+    suggest_index.poke()
+    return _written(response, row)
 
 @router.delete("/books/{book_id}", status_code=204)
-def delete_book(
+async def delete_book(
     book_id: int = Path(..., ge=1),
     deleted_by: str = Query("system", description="Who deleted the book"),
-    db: Session = Depends(get_db),
+    expected: Optional[Set[int]] = Depends(if_match_versions),
+    db: DbSession = Depends(get_session),
 ):
-    book = db.get(Book, book_id)
-    if not book or book.deleted_at:
-        raise HTTPException(status_code=404, detail="Book not found")
+    stmt = update_book_row(
+        book_id,
+        {"deleted_at": datetime.now(tz=timezone.utc), "deleted_by": deleted_by},
+        expected=expected,
+    )
+    if (await db.execute(stmt.returning(Book.id))).first() is None:
+        raise await _write_missed(db, book_id, expected, trashed=False, detail="Book not found")
 
-    book.deleted_at = datetime.now(tz=timezone.utc)
-    book.deleted_by = deleted_by
-    db.add(book)
-    db.commit()
+    await bump_version(db)
+    await db.commit()
+    await read_cache.invalidate("live", "trash", f"book:{book_id}")
+    suggest_index.poke()
     return None
 
 @router.delete("/books/{book_id}/hard_delete", status_code=204)
-def hard_delete_book(
+async def hard_delete_book(
     book_id: int = Path(..., ge=1),
-    db: Session = Depends(get_db),
+    expected: Optional[Set[int]] = Depends(if_match_versions),
+    db: DbSession = Depends(get_session),
 ):
-    book = db.get(Book, book_id)
-    if not book:
-        raise HTTPException(status_code=404, detail="Book not found")
-    if book.deleted_at is None:
-        raise HTTPException(status_code=409, detail="Book must be in trash before hard delete")
+    if (await db.execute(delete_book_row(book_id, expected=expected).returning(Book.id))).first() is None:
+        raise await _write_missed(
+            db, book_id, expected, trashed=True,
+            detail="Book not found", live_detail="Book must be in trash before hard delete",
+        )
 
-    db.delete(book)
-    db.commit()
+    await bump_version(db)
+    await db.commit()
+    await read_cache.invalidate("trash", f"book:{book_id}")
     return None
-
-
@@ -0,0 +1,85 @@
+from __future__ import annotations
+import zlib
+from typing import Optional, Set
+
+from fastapi import Depends, HTTPException, Request, Response
+
+from app.core.cache import read_cache, read_version
+from app.core.config import settings
+from app.db.replicas import get_read_session
+from app.db.session import DbSession
+from app.services.catalog_version import current_version
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison (RFC 9110 §13.1.2): the W/ prefix is ignored."""
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def book_etag(version: int) -> str:
+    """Strong ETag for one book's row version, as write responses send it and If-Match expects it."""
+    return f'"{version}"'
+
+def if_match_versions(request: Request) -> Optional[Set[int]]:
+    """
+    Row versions ``If-Match`` accepts, or None when the write is unconditional (no header, or ``*``).
+
+    Strong comparison (RFC 9110 §13.1.1): weak tags (such as a listing's catalog ETag)
+    never match, so a header that names only those can only fail with 412.
+    """
+    header = request.headers.get("if-match")
+    if header is None:
+        return None
+    tags = [t.strip() for t in header.split(",")]
+    if "*" in tags:
+        return None
+    return {int(t[1:-1]) for t in tags if len(t) > 2 and t[0] == t[-1] == '"' and t[1:-1].isdigit()}
+
+def catalog_etag(version: int, request: Request) -> str:
+    """Weak ETag for a read: catalog version plus a checksum of the path and sorted query."""
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f'W/"{version}-{zlib.crc32(f"{request.url.path}?{query}".encode()):08x}"'
+
+async def pin_read_version(db: DbSession = Depends(get_read_session)) -> int:
+    """
+    Read the catalog version this request's reads must reflect, before any book query runs.
+
+    It keys ReadCache's single-flight loads (``read_version``), so a request that
+    arrives after a write never joins a load that started before it.
+    """
+    version = await current_version(db)
+    read_version.set(version)
+    if read_cache.coalesce:
+        # Hand the connection back: a request that then waits on an identical read
+        # already in flight holds none meanwhile; the one that runs it checks one out again
+        await db.rollback()
+    return version
+
+def _conditional(request: Request, response: Response, etag: str) -> None:
+    headers = {"ETag": etag, "Cache-Control": settings.HTTP_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+async def conditional_read(
+    request: Request,
+    response: Response,
+    version: int = Depends(pin_read_version),
+) -> None:
+    """
+    Answer ``If-None-Match`` with 304 from the catalog version alone, before any book query runs.
+
+    The version is read first, so a write landing in between can only make the
+    body newer than its ETag — the next request then simply gets a fresh 200.
+    ReadCache keys its entries by the same version, so a cached body is never
+    older than the ETag sent with it, whichever worker cached it.
+    """
+    _conditional(request, response, catalog_etag(version, request))
+
+def conditional_book(request: Request, response: Response, version: int) -> None:
+    """
+    Answer ``If-None-Match`` for one book from its row version, so writes to other books leave its ETag alone.
+
+    The ETag is the strong one writes send and If-Match expects.
+    """
+    _conditional(request, response, book_etag(version))
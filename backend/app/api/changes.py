@@ -0,0 +1,166 @@
+from __future__ import annotations
+import asyncio
+from contextlib import asynccontextmanager
+from heapq import merge
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from sqlalchemy import func, select
+
+from app.api.caching import conditional_read
+from app.api.responses import BOOK_COLUMNS, BOOK_FIELDS, fast_json, row_dicts
+from app.core.config import settings
+from app.core.serialization import dumps
+from app.db.replicas import get_read_session
+from app.db.session import DbSession, get_session
+from app.models.book import Book, BookTombstone
+from app.schemas.book import BookChanges
+
+router = APIRouter()
+
+async def load_changes(db, since: int, limit: int) -> Dict[str, Any]:
+    """
+    The first ``limit`` changes after sequence number ``since``, oldest first.
+
+    Inserts, edits, soft deletes and restores are ``upsert`` entries carrying the
+    book as it is now (a book edited twice appears once, at its latest position);
+    hard deletes are ``delete`` tombstones. Pass ``next_since`` back to continue.
+    """
+    upserts = (await db.execute(
+        select(Book.change_seq, *BOOK_COLUMNS.values())
+        .where(Book.change_seq > since)
+        .order_by(Book.change_seq)
+        .limit(limit + 1)
+    )).all()
+    tombstones = (await db.execute(
+        select(BookTombstone.change_seq, BookTombstone.book_id)
+        .where(BookTombstone.change_seq > since)
+        .order_by(BookTombstone.change_seq)
+        .limit(limit + 1)
+    )).all()
+
+    books = iter(row_dicts((row[1:] for row in upserts), BOOK_FIELDS))
+    entries = merge(
+        (("upsert", row[0], row[1]) for row in upserts),
+        (("delete", row[0], row[1]) for row in tombstones),
+        key=lambda entry: entry[1],
+    )
+    changes: List[Dict[str, Any]] = []
+    for op, seq, book_id in entries:
+        book = next(books) if op == "upsert" else None
+        if len(changes) == limit:
+            break
+        changes.append({"seq": seq, "op": op, "id": book_id, "book": book})
+
+    return {
+        "changes": changes,
+        "next_since": changes[-1]["seq"] if changes else since,
+        "has_more": len(upserts) + len(tombstones) > len(changes),
+    }
+
+async def head_seq(db) -> int:
+    """Highest sequence number handed out so far (two index lookups)."""
+    latest = await db.scalar(select(func.max(Book.change_seq)))
+    deleted = await db.scalar(select(func.max(BookTombstone.change_seq)))
+    return max(latest or 0, deleted or 0)
+
+
+class ChangeWatcher:
+    """
+    Per-worker poller shared by all change-feed streams.
+
+    While at least one stream is waiting, a single task reads the head sequence
+    every ``interval`` seconds and wakes the streams that are behind it, so idle
+    streams cost one cheap query per interval in total rather than one each.
+    """
+
+    def __init__(self, open_session, interval: float):
+        self.open_session = open_session
+        self.interval = interval
+        self.latest = 0
+        self._waiting = 0
+        self._changed: Optional[asyncio.Condition] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def wait_past(self, seq: int, timeout: float) -> bool:
+        """Wait until something past ``seq`` exists; False on timeout."""
+        if self.latest > seq:
+            return True
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        self._waiting += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+        try:
+            async with self._changed:
+                await asyncio.wait_for(self._changed.wait_for(lambda: self.latest > seq), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiting -= 1
+
+    async def _poll(self) -> None:
+        while self._waiting:
+            try:
+                async with self.open_session() as db:
+                    latest = await head_seq(db)
+            except Exception:
+                logger.exception("change feed poll failed")
+            else:
+                if latest != self.latest:
+                    self.latest = latest
+                    async with self._changed:
+                        self._changed.notify_all()
+            await asyncio.sleep(self.interval)
+
+
+# Streams outlive the request-scoped session, so each poll opens its own
+watcher = ChangeWatcher(asynccontextmanager(get_session), settings.CHANGES_POLL_INTERVAL)
+
+@router.get("/books/changes", response_model=BookChanges, dependencies=[Depends(conditional_read)])
+async def list_changes(
+    response: Response,
+    since: int = Query(0, ge=0, description="next_since from the previous call; 0 starts a full sync"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: DbSession = Depends(get_read_session),
+):
+    """Upserts and tombstones after ``since``, for keeping a local copy of the catalog in sync."""
+    return fast_json(await load_changes(db, since, limit), response)
+
+async def _events(request: Request, since: int, limit: int) -> AsyncIterator[str]:
+    while not await request.is_disconnected():
+        async with asynccontextmanager(get_session)() as db:
+            page = await load_changes(db, since, limit)
+        if page["changes"]:
+            since = page["next_since"]
+            yield f"id: {since}\nevent: changes\ndata: {dumps(page).decode()}\n\n"
+            if page["has_more"]:
+                continue
+        elif watcher.latest > since:
+            # The head is past since yet nothing shows up (the table was emptied): back off a poll
+            await asyncio.sleep(watcher.interval)
+            continue
+        if not await watcher.wait_past(since, settings.CHANGES_KEEPALIVE):
+            # Comment line: keeps proxies from closing an idle stream
+            yield ": keepalive\n\n"
+
+@router.get("/books/changes/stream")
+async def stream_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="Start after this sequence number"),
+    limit: int = Query(500, ge=1, le=5000, description="Max changes per event"),
+    last_event_id: Optional[int] = Header(None, description="Set by EventSource on reconnect; wins over since"),
+):
+    """
+    Server-Sent Events: one ``changes`` event (same body as /books/changes) per batch of
+    changes, with ``id`` = its next_since so a reconnecting EventSource resumes where it stopped.
+    """
+    start = last_event_id if last_event_id is not None else since
+    return StreamingResponse(
+        _events(request, start, limit),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
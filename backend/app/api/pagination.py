@@ -0,0 +1,67 @@
+from __future__ import annotations
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, String, and_, literal, or_
+from sqlalchemy.types import TypeDecorator
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class CursorTimestamp(TypeDecorator):
+    """
+    Binds a cursor timestamp in the form the column stores it.
+
+    SQLite keeps timestamps as text and compares them as strings. A CURRENT_TIMESTAMP
+    default stores ``YYYY-MM-DD HH:MM:SS``, but a bound datetime would be written with
+    ``.000000`` appended, which sorts after the stored value, so ``sort_col < v`` would
+    hold for the cursor row itself. Values from Python carry microseconds and are
+    stored with them, so a non-zero fraction is kept.
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(String())
+        return dialect.type_descriptor(DateTime(timezone=True))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != "sqlite":
+            return value
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f" if value.microsecond else "%Y-%m-%d %H:%M:%S")
+
+def encode_cursor(kind: str, sort_value: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for the (sort_value, id) position of the last row of a page."""
+    raw = json.dumps({"k": kind, "v": sort_value.isoformat(), "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(kind: str, cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["k"] != kind:
+            raise ValueError("cursor belongs to another listing")
+        return datetime.fromisoformat(data["v"]), int(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_after(sort_col, id_col, kind: str, cursor: str):
+    """
+    Rows strictly after the cursor for ``ORDER BY sort_col DESC, id DESC``.
+
+    Written as ``sort_col <= v AND (sort_col < v OR id < :id)`` instead of a row-value
+    comparison so the listing index on ``(sort_col, id)`` can still bound the scan.
+    """
+    decoded, row_id = decode_cursor(kind, cursor)
+    value = literal(decoded, CursorTimestamp())
+    return and_(sort_col <= value, or_(sort_col < value, id_col < row_id))
+
+def next_cursor(kind: str, rows, limit: int, sort_attr: str) -> Optional[str]:
+    """Cursor for the following page, or None when this page was the last one."""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(kind, getattr(last, sort_attr), last.id)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from fastapi.responses import JSONResponse
+
+from app.core.serialization import dumps
+from app.models.book import Book
+
+# Everything BookOut has, in BookOut's order; ?fields= picks a subset
+BOOK_COLUMNS = {
+    col.key: col
+    for col in (
+        Book.id,
+        Book.title,
+        Book.author,
+        Book.created_at,
+        Book.created_by,
+        Book.deleted_at,
+        Book.deleted_by,
+        Book.version,
+    )
+}
+BOOK_FIELDS = list(BOOK_COLUMNS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """``?fields=id,title`` -> validated field names in BookOut order; all fields when omitted."""
+    if not fields:
+        return BOOK_FIELDS
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = wanted - BOOK_COLUMNS.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))} (allowed: {', '.join(BOOK_FIELDS)})",
+        )
+    return [f for f in BOOK_FIELDS if f in wanted]
+
+
+def book_columns(names: Sequence[str], *required) -> list:
+    """
+    Columns for a plain-tuple select: the requested fields first, then any of
+    ``required`` (e.g. id and the keyset sort column) the client didn't ask for.
+    """
+    extra = [col for col in required if col.key not in names]
+    return [BOOK_COLUMNS[n] for n in names] + extra
+
+
+def row_dicts(rows, names: Sequence[str]) -> List[Dict[str, Any]]:
+    """Trusted DB rows -> dicts without per-row validation; trailing extra columns are dropped."""
+    return [dict(zip(names, row)) for row in rows]
+
+
+def fast_json(content: Any, response: Response) -> FastJSONResponse:
+    """
+    Return ``content`` as-is, skipping response_model validation, while keeping
+    the headers dependencies set on ``response`` (ETag, Cache-Control, X-Next-Cursor).
+    """
+    out = FastJSONResponse(content)
+    out.headers.raw.extend(response.headers.raw)
+    return out
@@ -0,0 +1,232 @@
+"""
+Admission control: bounded concurrency per route class, with load shedding.
+
+Every API request is classed by its route: ``reads``, ``writes``, ``counts`` (count
+and stats aggregates) or ``exports`` (export and import streams). Each class
+has a limit of running requests (slots) and a bounded FIFO queue. A queued
+request holds no thread and no connection, only a future on the event loop.
+
+A request that arrives when every slot is busy is shed at once, with 503 and
+Retry-After, if:
+
+* the queue is full; or
+* its expected wait is over the class's max wait. The expected wait is the
+  requests ahead of it, divided by the slots, times the class's recent
+  service time (an exponential moving average).
+
+Otherwise it waits, but never for longer than the max wait. So under a spike
+the latency of admitted requests stays bounded, and the rest fail fast.
+``/health/ready`` turns 503 while reads, writes or counts are being shed.
+
+``/api/books/suggest`` (in memory) and the change stream (long-lived) are not
+limited, nor is anything outside ``/api``.
+"""
+from __future__ import annotations
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import (
+    ADMISSION_ACTIVE,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT,
+    route_template,
+)
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Classes whose shedding makes the worker unready; a queue of exports alone should not
+INTERACTIVE = ("reads", "writes", "counts")
+UNLIMITED = {"/api/books/suggest", "/api/books/changes/stream"}
+BULK = {"/api/books/export", "/api/books:import"}
+
+# Weight of the newest request in the service time average
+SERVICE_ALPHA = 0.2
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Limiter:
+    """Slots, FIFO wait queue and service time estimate for one route class."""
+
+    def __init__(self, name: str, slots: int, queue: int, max_wait: float):
+        self.name = name
+        self.slots = slots
+        self.queue = queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.service: Optional[float] = None
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {}
+
+    def expected_wait(self) -> float:
+        """Seconds a request arriving now would wait for a slot."""
+        if self.active < self.slots:
+            return 0.0
+        return (len(self.waiters) + 1) / self.slots * (self.service or 0.0)
+
+    def saturated(self) -> bool:
+        """True while new arrivals are being shed."""
+        return len(self.waiters) >= self.queue or self.expected_wait() > self.max_wait
+
+    def _retry_after(self, expected: float) -> int:
+        return max(1, math.ceil(expected or self.service or 1))
+
+    def _reject(self, reason: str, expected: float) -> Rejected:
+        ADMISSION_REJECTED.inc(self.name, reason)
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        return Rejected(reason, self._retry_after(expected))
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in line if allowed; raises Rejected when the request should be shed."""
+        if self.active < self.slots and not self.waiters:
+            self.active += 1
+            self._admitted(0.0)
+            return
+        if len(self.waiters) >= self.queue:
+            raise self._reject("queue_full", self.expected_wait())
+        expected = self.expected_wait()
+        if expected > self.max_wait:
+            raise self._reject("expected_wait", expected)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self._gauges()
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            self._forget(waiter)
+            raise self._reject("timeout", self.expected_wait())
+        except asyncio.CancelledError:
+            # Client went away; a slot handed over meanwhile goes on to the next in line
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            else:
+                self._forget(waiter)
+            raise
+        # release() handed its slot over, so active already counts this request
+        self._admitted(time.perf_counter() - t0)
+
+    def _admitted(self, waited: float) -> None:
+        self.admitted += 1
+        ADMISSION_WAIT.observe(self.name, value=waited)
+        self._gauges()
+
+    def _forget(self, waiter: asyncio.Future) -> None:
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            pass
+        self._gauges()
+
+    def release(self, held: Optional[float]) -> None:
+        """Give the slot back (to the first live waiter, if any); ``held`` feeds the service time."""
+        if held is not None:
+            self.service = held if self.service is None else (1 - SERVICE_ALPHA) * self.service + SERVICE_ALPHA * held
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                # The slot changes hands without ever looking free to a newcomer
+                waiter.set_result(None)
+                self._gauges()
+                return
+        self.active -= 1
+        self._gauges()
+
+    def _gauges(self) -> None:
+        ADMISSION_ACTIVE.set(self.name, value=self.active)
+        ADMISSION_QUEUE_DEPTH.set(self.name, value=len(self.waiters))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "queue": self.queue,
+            "max_wait_s": self.max_wait,
+            "active": self.active,
+            "waiting": len(self.waiters),
+            "service_ms": None if self.service is None else round(self.service * 1000, 3),
+            "expected_wait_s": round(self.expected_wait(), 3),
+            "saturated": self.saturated(),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+
+def route_class(method: str, template: str) -> Optional[str]:
+    """The limiter a request goes through, or None for one that is not limited."""
+    if not template.startswith("/api/") or template in UNLIMITED:
+        return None
+    if template in BULK:
+        return "exports"
+    if method not in SAFE_METHODS:
+        return "writes"
+    if template.endswith(("/count", "/stats")):
+        return "counts"
+    return "reads"
+
+
+class Admission:
+    """The per-class limiters of this worker."""
+
+    def __init__(self, classes: Dict[str, Tuple[int, int, float]]):
+        self.limiters = {name: Limiter(name, *limits) for name, limits in classes.items()}
+
+    def ready(self) -> bool:
+        """False while any interactive class is shedding new arrivals."""
+        return not any(self.limiters[name].saturated() for name in INTERACTIVE if name in self.limiters)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ready": self.ready(), "classes": {name: l.stats() for name, l in self.limiters.items()}}
+
+
+admission = Admission({
+    "reads": settings.ADMISSION_READS,
+    "writes": settings.ADMISSION_WRITES,
+    "counts": settings.ADMISSION_COUNTS,
+    "exports": settings.ADMISSION_EXPORTS,
+})
+
+
+class AdmissionMiddleware:
+    """Holds a slot of the request's class from routing until the last body byte is sent."""
+
+    def __init__(self, app: ASGIApp, admission: Admission = admission):
+        self.app = app
+        self.admission = admission
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        name = route_class(scope["method"], route_template(scope)) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.admission.limiters[name]
+        try:
+            await limiter.acquire()
+        except Rejected as e:
+            response = JSONResponse(
+                {"detail": f"Too busy to serve {name} right now, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - t0)
@@ -0,0 +1,273 @@
+from __future__ import annotations
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Protocol
+
+from app.core.config import settings
+from app.core.metrics import READ_COALESCED, READ_FLIGHTS
+from app.core.serialization import dumps, loads
+
+try:  # optional: only needed for CACHE_BACKEND=redis
+    import redis.asyncio as redis_asyncio
+except ImportError:  # pragma: no cover
+    redis_asyncio = None
+
+
+class CacheStore(Protocol):
+    """Byte-value store behind ReadCache; implementations must be safe to share across requests."""
+
+    async def get(self, key: str) -> Optional[bytes]: ...
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+    async def generations(self, tags: Iterable[str]) -> List[int]: ...
+    async def bump(self, tags: Iterable[str]) -> None: ...
+    def usage(self) -> Dict[str, Any]: ...
+
+
+class MemoryStore:
+    """Bounded LRU with per-entry TTL, local to one worker process."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _drop(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._bytes -= len(key) + len(value)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._bytes += len(key) + len(value)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    async def generations(self, tags: Iterable[str]) -> List[int]:
+        with self._lock:
+            return [self._generations.get(tag, 0) for tag in tags]
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def usage(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class RedisStore:
+    """Shared store for multi-worker deployments; Redis handles TTL and eviction (maxmemory-policy)."""
+
+    def __init__(self, url: str, prefix: str = "books:cache:"):
+        if redis_asyncio is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        self._client = redis_asyncio.from_url(url)
+        self._prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(self._prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._client.set(self._prefix + key, value, px=int(ttl * 1000))
+
+    async def generations(self, tags: Iterable[str]) -> List[int]:
+        values = await self._client.mget([f"{self._prefix}gen:{tag}" for tag in tags])
+        return [int(v or 0) for v in values]
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f"{self._prefix}gen:{tag}")
+            await pipe.execute()
+
+    def usage(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+
+# Catalog version this request's reads must reflect; set by the pin_read_version dependency
+read_version: ContextVar[Optional[int]] = ContextVar("read_version", default=None)
+
+
+class _LeaderGone(Exception):
+    """The request running a shared load was cancelled; its followers start their own."""
+
+
+# Parameters whose case never changes the result (search is case-insensitive)
+CASE_INSENSITIVE_PARAMS = {"q"}
+
+def _normalize(name: str, value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str) and name in CASE_INSENSITIVE_PARAMS:
+        return value.lower()
+    return value
+
+
+class ReadCache:
+    """
+    Read-through cache for query results, invalidated by tag.
+
+    Each entry's key embeds the catalog version the request read in pin_read_version,
+    so any write, through any worker, makes every older entry unreachable: a body
+    always comes from the version its ETag names, and a lagging replica's answer is
+    never served as current later on. The key also embeds the generation of every
+    tag it depends on ("live", "trash", "book:<id>"); a write in this worker bumps
+    the generations of the tags it touches, so the affected entries age out early.
+    """
+
+    def __init__(self, store: Optional[CacheStore], ttl: float, coalesce: bool = True):
+        self.store = store
+        self.ttl = ttl
+        self.coalesce = coalesce
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.flights = 0
+        self.coalesced = 0
+        self._flights: Dict[str, asyncio.Future] = {}
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        params: Dict[str, Any],
+        tags: Iterable[str],
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        normalized = sorted((k, _normalize(k, v)) for k, v in params.items() if v is not None)
+        if self.store is None:
+            return await self._single_flight(namespace, [namespace, normalized], loader)
+
+        tags = sorted(tags)
+        gens = await self.store.generations(tags)
+        key = json.dumps([namespace, normalized, list(zip(tags, gens)), read_version.get()], separators=(",", ":"))
+
+        cached = await self.store.get(key)
+        if cached is not None:
+            self._count(hit=True)
+            return loads(cached)
+
+        self._count(hit=False)
+
+        async def load_and_store() -> Any:
+            value = await loader()
+            await self.store.set(key, dumps(value), self.ttl)
+            return value
+
+        return await self._single_flight(namespace, key, load_and_store)
+
+    async def _single_flight(self, namespace: str, key: Any, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``loader`` once for all concurrent callers with the same key in this worker.
+
+        The key includes the catalog version the caller read in pin_read_version, so a
+        request that arrives after a write never joins a load that started before it;
+        without a version (or with COALESCE_READS off) every caller loads on its own.
+        Callers share the loaded object and must not mutate it. Nothing outlives the load.
+        """
+        version = read_version.get()
+        if not self.coalesce or version is None:
+            return await loader()
+        key = json.dumps([key, version], separators=(",", ":"))
+
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                break
+            READ_COALESCED.inc(namespace)
+            with self._lock:
+                self.coalesced += 1
+            try:
+                # Shielded: this caller going away must not cancel the others' load
+                return await asyncio.shield(flight)
+            except _LeaderGone:
+                continue
+
+        flight = self._flights[key] = asyncio.get_running_loop().create_future()
+        READ_FLIGHTS.inc(namespace)
+        with self._lock:
+            self.flights += 1
+        try:
+            value = await loader()
+        except BaseException as e:
+            # Followers share a query error, but not this request's cancellation
+            flight.set_exception(_LeaderGone() if isinstance(e, asyncio.CancelledError) else e)
+            flight.exception()  # marks it retrieved, for when nobody joined
+            raise
+        else:
+            flight.set_result(value)
+            return value
+        finally:
+            del self._flights[key]
+
+    async def invalidate(self, *tags: str) -> None:
+        if self.store is not None:
+            await self.store.bump(tags)
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            flights = {"coalesce": self.coalesce, "flights": self.flights, "coalesced": self.coalesced,
+                       "in_flight": len(self._flights)}
+            if self.store is None:
+                return {"backend": "off", **flights}
+            lookups = self.hits + self.misses
+            out = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "ttl_s": self.ttl,
+                **flights,
+            }
+        out.update(self.store.usage())
+        return out
+
+
+def _build_store() -> Optional[CacheStore]:
+    backend = settings.CACHE_BACKEND
+    if backend == "memory":
+        return MemoryStore(settings.CACHE_MAX_ENTRIES)
+    if backend == "redis":
+        return RedisStore(settings.CACHE_REDIS_URL)
+    return None
+
+
+read_cache = ReadCache(_build_store(), settings.CACHE_TTL, settings.COALESCE_READS)
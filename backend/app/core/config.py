@@ -1,14 +1,38 @@
 import os
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
 
 load_dotenv()
 
+# Sync driver -> async driver used for the same database when DB_ASYNC is on
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def async_url(url: str) -> str:
+    """The same database behind the async driver (asyncpg / aiosqlite)."""
+    parsed = make_url(url)
+    return parsed.set(drivername=_ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)).render_as_string(
+        hide_password=False
+    )
+
+def _flag(value: Optional[str]) -> bool:
+    return (value or "").strip().lower() in ("1", "true", "yes", "on")
+
 def _split_csv(value: Optional[str]) -> List[str]:
     if not value:
         return []
     return [v.strip() for v in value.split(",") if v.strip()]
 
+def _admission(value: str) -> Tuple[int, int, float]:
+    """Parse "slots,queue,max_wait_s" into (slots, queue, max_wait_s)."""
+    slots, queue, max_wait = (v.strip() for v in value.split(","))
+    return int(slots), int(queue), float(max_wait)
+
 class Settings:
     # API
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
@@ -21,12 +45,104 @@ class Settings:
     DB_USER: str = os.getenv("DB_USER", "postgres")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "postgres")
     DB_NAME: str = os.getenv("DB_NAME", "books")
+    # Full SQLAlchemy URL (e.g. sqlite:///./books.db); overrides the DB_* parts above when set
+    DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL") or None
+
+    # Serve requests on an async engine (asyncpg / aiosqlite) instead of a threadpool-backed sync one
+    DB_ASYNC: bool = _flag(os.getenv("DB_ASYNC"))
+
+    # Connection pool (per engine, per worker process)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+    DB_POOL_PRE_PING: bool = _flag(os.getenv("DB_POOL_PRE_PING"))
+    # Connections to open at startup so the first requests don't pay for connects
+    DB_POOL_WARMUP: int = int(os.getenv("DB_POOL_WARMUP", "0"))
+
+    # Read replicas: comma-separated URLs in DATABASE_URL form (empty = everything on the primary).
+    # Read-only routes go round-robin to replicas that answer their health check and trail the
+    # primary by at most REPLICA_MAX_LAG seconds; a client that wrote in the last
+    # REPLICA_STICKY_SECONDS reads from the primary (read-your-writes)
+    REPLICA_URLS: List[str] = _split_csv(os.getenv("REPLICA_URLS"))
+    REPLICA_MAX_LAG: float = float(os.getenv("REPLICA_MAX_LAG", "5"))
+    REPLICA_STICKY_SECONDS: float = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+    REPLICA_CHECK_INTERVAL: float = float(os.getenv("REPLICA_CHECK_INTERVAL", "1"))
+
+    # Admission control per route class, each "slots,queue,max_wait_s": up to `slots` requests run
+    # at once and up to `queue` more wait; one that finds the queue full, or whose expected wait is
+    # over max_wait_s, gets 503 + Retry-After straight away. Defaults add up to the default pool
+    # (DB_POOL_SIZE + DB_MAX_OVERFLOW), so admitted requests don't queue for connections instead
+    ADMISSION_ENABLED: bool = _flag(os.getenv("ADMISSION_ENABLED", "true"))
+    ADMISSION_READS: Tuple[int, int, float] = _admission(os.getenv("ADMISSION_READS", "8,32,2"))
+    ADMISSION_WRITES: Tuple[int, int, float] = _admission(os.getenv("ADMISSION_WRITES", "4,16,2"))
+    ADMISSION_COUNTS: Tuple[int, int, float] = _admission(os.getenv("ADMISSION_COUNTS", "2,8,2"))
+    # Export and import streams
+    ADMISSION_EXPORTS: Tuple[int, int, float] = _admission(os.getenv("ADMISSION_EXPORTS", "1,2,5"))
+
+    # Search: "auto" picks pg_trgm-backed LIKE on Postgres and FTS5 on SQLite, "like" forces plain LIKE
+    SEARCH_BACKEND: str = os.getenv("SEARCH_BACKEND", "auto").lower()
+
+    # total=estimate on /page endpoints falls back to an exact count below this many rows
+    COUNT_ESTIMATE_THRESHOLD: int = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", "10000"))
+
+    # Cache-Control sent with ETag'd book reads; e.g. "public, max-age=5" lets a proxy absorb repeats
+    HTTP_CACHE_CONTROL: str = os.getenv("HTTP_CACHE_CONTROL", "no-cache")
+
+    # Read-through cache for lists/counts/single books: "memory" (per worker), "redis" (shared) or "off"
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory").lower()
+    CACHE_TTL: float = float(os.getenv("CACHE_TTL", "60"))
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    CACHE_REDIS_URL: str = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    # Identical reads arriving while one is already running wait for its result instead of querying again
+    COALESCE_READS: bool = _flag(os.getenv("COALESCE_READS", "true"))
+
+    # Upper bound on ids/payloads per batch request
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+    # Rows fetched per server-side cursor round trip by /api/books/export
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+    # Rows per executemany / COPY chunk when staging a bulk import
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+
+    # Per-route request/SQL metrics and the Prometheus-text /metrics endpoint
+    METRICS_ENABLED: bool = _flag(os.getenv("METRICS_ENABLED", "true"))
+
+    # Slow query log: statements over this many ms are logged (0 = off); a sample of them is
+    # explained on Postgres, at most N per minute (EXPLAIN ANALYZE only for plain reads)
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "0"))
+    SLOW_QUERY_EXPLAIN_SAMPLE: float = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0.1"))
+    SLOW_QUERY_EXPLAIN_PER_MINUTE: int = int(os.getenv("SLOW_QUERY_EXPLAIN_PER_MINUTE", "6"))
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "10000"))
+
+    # Trash retention: books in the trash longer than this are hard-deleted (0 = keep forever),
+    # in batches of PURGE_BATCH_SIZE with a PURGE_BATCH_PAUSE-second pause, every PURGE_INTERVAL seconds
+    TRASH_RETENTION_DAYS: float = float(os.getenv("TRASH_RETENTION_DAYS", "0"))
+    PURGE_BATCH_SIZE: int = int(os.getenv("PURGE_BATCH_SIZE", "500"))
+    PURGE_BATCH_PAUSE: float = float(os.getenv("PURGE_BATCH_PAUSE", "0.1"))
+    PURGE_INTERVAL: float = float(os.getenv("PURGE_INTERVAL", "3600"))
+    # Run the purge inside each app worker; turn off to run `python -m app.services.purge` from cron instead
+    PURGE_IN_APP: bool = _flag(os.getenv("PURGE_IN_APP", "true"))
+
+    # Change feed stream (/api/books/changes/stream): how often each worker checks for new
+    # changes while streams are open, and the idle keepalive interval
+    CHANGES_POLL_INTERVAL: float = float(os.getenv("CHANGES_POLL_INTERVAL", "1"))
+    CHANGES_KEEPALIVE: float = float(os.getenv("CHANGES_KEEPALIVE", "15"))
+
+    # Type-ahead (/api/books/suggest): in-memory prefix index per worker, caught up from the
+    # change feed every SUGGEST_REFRESH_INTERVAL seconds, rebuilt after SUGGEST_REBUILD_PENDING new values
+    SUGGEST_ENABLED: bool = _flag(os.getenv("SUGGEST_ENABLED", "true"))
+    SUGGEST_REFRESH_INTERVAL: float = float(os.getenv("SUGGEST_REFRESH_INTERVAL", "1"))
+    SUGGEST_REBUILD_PENDING: int = int(os.getenv("SUGGEST_REBUILD_PENDING", "50000"))
 
     CORS_ORIGINS: List[str] = _split_csv(os.getenv("CORS_ORIGINS", "http://localhost:8080"))
 
     @property
     def SYNC_DATABASE_URL(self) -> str:
         """Sync SQLAlchemy URL (psycopg2) — use for Alembic and regular blocking sessions."""
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         return (
             f"postgresql+psycopg2://{self.DB_USER}:{self.DB_PASSWORD}"
             f"@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
@@ -34,7 +150,9 @@ class Settings:
 
     @property
     def ASYNC_DATABASE_URL(self) -> str:
-        """Async SQLAlchemy URL (asyncpg) — if you ever add async engine usage."""
+        """Async SQLAlchemy URL (asyncpg, or aiosqlite for a SQLite DATABASE_URL) — used when DB_ASYNC is on."""
+        if self.DATABASE_URL:
+            return async_url(self.DATABASE_URL)
         return (
             f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}"
             f"@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
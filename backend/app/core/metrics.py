@@ -0,0 +1,296 @@
+from __future__ import annotations
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._values: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(labels) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[i] += 1
+            self._values[labels] = (counts, total + value)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+        lines = self.header()
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_num(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Process-local metrics rendered in the Prometheus text format (0.0.4); no client library needed."""
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for m in self._metrics for line in m.render()) + "\n"
+
+
+REGISTRY = Registry()
+ROUTE_LABELS = ("method", "route")
+
+REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "Requests by route template and status code.", ROUTE_LABELS + ("status",)))
+LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time from request start to the last body byte.", ROUTE_LABELS))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requests currently being served.", ROUTE_LABELS))
+RESPONSE_SIZE = REGISTRY.register(Histogram(
+    "http_response_size_bytes", "Response body size.", ROUTE_LABELS, SIZE_BUCKETS))
+SQL_STATEMENTS = REGISTRY.register(Histogram(
+    "http_request_sql_statements", "SQL statements executed per request.", ROUTE_LABELS, STATEMENT_BUCKETS))
+SQL_SECONDS = REGISTRY.register(Histogram(
+    "http_request_sql_seconds", "Total time spent in SQL statements per request.", ROUTE_LABELS))
+
+# Sampled from the pool and read cache when /metrics is scraped
+POOL_CONNECTIONS = REGISTRY.register(Gauge(
+    "db_pool_connections", "Pooled connections by state.", ("engine", "state")))
+POOL_CHECKOUTS = REGISTRY.register(Gauge(
+    "db_pool_checkout_events", "Cumulative pool checkouts and checkout timeouts.", ("engine", "event")))
+CACHE_LOOKUPS = REGISTRY.register(Gauge(
+    "read_cache_lookups", "Cumulative read cache hits and misses in this worker.", ("result",)))
+READ_FLIGHTS = REGISTRY.register(Counter(
+    "read_flights_total", "Book reads that ran their own query (single-flight leaders).", ("namespace",)))
+READ_COALESCED = REGISTRY.register(Counter(
+    "read_coalesced_total", "Book reads answered by an identical read already in flight.", ("namespace",)))
+
+# Read replica routing (app.db.replicas)
+READ_ROUTES = REGISTRY.register(Counter(
+    "db_read_routes_total", "Read-only requests by where they were sent and why.", ("target", "reason")))
+REPLICA_LAG = REGISTRY.register(Gauge(
+    "db_replica_lag_seconds", "How long the replica has been missing the oldest write it has not applied.", ("replica",)))
+REPLICA_UP = REGISTRY.register(Gauge(
+    "db_replica_up", "1 if the replica answered its last health check.", ("replica",)))
+
+
+# Trash retention purge (app.services.purge)
+PURGED_ROWS = REGISTRY.register(Counter(
+    "book_purge_rows_total", "Trashed books hard-deleted by the retention purge."))
+PURGE_BATCH_SECONDS = REGISTRY.register(Histogram(
+    "book_purge_batch_duration_seconds", "Time per purge batch transaction."))
+PURGE_BACKLOG = REGISTRY.register(Gauge(
+    "book_purge_backlog", "Trashed books past retention, as of the start of the last purge run."))
+PURGE_LAST_SUCCESS = REGISTRY.register(Gauge(
+    "book_purge_last_success_timestamp_seconds", "Unix time the last purge run finished."))
+
+
+# Type-ahead prefix index (app.services.suggest), as of its last build
+SUGGEST_INDEX_BUILD_SECONDS = REGISTRY.register(Gauge(
+    "suggest_index_build_seconds", "Time the last suggest index build took in this worker."))
+SUGGEST_INDEX_BYTES = REGISTRY.register(Gauge(
+    "suggest_index_bytes", "Approximate memory held by the suggest index in this worker."))
+SUGGEST_INDEX_ENTRIES = REGISTRY.register(Gauge(
+    "suggest_index_entries", "Word-start entries in the suggest index's sorted array."))
+
+
+# Admission control per route class (app.core.admission)
+ADMISSION_ACTIVE = REGISTRY.register(Gauge(
+    "admission_active", "Requests holding an admission slot.", ("route_class",)))
+ADMISSION_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "admission_queue_depth", "Requests waiting for an admission slot.", ("route_class",)))
+ADMISSION_WAIT = REGISTRY.register(Histogram(
+    "admission_wait_seconds", "Time admitted requests waited for a slot.", ("route_class",)))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "admission_rejected_total", "Requests shed with 503 instead of queueing, by why.", ("route_class", "reason")))
+
+def sample_gauges(pools: Dict[str, dict], cache: dict) -> None:
+    """Copy engine_pool_stats() and read_cache.stats() snapshots into the gauges above."""
+    for name, stats in pools.items():
+        for state in ("checked_out", "checked_in", "overflow"):
+            if state in stats:
+                POOL_CONNECTIONS.set(name, state, value=stats[state])
+        for key, label in (("checkouts", "checkout"), ("timeouts", "timeout")):
+            if key in stats:
+                POOL_CHECKOUTS.set(name, label, value=stats[key])
+    for result in ("hits", "misses"):
+        if result in cache:
+            CACHE_LOOKUPS.set(result, value=cache[result])
+
+
+class _SqlStats:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.seconds = 0.0
+
+
+# Set per request by the middleware; threadpool workers inherit a copy of the context,
+# which still points at the same _SqlStats object
+_sql_stats: ContextVar[Optional[_SqlStats]] = ContextVar("sql_stats", default=None)
+# "GET /api/books/{book_id}" for the request being served, e.g. for the slow query log
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["query_start"].pop()
+    stats = _sql_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += time.perf_counter() - started
+
+
+def _handle_error(exception_context) -> None:
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def route_template(scope: Scope) -> str:
+    """The matching route's path template (``/api/books/{book_id}``); unmatched paths share one value."""
+    partial = None
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attribute statement count and time to the current request (pass ``async_engine.sync_engine`` for async)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency, status, size, in-flight and SQL metrics.
+
+    Requests are labelled with the route template (``/api/books/{book_id}``), not
+    the raw path, so label cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app: ASGIApp, skip: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.skip = set(skip)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip:
+            await self.app(scope, receive, send)
+            return
+
+        labels = (scope["method"], route_template(scope))
+        status = "500"
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        stats = _SqlStats()
+        token = _sql_stats.set(stats)
+        route_token = current_route.set(" ".join(labels))
+        IN_FLIGHT.inc(*labels)
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            LATENCY.observe(*labels, value=time.perf_counter() - t0)
+            IN_FLIGHT.inc(*labels, amount=-1)
+            _sql_stats.reset(token)
+            current_route.reset(route_token)
+            REQUESTS.inc(*labels, status)
+            RESPONSE_SIZE.observe(*labels, value=size)
+            SQL_STATEMENTS.observe(*labels, value=stats.statements)
+            SQL_SECONDS.observe(*labels, value=stats.seconds)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+import json
+from datetime import datetime
+from typing import Any
+
+try:  # optional: several times faster, and serializes datetimes natively
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Same format pydantic (and orjson with OPT_UTC_Z) produce: "Z" for UTC
+        text = value.isoformat()
+        return text[:-6] + "Z" if value.utcoffset() is not None and not value.utcoffset() else text
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON; datetimes become ISO 8601 strings."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_UTC_Z)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
@@ -1,4 +1,4 @@
 from sqlalchemy.orm import declarative_base
 Base = declarative_base()
 
-from app.models import book  
+from app.models import book, catalog  
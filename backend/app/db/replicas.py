@@ -0,0 +1,283 @@
+"""
+Read replicas: read-only routes on a replica, everything else on the primary.
+
+Routes that only read take ``get_read_session`` instead of ``get_session``.
+It hands out a session on the next usable replica (round-robin), or on the
+primary when:
+
+* the client wrote within the last REPLICA_STICKY_SECONDS: every successful
+  write response sets a short-lived cookie (``ReadYourWritesMiddleware``),
+  so the client sees its own write even if the replicas have not applied it;
+* no replica answered its last health check, or every replica trails the
+  primary by more than REPLICA_MAX_LAG seconds.
+
+Lag is measured the same way on every backend, from the catalog version
+each write bumps: a background check reads the version on the primary and
+on each replica every REPLICA_CHECK_INTERVAL seconds and remembers when each
+primary version was first seen. A replica's lag is how long ago the oldest
+version it has not applied yet appeared on the primary (0 when caught up),
+so it is accurate to about one check interval.
+"""
+from __future__ import annotations
+import asyncio
+import itertools
+import math
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from loguru import logger
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import async_url, settings
+from app.core.metrics import READ_ROUTES, REPLICA_LAG, REPLICA_UP
+from app.db.pool import pool_options, pool_stats
+from app.db.session import (
+    AsyncSessionLocal,
+    DbSession,
+    SessionLocal,
+    ThreadedSession,
+    _instrument,
+    async_engine,
+    engine,
+)
+from app.models.catalog import CatalogVersion
+
+STICKY_COOKIE = "books_primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_VERSION = select(CatalogVersion.version).where(CatalogVersion.id == 1)
+# Primary versions remembered for lag at least; more when max_lag spans more checks
+SEEN_MIN = 64
+
+
+class Replica:
+    """One replica's engine(s), session factory and last health check result."""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_engine(url, **pool_options(url))
+        _instrument(self.engine)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_engine = None
+        self.async_session_factory = None
+        if settings.DB_ASYNC:
+            self.async_engine = create_async_engine(async_url(url), **pool_options(async_url(url), async_mode=True))
+            _instrument(self.async_engine.sync_engine)
+            self.async_session_factory = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+        self.healthy = False
+        self.version: Optional[int] = None
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+
+    async def read_version(self) -> int:
+        return await _read_version(self.engine, self.async_engine)
+
+    def usable(self, max_lag: float) -> bool:
+        return self.healthy and self.lag is not None and self.lag <= max_lag
+
+
+async def _read_version(sync_engine, async_eng) -> int:
+    if async_eng is not None:
+        async with async_eng.connect() as conn:
+            return await conn.scalar(_VERSION) or 0
+
+    def _read() -> int:
+        with sync_engine.connect() as conn:
+            return conn.scalar(_VERSION) or 0
+
+    return await run_in_threadpool(_read)
+
+
+class ReplicaSet:
+    """The configured replicas, their health/lag state and the round-robin over the usable ones."""
+
+    def __init__(self, urls: List[str], max_lag: float, sticky_seconds: float, interval: float):
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls)]
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self.interval = interval
+        self._turn = itertools.count()
+        # (primary version, monotonic time it was first seen), oldest first. At most one entry per
+        # check, so once entries are dropped the oldest kept is over max_lag old: a replica behind
+        # it is still measured as over the limit, however long it was down
+        self._seen: Deque[Tuple[int, float]] = deque(
+            maxlen=max(SEEN_MIN, math.ceil(max_lag / max(interval, 0.01)) + 2)
+        )
+        self.primary_version: Optional[int] = None
+        self.routed: Dict[str, int] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    # -- routing --------------------------------------------------------------
+
+    def pick(self) -> Optional[Replica]:
+        usable = [r for r in self.replicas if r.usable(self.max_lag)]
+        if not usable:
+            return None
+        return usable[next(self._turn) % len(usable)]
+
+    def route(self, request: Request) -> Optional[Replica]:
+        """The replica for this read, or None for the primary."""
+        if _sticky(request):
+            replica, reason = None, "sticky"
+        else:
+            replica = self.pick()
+            reason = "replica" if replica is not None else "fallback"
+        target = replica.name if replica is not None else "primary"
+        READ_ROUTES.inc(target, reason)
+        self.routed[f"{target}:{reason}"] = self.routed.get(f"{target}:{reason}", 0) + 1
+        return replica
+
+    # -- health and lag -------------------------------------------------------
+
+    def _lag(self, version: int, now: float) -> float:
+        for seen_version, seen_at in self._seen:
+            if seen_version > version:
+                return now - seen_at
+        return 0.0
+
+    async def check(self) -> None:
+        """One round: primary version first, then every replica's version, health and lag."""
+        now = time.monotonic()
+        try:
+            primary = await asyncio.wait_for(_read_version(engine, async_engine), self._timeout)
+        except Exception as e:
+            # Without the primary's version lag is unknown; keep the last state
+            logger.warning("replica check: primary version read failed: {}", e)
+            return
+        if self.primary_version is None or primary > self.primary_version:
+            self._seen.append((primary, now))
+        self.primary_version = primary
+
+        for replica in self.replicas:
+            try:
+                replica.version = await asyncio.wait_for(replica.read_version(), self._timeout)
+            except Exception as e:
+                error = str(e).splitlines()[0] if str(e) else type(e).__name__
+                if replica.healthy:
+                    logger.warning("{} failed its health check: {}", replica.name, error)
+                replica.healthy, replica.lag, replica.error = False, None, error
+            else:
+                if replica.error is not None:
+                    logger.info("{} is answering again", replica.name)
+                replica.healthy, replica.error = True, None
+                replica.lag = self._lag(replica.version, now)
+            REPLICA_UP.set(replica.name, value=int(replica.healthy))
+            if replica.lag is not None:
+                REPLICA_LAG.set(replica.name, value=replica.lag)
+
+        # Versions every replica has applied are no longer needed to measure anyone's lag (one
+        # that is down keeps its last version, so it is measured correctly when it comes back)
+        applied = min((r.version for r in self.replicas if r.version is not None), default=None)
+        while len(self._seen) > 1 and applied is not None and self._seen[0][0] <= applied:
+            self._seen.popleft()
+
+    @property
+    def _timeout(self) -> float:
+        return max(2 * self.interval, 1.0)
+
+    async def run(self) -> None:
+        """Lifespan task: check every REPLICA_CHECK_INTERVAL seconds until cancelled."""
+        while True:
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("replica check failed")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "primary_version": self.primary_version,
+            "max_lag_s": self.max_lag,
+            "sticky_s": self.sticky_seconds,
+            "replicas": [
+                {
+                    "name": r.name,
+                    "healthy": r.healthy,
+                    "version": r.version,
+                    "lag_s": None if r.lag is None else round(r.lag, 3),
+                    "usable": r.usable(self.max_lag),
+                    "error": r.error,
+                }
+                for r in self.replicas
+            ],
+            "routed": dict(self.routed),
+        }
+
+    def pool_stats(self) -> Dict[str, dict]:
+        stats = {}
+        for r in self.replicas:
+            stats[r.name] = pool_stats(r.engine.pool)
+            if r.async_engine is not None:
+                stats[f"{r.name}_async"] = pool_stats(r.async_engine.pool)
+        return stats
+
+    async def dispose(self) -> None:
+        for r in self.replicas:
+            if r.async_engine is not None:
+                await r.async_engine.dispose()
+            r.engine.dispose()
+
+
+def _sticky(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, "0")) > time.time()
+    except ValueError:
+        return False
+
+
+replicas = ReplicaSet(
+    settings.REPLICA_URLS,
+    settings.REPLICA_MAX_LAG,
+    settings.REPLICA_STICKY_SECONDS,
+    settings.REPLICA_CHECK_INTERVAL,
+)
+
+
+async def get_read_session(request: Request) -> AsyncIterator[DbSession]:
+    """Like get_session, but on a replica when one is usable and the client has not just written."""
+    replica = replicas.route(request) if replicas else None
+    sync_factory = replica.session_factory if replica is not None else SessionLocal
+    async_factory = replica.async_session_factory if replica is not None else AsyncSessionLocal
+    if async_factory is not None:
+        async with async_factory() as db:
+            yield db
+    else:
+        db = ThreadedSession(sync_factory())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+
+class ReadYourWritesMiddleware:
+    """Marks a client that just wrote with a cookie, so its reads stay on the primary for a while."""
+
+    def __init__(self, app: ASGIApp, sticky_seconds: float):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + self.sticky_seconds
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{STICKY_COOKIE}={until:.3f}; Max-Age={int(self.sticky_seconds) + 1}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
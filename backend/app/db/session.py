@@ -1,6 +1,172 @@
+from __future__ import annotations
+from typing import Any, AsyncIterator, Callable, List, Optional, TypeVar, Union
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.db.pool import pool_options, pool_stats
+from app.db.slow_queries import slow_query_log
+
+T = TypeVar("T")
 
-engine = create_engine(settings.SYNC_DATABASE_URL)
+engine = create_engine(settings.SYNC_DATABASE_URL, **pool_options(settings.SYNC_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Only built when DB_ASYNC is on, so asyncpg/aiosqlite stay optional for sync deployments
+async_engine: Optional[AsyncEngine] = (
+    create_async_engine(
+        settings.ASYNC_DATABASE_URL, **pool_options(settings.ASYNC_DATABASE_URL, async_mode=True)
+    )
+    if settings.DB_ASYNC
+    else None
+)
+
+def _instrument(target) -> None:
+    """Per-request SQL count/time for /metrics, plus the opt-in slow query log."""
+    instrument_engine(target)
+    if slow_query_log is not None:
+        slow_query_log.install(target)
+
+_instrument(engine)
+if async_engine is not None:
+    _instrument(async_engine.sync_engine)
+
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None
+    else None
+)
+
+
+class ThreadedSession:
+    """
+    The subset of the ``AsyncSession`` API the routes use, over a blocking ``Session``.
+
+    Every database call is pushed to Starlette's threadpool, so the same ``async def``
+    routes run unchanged whether ``DB_ASYNC`` is on or off.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def get_bind(self):
+        return self.sync_session.get_bind()
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    async def run_sync(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def execute(self, stmt, params=None):
+        def _execute(s: Session):
+            result = s.execute(stmt, params)
+            # Buffer rows in the worker thread so iterating them never touches the cursor
+            return result.freeze()() if getattr(result, "returns_rows", True) else result
+        return await self.run_sync(_execute)
+
+    async def scalar(self, stmt, params=None):
+        return await self.run_sync(lambda s: s.scalar(stmt, params))
+
+    async def scalars(self, stmt, params=None):
+        return (await self.execute(stmt, params)).scalars()
+
+    async def get(self, entity, ident):
+        return await self.run_sync(lambda s: s.get(entity, ident))
+
+    async def refresh(self, instance: Any) -> None:
+        await self.run_sync(lambda s: s.refresh(instance))
+
+    async def delete(self, instance: Any) -> None:
+        await self.run_sync(lambda s: s.delete(instance))
+
+    async def flush(self) -> None:
+        await self.run_sync(lambda s: s.flush())
+
+    async def commit(self) -> None:
+        await self.run_sync(lambda s: s.commit())
+
+    async def rollback(self) -> None:
+        await self.run_sync(lambda s: s.rollback())
+
+    async def close(self) -> None:
+        await self.run_sync(lambda s: s.close())
+
+
+DbSession = Union[AsyncSession, ThreadedSession]
+
+
+async def warm_up(connections: int) -> None:
+    """Open ``connections`` pooled connections up front; overflow connections are not kept, so cap at pool size."""
+    connections = min(connections, settings.DB_POOL_SIZE)
+    if connections <= 0:
+        return
+    if async_engine is not None:
+        conns = [await async_engine.connect() for _ in range(connections)]
+        for conn in conns:
+            await conn.close()
+    else:
+        def _open() -> None:
+            conns = [engine.connect() for _ in range(connections)]
+            for conn in conns:
+                conn.close()
+        await run_in_threadpool(_open)
+
+
+async def dispose() -> None:
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+
+
+def engine_pool_stats() -> dict:
+    """Pool statistics for the engine(s) serving requests."""
+    stats = {"sync": pool_stats(engine.pool)}
+    if async_engine is not None:
+        stats["async"] = pool_stats(async_engine.pool)
+    return stats
+
+
+async def get_session() -> AsyncIterator[DbSession]:
+    """Request-scoped session: native ``AsyncSession`` with DB_ASYNC, threadpool-backed otherwise."""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = ThreadedSession(SessionLocal())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+
+async def stream_partitions(stmt, size: int) -> AsyncIterator[List[Any]]:
+    """
+    Yield rows of ``stmt`` in lists of ``size`` from a server-side cursor, in a session of its own.
+
+    Streaming responses outlive the request-scoped session from get_session, so
+    the export path cannot use it; memory stays bounded by one partition.
+    """
+    stmt = stmt.execution_options(yield_per=size)
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(stmt)
+            async for part in result.partitions(size):
+                yield part
+        return
+
+    def _partitions():
+        with SessionLocal() as db:
+            yield from db.execute(stmt).partitions(size)
+
+    parts = _partitions()
+    try:
+        async for part in iterate_in_threadpool(parts):
+            yield part
+    finally:
+        # Client went away mid-stream: release the cursor and connection now, not at GC
+        await run_in_threadpool(parts.close)
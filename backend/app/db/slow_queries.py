@@ -0,0 +1,174 @@
+from __future__ import annotations
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import current_route
+
+MAX_SHAPES = 500
+MAX_PARAMS_CHARS = 500
+
+_WHITESPACE = re.compile(r"\s+")
+# IN lists of bind parameters or literals (expanding IN emits one parameter per element)
+_IN_LIST = re.compile(r"\bIN \((?:\s*(?:%\(\w+\)s|\?|\$\d+|:\w+|'[^']*'|\d+)\s*,?)+\)", re.IGNORECASE)
+_NUMBER = re.compile(r"(?<![\w.])\d+(?:\.\d+)?\b")
+_EXPLAINABLE = re.compile(r"^\s*(?:SELECT|WITH|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+_PLAIN_READ = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+_LOCKING = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE)
+
+
+def normalize(statement: str) -> str:
+    """Query shape: whitespace collapsed, IN lists and numeric literals folded, so one filter combo is one entry."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _NUMBER.sub("?", shape)
+
+
+def explain_command(statement: str) -> Optional[str]:
+    """
+    How to explain a slow statement, or None when it cannot be explained.
+
+    EXPLAIN ANALYZE runs the statement again, so only plain reads get it. Writes,
+    locking reads (FOR UPDATE/SHARE) and WITH queries, which may hold data-modifying
+    CTEs, get a plain EXPLAIN: planned, never executed.
+    """
+    if not _EXPLAINABLE.match(statement):
+        return None
+    if _PLAIN_READ.match(statement) and not _LOCKING.search(statement):
+        return "EXPLAIN (ANALYZE, BUFFERS)"
+    return "EXPLAIN"
+
+
+class SlowQueryLog:
+    """
+    Logs statements slower than ``threshold_ms`` with their parameters and route,
+    and keeps per-shape aggregates for the top-N listing.
+
+    On Postgres (psycopg2) a sampled, rate-limited subset is explained on a side
+    connection in a background thread, inside a rolled-back transaction with a
+    statement timeout: plain reads with ``EXPLAIN (ANALYZE, BUFFERS)``, anything
+    else with a plain ``EXPLAIN`` (see ``explain_command``).
+    """
+
+    def __init__(self, threshold_ms: float, explain_sample: float, explain_per_minute: int, explain_timeout_ms: int):
+        self.threshold_ms = threshold_ms
+        self.explain_sample = explain_sample
+        self.explain_per_minute = explain_per_minute
+        self.explain_timeout_ms = explain_timeout_ms
+        self._lock = threading.Lock()
+        self._shapes: Dict[str, Dict[str, Any]] = {}
+        self._explains: Deque[float] = deque()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+    def install(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._error)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def _error(self, exception_context) -> None:
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("slow_query_start"):
+            conn.info["slow_query_start"].pop()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed_ms = (time.perf_counter() - conn.info["slow_query_start"].pop()) * 1000
+        if elapsed_ms < self.threshold_ms:
+            return
+
+        route = current_route.get() or "-"
+        params = repr(parameters)
+        if len(params) > MAX_PARAMS_CHARS:
+            params = params[:MAX_PARAMS_CHARS] + "..."
+        shape = self._record(normalize(statement), elapsed_ms, route, params)
+        logger.warning("slow query {:.1f}ms route={} params={} sql={}", elapsed_ms, route, params, shape)
+
+        command = explain_command(statement)
+        if (
+            conn.dialect.name == "postgresql"
+            and conn.dialect.driver == "psycopg2"
+            and not executemany
+            and command is not None
+            and self._may_explain()
+        ):
+            self._executor.submit(self._explain, conn.engine, shape, command, statement, parameters)
+
+    def _record(self, shape: str, elapsed_ms: float, route: str, params: str) -> str:
+        with self._lock:
+            entry = self._shapes.get(shape)
+            if entry is None:
+                if len(self._shapes) >= MAX_SHAPES:
+                    # Forget the shape that has cost the least overall
+                    del self._shapes[min(self._shapes, key=lambda s: self._shapes[s]["total_ms"])]
+                entry = self._shapes[shape] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "plan": None}
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            if elapsed_ms >= entry["max_ms"]:
+                entry.update(max_ms=elapsed_ms, route=route, params=params)
+        return shape
+
+    def _may_explain(self) -> bool:
+        if random.random() >= self.explain_sample:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._explains and now - self._explains[0] > 60:
+                self._explains.popleft()
+            if len(self._explains) >= self.explain_per_minute:
+                return False
+            self._explains.append(now)
+            return True
+
+    def _explain(self, engine: Engine, shape: str, command: str, statement: str, parameters: Any) -> None:
+        # Raw DBAPI connection: same paramstyle as the original statement, and no engine events fire
+        raw = engine.raw_connection()
+        try:
+            with raw.cursor() as cur:
+                cur.execute(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}")
+                cur.execute(f"{command} {statement}", parameters)
+                plan = "\n".join(row[0] for row in cur.fetchall())
+        except Exception as e:  # the plan is best-effort; never let it surface anywhere
+            logger.info("slow query EXPLAIN failed: {}", e)
+            return
+        finally:
+            raw.rollback()
+            raw.close()
+        with self._lock:
+            if shape in self._shapes:
+                self._shapes[shape]["plan"] = plan
+        logger.warning("slow query plan for sql={}\n{}", shape, plan)
+
+    def top(self, n: int, order: str = "total_ms") -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = [
+                {"shape": shape, **entry, "avg_ms": entry["total_ms"] / entry["count"]}
+                for shape, entry in self._shapes.items()
+            ]
+        entries.sort(key=lambda e: e[order], reverse=True)
+        for e in entries:
+            for key in ("total_ms", "max_ms", "avg_ms"):
+                e[key] = round(e[key], 3)
+        return entries[:n]
+
+
+slow_query_log: Optional[SlowQueryLog] = (
+    SlowQueryLog(
+        settings.SLOW_QUERY_MS,
+        settings.SLOW_QUERY_EXPLAIN_SAMPLE,
+        settings.SLOW_QUERY_EXPLAIN_PER_MINUTE,
+        settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS,
+    )
+    if settings.SLOW_QUERY_MS > 0
+    else None
+)
@@ -1,11 +1,47 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
 from app.core.logging import setup_logging
-from app.api import books
+from app.api import batch, books, changes
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.core.admission import AdmissionMiddleware, admission
+from app.core.cache import read_cache
+from app.core.metrics import REGISTRY, MetricsMiddleware, sample_gauges
+from app.db import session
+from app.db.replicas import ReadYourWritesMiddleware, replicas
+from app.db.slow_queries import slow_query_log
+from app.services.purge import purge_worker
+from app.services.suggest import suggest_index
 
 logger = setup_logging(settings.LOG_LEVEL)
-app = FastAPI(title="Books API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await session.warm_up(settings.DB_POOL_WARMUP)
+    replica_check = asyncio.create_task(replicas.run()) if replicas else None
+    purge = None
+    if settings.TRASH_RETENTION_DAYS > 0 and settings.PURGE_IN_APP:
+        purge = asyncio.create_task(purge_worker())
+    # Builds in the background: /api/books/suggest answers 503 until the first build is in
+    suggest = asyncio.create_task(suggest_index.run()) if settings.SUGGEST_ENABLED else None
+    yield
+    for task in (purge, suggest, replica_check):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    await replicas.dispose()
+    await session.dispose()
+
+app = FastAPI(title="Books API", version="0.1.0", lifespan=lifespan)
+
+if settings.ADMISSION_ENABLED:
+    # Innermost, so shed requests still get CORS headers (and are counted by the metrics)
+    app.add_middleware(AdmissionMiddleware)
 
 # Whitelist the UI origin(s)
 allowed = settings.CORS_ORIGINS or ["http://localhost:8080"]
@@ -16,10 +52,75 @@ app.add_middleware(
     allow_credentials=True,        
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+if replicas:
+    # Successful writes set the read-your-writes cookie (the UI sends fetches with credentials)
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=settings.REPLICA_STICKY_SECONDS)
+
+if settings.METRICS_ENABLED:
+    # Added last so it wraps CORS too and times the whole request
+    app.add_middleware(MetricsMiddleware)
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/health/ready")
+async def readiness(response: Response):
+    """
+    Readiness: 503 while this worker sheds reads, writes or counts, plus each class's admission state.
+
+    Async on purpose: it must answer even when the threadpool is backed up.
+    """
+    if not settings.ADMISSION_ENABLED:
+        return {"ready": True, "classes": {}}
+    stats = admission.stats()
+    if not stats["ready"]:
+        response.status_code = 503
+        response.headers["Retry-After"] = "1"
+    return stats
+
+@app.get("/health/pool")
+def pool_health():
+    """Connection pool occupancy and checkout wait/timeout counters for this worker."""
+    return {**session.engine_pool_stats(), **replicas.pool_stats()}
+
+@app.get("/health/replicas")
+def replica_health():
+    """Health, version and lag of each read replica as of this worker's last check, and where reads went."""
+    if not replicas:
+        raise HTTPException(status_code=404, detail="No read replicas configured (set REPLICA_URLS)")
+    return replicas.stats()
+
+@app.get("/health/cache")
+def cache_health():
+    """Read cache hit/miss/eviction counters and memory held by this worker."""
+    return read_cache.stats()
+
+@app.get("/health/slow-queries")
+def slow_queries(
+    limit: int = Query(10, ge=1, le=100),
+    order: str = Query("total_ms", pattern="^(total_ms|max_ms|avg_ms|count)$"),
+):
+    """Top-N slowest normalized query shapes seen by this worker (needs SLOW_QUERY_MS > 0)."""
+    if slow_query_log is None:
+        raise HTTPException(status_code=404, detail="Slow query log is off (set SLOW_QUERY_MS)")
+    return slow_query_log.top(limit, order)
+
+@app.get("/health/suggest")
+def suggest_health():
+    """Size, memory footprint, build time and feed position of this worker's suggest index."""
+    return suggest_index.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus text exposition for this worker process."""
+    sample_gauges({**session.engine_pool_stats(), **replicas.pool_stats()}, read_cache.stats())
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# batch and changes first: "/books/trash:restore" and "/books/changes" must win over "/books/{book_id}"
+app.include_router(batch.router, prefix="/api")
+app.include_router(changes.router, prefix="/api")
 app.include_router(books.router, prefix="/api")
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from datetime import datetime
-from sqlalchemy import DateTime, String, func, Index
+from sqlalchemy import BigInteger, DDL, DateTime, Integer, String, event, func, text, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 
@@ -21,14 +21,139 @@ class Book(Base):
     deleted_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True),
         nullable=True,
-        index=True,
         default=None
     )
     deleted_by: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # Row version for If-Match: every write to the book sets it to version + 1
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    # Position in the change feed: set from one global sequence on every insert and update
+    change_seq: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
 
     __table_args__ = (
+        Index("ux_book_change_seq", change_seq, unique=True),
         Index("ix_book_title_lower", func.lower(title)),  
+        # Dedup key: one live book per (title, author), case-insensitive; trashed copies don't count
+        Index(
+            "ux_book_title_author_live",
+            func.lower(title),
+            func.lower(author),
+            unique=True,
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        # Listing shapes: live by created_at, trash by deleted_at, both newest first with id as tie-breaker
+        Index(
+            "ix_book_live_created",
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_book_trash_deleted",
+            deleted_at.desc(),
+            id.desc(),
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+        # Trigram GIN indexes make LIKE '%q%' on lower(title/author) indexable (Postgres only)
+        Index(
+            "ix_book_title_trgm",
+            func.lower(title).label("title_lower"),
+            postgresql_using="gin",
+            postgresql_ops={"title_lower": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_book_author_trgm",
+            func.lower(author).label("author_lower"),
+            postgresql_using="gin",
+            postgresql_ops={"author_lower": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
     )
 
     def __repr__(self) -> str:
         return f"<Book id={self.id} title={self.title!r} deleted_at={self.deleted_at} deleted_by={self.deleted_by}>"
+
+
+class BookTombstone(Base):
+    """Hard-deleted book ids, so the change feed can report deletions after the row is gone."""
+    __tablename__ = "book_tombstone"
+
+    book_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<BookTombstone book_id={self.book_id} change_seq={self.change_seq}>"
+
+
+# SQLite: FTS5 shadow table over title/author, kept in sync by triggers
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5("
+    "title, author, content='book', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN "
+    "INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END",
+    "CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN "
+    "INSERT INTO book_fts(book_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); END",
+    "CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, author ON book BEGIN "
+    "INSERT INTO book_fts(book_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); "
+    "INSERT INTO book_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END",
+]
+
+event.listen(
+    Book.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+for _stmt in SQLITE_FTS_DDL:
+    event.listen(Book.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+event.listen(
+    Book.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS book_fts").execute_if(dialect="sqlite"),
+)
+
+
+# Change feed sequence. Every statement on book first locks the catalog_version row (which
+# every writer bumps anyway), so sequence values are handed out in commit order and a
+# reader that has seen N can never later find a committed change below N.
+PG_CHANGE_FEED_DDL = [
+    "CREATE SEQUENCE IF NOT EXISTS book_change_seq",
+    "ALTER TABLE book ALTER COLUMN change_seq SET DEFAULT nextval('book_change_seq')",
+    "CREATE OR REPLACE FUNCTION book_change_lock() RETURNS trigger LANGUAGE plpgsql AS $$ "
+    "BEGIN PERFORM 1 FROM catalog_version WHERE id = 1 FOR UPDATE; RETURN NULL; END $$",
+    "CREATE TRIGGER book_change_lock BEFORE INSERT OR UPDATE OR DELETE ON book "
+    "FOR EACH STATEMENT EXECUTE FUNCTION book_change_lock()",
+    "CREATE OR REPLACE FUNCTION book_change_touch() RETURNS trigger LANGUAGE plpgsql AS $$ "
+    "BEGIN NEW.change_seq := nextval('book_change_seq'); RETURN NEW; END $$",
+    "CREATE TRIGGER book_change_touch BEFORE UPDATE ON book FOR EACH ROW EXECUTE FUNCTION book_change_touch()",
+    "CREATE OR REPLACE FUNCTION book_change_tombstone() RETURNS trigger LANGUAGE plpgsql AS $$ "
+    "BEGIN INSERT INTO book_tombstone (book_id, change_seq) SELECT id, nextval('book_change_seq') FROM old_rows "
+    "ON CONFLICT (book_id) DO UPDATE SET change_seq = excluded.change_seq; RETURN NULL; END $$",
+    "CREATE TRIGGER book_change_tombstone AFTER DELETE ON book REFERENCING OLD TABLE AS old_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION book_change_tombstone()",
+]
+
+# SQLite has one writer at a time, so a counter row is enough; the update trigger names
+# every column but change_seq so its own write does not fire it again
+_NEXT_SEQ = "UPDATE book_change_seq SET value = value + 1 WHERE id = 1; "
+_CURRENT_SEQ = "(SELECT value FROM book_change_seq WHERE id = 1)"
+SQLITE_CHANGE_FEED_DDL = [
+    "CREATE TABLE IF NOT EXISTS book_change_seq (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO book_change_seq (id, value) VALUES (1, 0)",
+    "CREATE TRIGGER IF NOT EXISTS book_change_ai AFTER INSERT ON book BEGIN "
+    f"{_NEXT_SEQ}UPDATE book SET change_seq = {_CURRENT_SEQ} WHERE id = NEW.id; END",
+    "CREATE TRIGGER IF NOT EXISTS book_change_au "
+    "AFTER UPDATE OF title, author, created_at, created_by, deleted_at, deleted_by, version ON book BEGIN "
+    f"{_NEXT_SEQ}UPDATE book SET change_seq = {_CURRENT_SEQ} WHERE id = NEW.id; END",
+    "CREATE TRIGGER IF NOT EXISTS book_change_ad AFTER DELETE ON book BEGIN "
+    f"{_NEXT_SEQ}INSERT INTO book_tombstone (book_id, change_seq) VALUES (OLD.id, {_CURRENT_SEQ}) "
+    "ON CONFLICT (book_id) DO UPDATE SET change_seq = excluded.change_seq; END",
+]
+
+for _stmt in PG_CHANGE_FEED_DDL:
+    event.listen(Book.__table__, "after_create", DDL(_stmt).execute_if(dialect="postgresql"))
+for _stmt in SQLITE_CHANGE_FEED_DDL:
+    event.listen(Book.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+for _trigger in ("book_change_ai", "book_change_au", "book_change_ad"):
+    event.listen(
+        Book.__table__, "before_drop",
+        DDL(f"DROP TRIGGER IF EXISTS {_trigger}").execute_if(dialect="sqlite"),
+    )
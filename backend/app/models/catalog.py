@@ -0,0 +1,135 @@
+from __future__ import annotations
+from datetime import date
+from typing import List
+
+from sqlalchemy import BigInteger, DDL, Date, event
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class CatalogVersion(Base):
+    """Single-row counter bumped in the same transaction as every book write."""
+    __tablename__ = "catalog_version"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<CatalogVersion version={self.version}>"
+
+class BookDayStats(Base):
+    """
+    Per-UTC-day book counts, maintained by triggers on ``book`` in the writing transaction.
+
+    ``created_live``/``created_trash`` count books created that day by whether they
+    are in the trash now; ``deleted`` counts trashed books by the day they were deleted.
+    """
+    __tablename__ = "book_day_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    created_live: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    created_trash: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    deleted: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<BookDayStats {self.day} live={self.created_live} trash={self.created_trash} deleted={self.deleted}>"
+
+event.listen(
+    CatalogVersion.__table__, "after_create",
+    DDL("INSERT INTO catalog_version (id, version) VALUES (1, 0)"),
+)
+
+
+def _day_deltas(source: str, sign: int, day) -> str:
+    """SELECT of (day, created_live, created_trash, deleted) deltas for the rows in ``source``."""
+    return (
+        f"SELECT {day('created_at')} AS day, "
+        f"CASE WHEN deleted_at IS NULL THEN {sign} ELSE 0 END AS created_live, "
+        f"CASE WHEN deleted_at IS NULL THEN 0 ELSE {sign} END AS created_trash, "
+        f"0 AS deleted FROM {source} "
+        f"UNION ALL SELECT {day('deleted_at')}, 0, 0, {sign} FROM {source} WHERE deleted_at IS NOT NULL"
+    )
+
+
+def _apply_day_deltas(sources, day) -> str:
+    """Upsert the summed deltas of ``(source, sign)`` pairs into book_day_stats, skipping net-zero days."""
+    deltas = " UNION ALL ".join(_day_deltas(source, sign, day) for source, sign in sources)
+    return (
+        "INSERT INTO book_day_stats (day, created_live, created_trash, deleted) "
+        "SELECT day, sum(created_live), sum(created_trash), sum(deleted) "
+        f"FROM ({deltas}) AS d WHERE true GROUP BY day "
+        "HAVING sum(created_live) <> 0 OR sum(created_trash) <> 0 OR sum(deleted) <> 0 "
+        "ON CONFLICT (day) DO UPDATE SET "
+        "created_live = book_day_stats.created_live + excluded.created_live, "
+        "created_trash = book_day_stats.created_trash + excluded.created_trash, "
+        "deleted = book_day_stats.deleted + excluded.deleted"
+    )
+
+
+def _pg_day(column: str) -> str:
+    return f"CAST({column} AT TIME ZONE 'UTC' AS date)"
+
+
+def _sqlite_day(column: str) -> str:
+    return f"date({column})"
+
+
+# Postgres: statement-level triggers over transition tables, so a bulk import or batch
+# update touches each day row once per statement rather than once per book
+_PG_TRIGGERS = {
+    "insert": ("NEW TABLE AS new_rows", [("new_rows", 1)]),
+    "update": ("OLD TABLE AS old_rows NEW TABLE AS new_rows", [("old_rows", -1), ("new_rows", 1)]),
+    "delete": ("OLD TABLE AS old_rows", [("old_rows", -1)]),
+}
+PG_DAY_STATS_DDL: List[str] = []
+for _op, (_referencing, _sources) in _PG_TRIGGERS.items():
+    PG_DAY_STATS_DDL += [
+        f"CREATE OR REPLACE FUNCTION book_day_stats_{_op}() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        f"BEGIN {_apply_day_deltas(_sources, _pg_day)}; RETURN NULL; END $$",
+        f"CREATE TRIGGER book_day_stats_{_op} AFTER {_op.upper()} ON book REFERENCING {_referencing} "
+        f"FOR EACH STATEMENT EXECUTE FUNCTION book_day_stats_{_op}()",
+    ]
+
+# SQLite: row-level triggers over NEW/OLD; title/author edits don't fire the update trigger
+_NEW_ROW = "(SELECT NEW.created_at AS created_at, NEW.deleted_at AS deleted_at)"
+_OLD_ROW = "(SELECT OLD.created_at AS created_at, OLD.deleted_at AS deleted_at)"
+SQLITE_DAY_STATS_DDL = [
+    "CREATE TRIGGER IF NOT EXISTS book_day_stats_ai AFTER INSERT ON book BEGIN "
+    f"{_apply_day_deltas([(_NEW_ROW, 1)], _sqlite_day)}; END",
+    "CREATE TRIGGER IF NOT EXISTS book_day_stats_au AFTER UPDATE OF created_at, deleted_at ON book BEGIN "
+    f"{_apply_day_deltas([(_OLD_ROW, -1), (_NEW_ROW, 1)], _sqlite_day)}; END",
+    "CREATE TRIGGER IF NOT EXISTS book_day_stats_ad AFTER DELETE ON book BEGIN "
+    f"{_apply_day_deltas([(_OLD_ROW, -1)], _sqlite_day)}; END",
+]
+
+# Counts for books already present when the table is created
+BACKFILL_PG = _apply_day_deltas([("book", 1)], _pg_day)
+BACKFILL_SQLITE = _apply_day_deltas([("book", 1)], _sqlite_day)
+
+DAY_STATS_DDL = {
+    "postgresql": [BACKFILL_PG] + PG_DAY_STATS_DDL,
+    "sqlite": [BACKFILL_SQLITE] + SQLITE_DAY_STATS_DDL,
+}
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_day_stats(target, connection, tables=(), **kw) -> None:
+    """
+    Backfill and triggers for a book_day_stats that create_all just created.
+
+    Run once every table exists: no foreign key orders book_day_stats after book, so
+    its own after_create could come first, depending on which model was imported first.
+    """
+    if BookDayStats.__table__ not in tables:
+        return
+    for stmt in DAY_STATS_DDL.get(connection.dialect.name, []):
+        connection.execute(DDL(stmt))
+
+for _trigger in ("book_day_stats_ai", "book_day_stats_au", "book_day_stats_ad"):
+    event.listen(
+        BookDayStats.__table__, "before_drop",
+        DDL(f"DROP TRIGGER IF EXISTS {_trigger}").execute_if(dialect="sqlite"),
+    )
+for _op in _PG_TRIGGERS:
+    event.listen(
+        BookDayStats.__table__, "before_drop",
+        DDL(f"DROP TRIGGER IF EXISTS book_day_stats_{_op} ON book").execute_if(dialect="postgresql"),
+    )
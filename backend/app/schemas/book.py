@@ -1,8 +1,10 @@
 from __future__ import annotations
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, ConfigDict, Field
 
+from app.core.config import settings
+
 
 class BookOut(BaseModel):
     id: int
@@ -12,10 +14,56 @@ class BookOut(BaseModel):
     created_by: str
     deleted_at: Optional[datetime] = None
     deleted_by: Optional[str] = None
+    version: int = Field(default=1, description="Row version; send it back as If-Match: \"<version>\"")
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class BookPage(BaseModel):
+    items: List[BookOut]
+    total: int
+    total_estimated: bool = Field(default=False, description="total is a planner estimate, not an exact count")
+    next_cursor: Optional[str] = Field(default=None, description="Pass as cursor to fetch the following page")
+
+
+class CreatedBucket(BaseModel):
+    period: str = Field(description="YYYY-MM-DD or YYYY-MM (UTC)")
+    live: int = Field(description="Books created in the period that are live now")
+    trash: int = Field(description="Books created in the period that are in the trash now")
+
+
+class DeletedBucket(BaseModel):
+    period: str = Field(description="YYYY-MM-DD or YYYY-MM (UTC)")
+    count: int = Field(description="Books moved to the trash in the period and still there")
+
+
+class BookStats(BaseModel):
+    bucket: str
+    created: List[CreatedBucket]
+    deleted: List[DeletedBucket]
+    live: int = Field(description="Live books created in the range")
+    trash: int = Field(description="Trashed books created in the range")
+
+
+class Suggestion(BaseModel):
+    text: str = Field(description="Title or author as stored")
+    kind: Literal["title", "author"]
+    count: int = Field(description="Live books with this title or author")
+
+
+class BookChange(BaseModel):
+    seq: int = Field(description="Position in the change feed")
+    op: Literal["upsert", "delete"] = Field(description="upsert: book as it is now; delete: hard-deleted")
+    id: int
+    book: Optional[BookOut] = None
+
+
+class BookChanges(BaseModel):
+    changes: List[BookChange]
+    next_since: int = Field(description="Pass as since to continue after these changes")
+    has_more: bool = Field(description="More changes are waiting; call again right away")
+
+
 class BookCreate(BaseModel):
     title: str = Field(min_length=1, max_length=255, description="Book title")
     author: str = Field(min_length=1, max_length=255, description="Author name")
@@ -32,3 +80,51 @@ class BookUpdate(BaseModel):
     created_by: Optional[str] = Field(default=None, min_length=1, max_length=255)
 
     model_config = ConfigDict(extra="forbid")
+
+
+class BookBatchUpdateItem(BookUpdate):
+    id: int = Field(ge=1)
+
+
+class BookBatchCreate(BaseModel):
+    items: List[BookCreate] = Field(min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class BookBatchUpdate(BaseModel):
+    items: List[BookBatchUpdateItem] = Field(min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class BookIds(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class BookBatchDelete(BookIds):
+    deleted_by: Optional[str] = Field(default="system", min_length=1, max_length=255)
+
+
+class BatchItemResult(BaseModel):
+    index: int = Field(description="Position of the item in the request")
+    status: int = Field(description="HTTP status the single-item endpoint would have returned")
+    id: Optional[int] = None
+    detail: Optional[str] = None
+    book: Optional[BookOut] = None
+
+
+class BatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
+
+class BookImportResult(BaseModel):
+    received: int = Field(description="Data rows read from the upload")
+    inserted: int
+    skipped: int = Field(description="Valid rows that duplicated an existing book or an earlier row")
+    invalid: int
+    errors: List[str] = Field(default_factory=list, description="The first few invalid rows")
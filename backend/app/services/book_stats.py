@@ -0,0 +1,63 @@
+from __future__ import annotations
+from datetime import date
+from typing import Dict, List, Literal, Optional
+
+from sqlalchemy import func, select
+
+from app.models.catalog import BookDayStats
+
+Bucket = Literal["day", "month"]
+
+def _in_range(stmt, start: Optional[date], end: Optional[date]):
+    if start:
+        stmt = stmt.where(BookDayStats.day >= start)
+    if end:
+        stmt = stmt.where(BookDayStats.day <= end)
+    return stmt
+
+async def count_live(db, created_from: Optional[date], created_to: Optional[date], include_deleted: bool) -> int:
+    """Books created in the (inclusive, UTC) day range, summed over the rollup rather than counted."""
+    column = BookDayStats.created_live
+    if include_deleted:
+        column = column + BookDayStats.created_trash
+    return await db.scalar(_in_range(select(func.sum(column)), created_from, created_to)) or 0
+
+async def count_trash(db, deleted_from: Optional[date], deleted_to: Optional[date]) -> int:
+    """Trashed books deleted in the (inclusive, UTC) day range, from the rollup."""
+    return await db.scalar(_in_range(select(func.sum(BookDayStats.deleted)), deleted_from, deleted_to)) or 0
+
+def _period(day: date, bucket: Bucket) -> str:
+    return day.isoformat() if bucket == "day" else day.strftime("%Y-%m")
+
+async def histogram(db, bucket: Bucket, start: Optional[date], end: Optional[date]) -> Dict[str, object]:
+    """
+    Created/deleted counts per day or month between ``start`` and ``end``, plus totals.
+
+    Months are folded from the day rows here, so the cost is one row per day
+    in the range whatever the size of the catalog.
+    """
+    stmt = _in_range(
+        select(BookDayStats.day, BookDayStats.created_live, BookDayStats.created_trash, BookDayStats.deleted),
+        start, end,
+    ).order_by(BookDayStats.day)
+
+    created: Dict[str, Dict[str, object]] = {}
+    deleted: Dict[str, Dict[str, object]] = {}
+    for day, live, trash, removed in (await db.execute(stmt)).all():
+        period = _period(day, bucket)
+        if live or trash:
+            entry = created.setdefault(period, {"period": period, "live": 0, "trash": 0})
+            entry["live"] += live
+            entry["trash"] += trash
+        if removed:
+            entry = deleted.setdefault(period, {"period": period, "count": 0})
+            entry["count"] += removed
+
+    created_rows: List[Dict[str, object]] = list(created.values())
+    return {
+        "bucket": bucket,
+        "created": created_rows,
+        "deleted": list(deleted.values()),
+        "live": sum(row["live"] for row in created_rows),
+        "trash": sum(row["trash"] for row in created_rows),
+    }
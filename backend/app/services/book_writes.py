@@ -0,0 +1,67 @@
+"""
+Single-statement writes to one book.
+
+Each write is one conditional ``UPDATE ... RETURNING`` or ``DELETE ... RETURNING``.
+Its WHERE clause names the state the write needs: the book is live, or it is in
+the trash. With If-Match it also names the row versions the client accepts. So
+there is no read before the write and no refresh after it.
+
+When a write matches no row, ``book_state`` explains why. That lookup by primary
+key only runs on the failure path.
+"""
+from __future__ import annotations
+from typing import Any, Collection, Dict, Iterable, Optional
+
+from sqlalchemy import Delete, Select, Update, delete, select, update
+
+from app.models.book import Book
+
+BOOK_STATE = select(Book.deleted_at, Book.version)
+
+
+def _matching(book_id: int, trashed: bool, expected: Optional[Collection[int]]) -> list:
+    where = [Book.id == book_id, Book.deleted_at.is_not(None) if trashed else Book.deleted_at.is_(None)]
+    if expected is not None:
+        where.append(Book.version.in_(expected))
+    return where
+
+
+def update_book_row(
+    book_id: int,
+    values: Dict[str, Any],
+    *,
+    trashed: bool = False,
+    expected: Optional[Collection[int]] = None,
+) -> Update:
+    """UPDATE one live (or, with ``trashed``, trashed) book whose version is in ``expected``; bumps its version."""
+    return (
+        update(Book)
+        .where(*_matching(book_id, trashed, expected))
+        .values(**values, version=Book.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def select_book_row(
+    book_id: int,
+    columns: Iterable[Any],
+    *,
+    trashed: bool = False,
+    expected: Optional[Collection[int]] = None,
+) -> Select:
+    """SELECT ``columns`` of the book an ``update_book_row`` with the same arguments would match, for a write with nothing to set."""
+    return select(*columns).where(*_matching(book_id, trashed, expected))
+
+
+def delete_book_row(book_id: int, *, expected: Optional[Collection[int]] = None) -> Delete:
+    """DELETE one trashed book whose version is in ``expected``."""
+    return (
+        delete(Book)
+        .where(*_matching(book_id, True, expected))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def book_state(db, book_id: int):
+    """(deleted_at, version) of a book, or None when there is no such book."""
+    return (await db.execute(BOOK_STATE.where(Book.id == book_id))).first()
@@ -0,0 +1,19 @@
+from __future__ import annotations
+from sqlalchemy import select, update
+
+from app.models.catalog import CatalogVersion
+
+# Executed before commit by every write; all writers serialize briefly on this one row
+BUMP_CATALOG_VERSION = (
+    update(CatalogVersion)
+    .where(CatalogVersion.id == 1)
+    .values(version=CatalogVersion.version + 1)
+)
+
+CURRENT_CATALOG_VERSION = select(CatalogVersion.version).where(CatalogVersion.id == 1)
+
+async def current_version(db) -> int:
+    return await db.scalar(CURRENT_CATALOG_VERSION) or 0
+
+async def bump_version(db) -> None:
+    await db.execute(BUMP_CATALOG_VERSION)
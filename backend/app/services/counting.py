@@ -0,0 +1,37 @@
+from __future__ import annotations
+import json
+from typing import Any, Optional
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ClauseElement, Executable, Select
+
+class ExplainJson(Executable, ClauseElement):
+    """
+    ``EXPLAIN (FORMAT JSON)`` of a select, as a statement of its own.
+
+    The select is compiled in place, so its parameters bind in whatever style the
+    driver uses (pyformat for psycopg2, ``$n`` for asyncpg), expanding ``IN`` included.
+    """
+
+    inherit_cache = False
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
+
+@compiles(ExplainJson)
+def _compile_explain_json(element: ExplainJson, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+def explain_json(conn: Any, stmt: Select) -> dict:
+    """The top plan node Postgres picks for ``stmt``, on a Connection or a Session."""
+    plan = conn.execute(ExplainJson(stmt)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+def estimate_rows(db: Session, stmt: Select) -> Optional[int]:
+    """Planner row estimate for ``stmt`` on Postgres, or None where no estimate is available."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    return int(explain_json(db, stmt.order_by(None))["Plan Rows"])
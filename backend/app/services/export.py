@@ -0,0 +1,46 @@
+from __future__ import annotations
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, List
+
+from app.models.book import Book
+
+EXPORT_COLUMNS = (
+    Book.id,
+    Book.title,
+    Book.author,
+    Book.created_at,
+    Book.created_by,
+    Book.deleted_at,
+    Book.deleted_by,
+    Book.version,
+)
+FIELDNAMES = [col.key for col in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+def _iso(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+async def encode_ndjson(partitions: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    async for rows in partitions:
+        yield "".join(
+            json.dumps({k: _iso(v) for k, v in zip(FIELDNAMES, row)}, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode()
+
+async def encode_csv(partitions: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(FIELDNAMES)
+    async for rows in partitions:
+        writer.writerows([_iso(v) for v in row] for row in rows)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+ENCODERS = {"ndjson": encode_ndjson, "csv": encode_csv}
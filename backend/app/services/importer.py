@@ -0,0 +1,211 @@
+from __future__ import annotations
+import argparse
+import csv
+import io
+import json
+import sys
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Optional, TextIO, Tuple, Union
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, and_, exists, func, insert, select, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.book import Book
+from app.services.catalog_version import BUMP_CATALOG_VERSION
+
+IMPORT_FORMATS = ("csv", "ndjson")
+MAX_REPORTED_ERRORS = 20
+
+# "live": skip rows matching a live book (the ux_book_title_author_live index); "all": also skip trashed ones
+Dedup = Literal["live", "all"]
+
+# Per-transaction temp table the rows are loaded into before one INSERT ... SELECT
+staging = Table(
+    "book_import",
+    MetaData(),
+    Column("seq", Integer, nullable=False),
+    Column("title", Text, nullable=False),
+    Column("author", Text, nullable=False),
+    Column("created_by", Text, nullable=False),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+STAGING_COLUMNS = [c.name for c in staging.columns]
+
+Row = Tuple[int, str, str, str]
+
+
+def insert_ignoring_duplicates(dialect: str):
+    """``INSERT INTO book ... ON CONFLICT DO NOTHING`` for dialects that have it; a plain insert otherwise."""
+    if dialect == "postgresql":
+        return postgresql.insert(Book).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(Book).on_conflict_do_nothing()
+    return insert(Book)
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Union[dict, str]]]:
+    """Yield ``(line, record)`` from a CSV (with header) or NDJSON stream; unparsable lines yield an error string."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        missing = {"title", "author"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"CSV header is missing: {', '.join(sorted(missing))}")
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, f"invalid JSON ({e.msg})"
+            continue
+        yield line_no, record if isinstance(record, dict) else "expected a JSON object"
+
+
+def _field(record: dict, name: str) -> Optional[str]:
+    value = record.get(name)
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a string")
+    if len(value) > 255:
+        raise ValueError(f"{name} is longer than 255 characters")
+    return value
+
+
+def _validated(
+    records: Iterable[Tuple[int, Union[dict, str]]], created_by: str, report: Dict[str, Any]
+) -> Iterator[Row]:
+    """Same rules as BookCreate, checked by hand; invalid rows are counted and the first few reported."""
+    for line_no, record in records:
+        report["received"] += 1
+        try:
+            if isinstance(record, str):
+                raise ValueError(record)
+            title, author = _field(record, "title"), _field(record, "author")
+            if title is None or author is None:
+                raise ValueError("title and author are required")
+            yield report["received"], title, author, _field(record, "created_by") or created_by
+        except ValueError as e:
+            report["invalid"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append(f"line {line_no}: {e}")
+
+
+def _batches(rows: Iterator[tuple], size: int) -> Iterator[List[tuple]]:
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class _CsvReader(io.TextIOBase):
+    """Read-only file rendering rows as CSV on demand, so COPY never needs the whole import in memory."""
+
+    def __init__(self, rows: Iterator[tuple], batch_size: int):
+        self._batches = _batches(rows, batch_size)
+        self._buf = ""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> str:
+        while size is None or size < 0 or len(self._buf) < size:
+            batch = next(self._batches, None)
+            if batch is None:
+                break
+            out = io.StringIO()
+            csv.writer(out).writerows(batch)
+            self._buf += out.getvalue()
+        if size is None or size < 0:
+            size = len(self._buf)
+        chunk, self._buf = self._buf[:size], self._buf[size:]
+        return chunk
+
+
+def copy_rows(conn: Connection, table: Table, columns: List[str], rows: Iterator[tuple]) -> None:
+    """Bulk-load ``rows`` into ``table``: COPY FROM STDIN on Postgres/psycopg2, executemany batches elsewhere."""
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+        with conn.connection.dbapi_connection.cursor() as cur:
+            cur.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                _CsvReader(rows, settings.IMPORT_BATCH_SIZE),
+            )
+        return
+    for batch in _batches(rows, settings.IMPORT_BATCH_SIZE):
+        conn.execute(insert(table), [dict(zip(columns, row)) for row in batch])
+
+
+def _insert_from_staging(dialect: str, dedup: Dedup):
+    guard = true()
+    if dedup == "all":
+        guard = ~exists().where(
+            and_(
+                func.lower(Book.title) == func.lower(staging.c.title),
+                func.lower(Book.author) == func.lower(staging.c.author),
+            )
+        )
+    # The WHERE is also what lets SQLite parse INSERT ... SELECT ... ON CONFLICT unambiguously
+    rows = (
+        select(staging.c.title, staging.c.author, staging.c.created_by)
+        .where(guard)
+        .order_by(staging.c.seq)
+    )
+    return insert_ignoring_duplicates(dialect).from_select(["title", "author", "created_by"], rows)
+
+
+def import_rows(
+    records: Iterable[Tuple[int, Union[dict, str]]],
+    created_by: str = "system",
+    dedup: Dedup = "live",
+) -> Dict[str, Any]:
+    """
+    Load records into a staging table and insert them with one ``INSERT ... SELECT ... ON CONFLICT DO NOTHING``.
+
+    Runs in one transaction on the sync engine (COPY on Postgres/psycopg2,
+    executemany elsewhere); duplicates of existing books or of earlier rows in
+    the same import are skipped by the database, not by a lookup beforehand.
+    """
+    report: Dict[str, Any] = {"received": 0, "inserted": 0, "skipped": 0, "invalid": 0, "errors": []}
+    with engine.begin() as conn:
+        staging.create(conn)
+        copy_rows(conn, staging, STAGING_COLUMNS, _validated(records, created_by, report))
+        inserted = conn.execute(_insert_from_staging(conn.dialect.name, dedup)).rowcount
+        if inserted:
+            conn.execute(BUMP_CATALOG_VERSION)
+        if conn.dialect.name != "postgresql":
+            staging.drop(conn)
+
+    report["inserted"] = inserted
+    report["skipped"] = report["received"] - report["invalid"] - inserted
+    return report
+
+
+def import_stream(stream: TextIO, fmt: str, created_by: str = "system", dedup: Dedup = "live") -> Dict[str, Any]:
+    return import_rows(read_records(stream, fmt), created_by=created_by, dedup=dedup)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk import books from a CSV or NDJSON file")
+    parser.add_argument("path", help="file to import, or - for stdin")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="defaults to the file extension")
+    parser.add_argument("--created-by", default="import")
+    parser.add_argument("--dedup", choices=("live", "all"), default="live")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    if args.path == "-":
+        report = import_stream(sys.stdin, fmt, args.created_by, args.dedup)
+    else:
+        with open(args.path, encoding="utf-8-sig", newline="") as f:
+            report = import_stream(f, fmt, args.created_by, args.dedup)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Trash retention: hard-delete books that have been in the trash longer than TRASH_RETENTION_DAYS.
+
+Deletes in small batches, one short transaction each, oldest first, with a
+pause in between, so the purge never holds many row locks or a long
+transaction and live traffic interleaves freely. Runs as a background task
+in the app (PURGE_IN_APP) or once from cron:
+
+    python -m app.services.purge [--retention-days 30] [--batch-size 500] [--dry-run]
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from loguru import logger
+from sqlalchemy import delete, func, select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import read_cache
+from app.core.config import settings
+from app.core.metrics import PURGE_BACKLOG, PURGE_BATCH_SECONDS, PURGE_LAST_SUCCESS, PURGED_ROWS
+from app.db.session import engine
+from app.models.book import Book
+from app.services.catalog_version import BUMP_CATALOG_VERSION
+
+
+def _expired(cutoff: datetime):
+    return (Book.deleted_at.is_not(None), Book.deleted_at < cutoff)
+
+
+def backlog(cutoff: datetime) -> int:
+    """Trashed books deleted before ``cutoff`` (a range scan on ix_book_trash_deleted)."""
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count(Book.id)).where(*_expired(cutoff))) or 0
+
+
+def purge_batch(cutoff: datetime, limit: int) -> List[int]:
+    """
+    Hard-delete up to ``limit`` of the oldest books trashed before ``cutoff``; returns their ids.
+
+    No row locking: every statement on book first locks the catalog_version row (see
+    app.models.book), so purges in several workers take turns anyway. One that picked
+    the batch another just deleted removes nothing and ends its run.
+    """
+    oldest = select(Book.id).where(*_expired(cutoff)).order_by(Book.deleted_at, Book.id).limit(limit)
+    with engine.begin() as conn:
+        ids = list(conn.scalars(delete(Book).where(Book.id.in_(oldest)).returning(Book.id)))
+        if ids:
+            conn.execute(BUMP_CATALOG_VERSION)
+    return ids
+
+
+async def purge_expired(retention_days: float, batch_size: int, pause: float) -> int:
+    """One purge run: batches until nothing past retention is left. Returns the number of books removed."""
+    cutoff = datetime.now(tz=timezone.utc) - timedelta(days=retention_days)
+    PURGE_BACKLOG.set(value=await run_in_threadpool(backlog, cutoff))
+
+    purged = 0
+    t0 = time.perf_counter()
+    while True:
+        started = time.perf_counter()
+        ids = await run_in_threadpool(purge_batch, cutoff, batch_size)
+        PURGE_BATCH_SECONDS.observe(value=time.perf_counter() - started)
+        if ids:
+            purged += len(ids)
+            PURGED_ROWS.inc(amount=len(ids))
+            PURGE_BACKLOG.inc(amount=-len(ids))
+            await read_cache.invalidate("trash", *(f"book:{i}" for i in ids))
+        if len(ids) < batch_size:
+            break
+        await asyncio.sleep(pause)
+
+    PURGE_LAST_SUCCESS.set(value=time.time())
+    if purged:
+        logger.info("trash purge removed {} books older than {} in {:.1f}s", purged, cutoff, time.perf_counter() - t0)
+    return purged
+
+
+async def purge_worker() -> None:
+    """Lifespan task: purge every PURGE_INTERVAL seconds until cancelled; a failed run is retried next interval."""
+    while True:
+        try:
+            await purge_expired(settings.TRASH_RETENTION_DAYS, settings.PURGE_BATCH_SIZE, settings.PURGE_BATCH_PAUSE)
+        except Exception:
+            logger.exception("trash purge failed")
+        await asyncio.sleep(settings.PURGE_INTERVAL)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Hard-delete books trashed longer than the retention period")
+    parser.add_argument("--retention-days", type=float, default=settings.TRASH_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.PURGE_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=settings.PURGE_BATCH_PAUSE, help="seconds between batches")
+    parser.add_argument("--dry-run", action="store_true", help="only report how many books would be removed")
+    args = parser.parse_args(argv)
+    if args.retention_days <= 0:
+        parser.error("set --retention-days or TRASH_RETENTION_DAYS to a positive number")
+
+    cutoff = datetime.now(tz=timezone.utc) - timedelta(days=args.retention_days)
+    if args.dry_run:
+        print(json.dumps({"cutoff": cutoff.isoformat(), "expired": backlog(cutoff)}, indent=2))
+        return
+    purged = asyncio.run(purge_expired(args.retention_days, args.batch_size, args.pause))
+    print(json.dumps({"cutoff": cutoff.isoformat(), "purged": purged}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+from typing import Optional
+
+from sqlalchemy import column, func, literal_column, or_, select, table
+
+from app.core.config import settings
+from app.models.book import Book
+
+# FTS5 shadow table created by the model/migration on SQLite
+book_fts = table("book_fts", column("rowid"), column("rank"))
+
+# The trigram tokenizer cannot match anything shorter than three characters
+FTS_MIN_LENGTH = 3
+
+def search_backend(dialect: str) -> str:
+    """Which search strategy to use for a dialect: "trigram", "fts5" or "like"."""
+    if settings.SEARCH_BACKEND != "auto":
+        return settings.SEARCH_BACKEND
+    return {"postgresql": "trigram", "sqlite": "fts5"}.get(dialect, "like")
+
+def _like_pattern(q: str) -> str:
+    escaped = q.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _fts_phrase(q: str) -> str:
+    return '"' + q.replace('"', '""') + '"'
+
+def apply_search(query, q: Optional[str], dialect: str, rank: bool = False):
+    """
+    Filter a book query (ORM ``Query`` or ``select``) to rows whose title or author contains ``q``.
+
+    On Postgres this is a case-insensitive ``LIKE`` served by the ``*_trgm`` GIN indexes,
+    on SQLite an FTS5 trigram ``MATCH``. With ``rank=True`` the best matches are ordered
+    first; callers add their usual ordering afterwards as the tie-breaker.
+    """
+    if not q:
+        return query
+
+    backend = search_backend(dialect)
+    if backend == "fts5" and len(q) >= FTS_MIN_LENGTH:
+        match = literal_column("book_fts").op("MATCH")(_fts_phrase(q))
+        query = query.filter(Book.id.in_(select(book_fts.c.rowid).where(match)))
+        if rank:
+            score = (
+                select(book_fts.c.rank)
+                .where(book_fts.c.rowid == Book.id, match)
+                .scalar_subquery()
+            )
+            query = query.order_by(score.asc())
+        return query
+
+    pattern = _like_pattern(q)
+    title, author = func.lower(Book.title), func.lower(Book.author)
+    query = query.filter(or_(title.like(pattern, escape="\\"), author.like(pattern, escape="\\")))
+    if rank and backend == "trigram":
+        needle = q.lower()
+        score = func.greatest(func.word_similarity(needle, title), func.word_similarity(needle, author))
+        query = query.order_by(score.desc())
+    return query
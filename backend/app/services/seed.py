@@ -1,7 +1,5 @@
 from __future__ import annotations
-from sqlalchemy import select, func
-from app.db.session import SessionLocal
-from app.models.book import Book
+from app.services.importer import import_rows
 
 DEMO_BOOKS = [
     {"title": "Clean Code", "author": "Robert C. Martin", "created_by": "system"},
@@ -67,24 +65,8 @@ DEMO_BOOKS = [
 ]
 
 def run() -> None:
-    with SessionLocal() as db:
-        existing_pairs = {
-            (t, a)
-            for (t, a) in db.execute(
-                select(func.lower(Book.title), func.lower(Book.author))
-            ).all()
-        }
-
-        new_rows = []
-        for row in DEMO_BOOKS:
-            key = (row["title"].lower(), row["author"].lower())
-            if key in existing_pairs:
-                continue
-            new_rows.append(Book(**row))
-
-        if new_rows:
-            db.add_all(new_rows)
-            db.commit()
+    # dedup="all": a demo book the user moved to the trash must not come back on the next start
+    import_rows(enumerate(DEMO_BOOKS, start=1), dedup="all")
 
 if __name__ == "__main__":
     run()
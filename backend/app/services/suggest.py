@@ -0,0 +1,381 @@
+"""
+Type-ahead suggestions from an in-memory prefix index over live titles and authors.
+
+Every distinct title and author is normalized (accents stripped, case folded,
+punctuation collapsed to single spaces) and stored once; the index itself is
+a sorted array of packed (value, word offset) integers, one per word start,
+so "gard" finds "The Silent Garden" and "schm" finds "Anna Schmidt". A lookup
+is a bisect plus a short scan: no database round trip, well under a
+millisecond.
+
+Each worker builds its own copy at startup and then follows the change feed
+(``book.change_seq`` and tombstones), so writes from other workers, the
+importer and the purge all reach it; the write routes in this worker poke it
+to catch up right after their commit. Values added since the last build go
+to a small sorted side list; once that grows past SUGGEST_REBUILD_PENDING or
+too many values are no longer used by any live book, the index is rebuilt
+from the database in the background and swapped in.
+"""
+from __future__ import annotations
+import asyncio
+import bisect
+import re
+import sys
+import time
+import unicodedata
+from array import array
+from heapq import merge
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import func, select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import SUGGEST_INDEX_BUILD_SECONDS, SUGGEST_INDEX_BYTES, SUGGEST_INDEX_ENTRIES
+from app.db.session import engine
+from app.models.book import Book, BookTombstone
+
+TITLE, AUTHOR = 0, 1
+KINDS = ("title", "author")
+
+# Word starts indexed per value; offsets are packed into the low byte of an entry
+MAX_WORDS = 8
+MAX_OFFSET = 255
+# Candidates looked at per lookup before ranking, at least this many
+MIN_SCAN = 200
+# Rebuild once this share of the values is no longer used by any live book
+MAX_DEAD_RATIO = 0.25
+CHANGES_BATCH = 5000
+LOAD_BATCH = 10_000
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Search form of a title, author or typed prefix: no accents, case folded, words separated by one space."""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+def _word_starts(norm: str) -> List[int]:
+    starts, offset = [], 0
+    for word in norm.split(" ", MAX_WORDS - 1)[:MAX_WORDS]:
+        if offset > MAX_OFFSET:
+            break
+        starts.append(offset)
+        offset += len(word) + 1
+    return starts
+
+
+class PrefixIndex:
+    """
+    One immutable sorted array plus a small mutable side list; see the module docstring.
+
+    Not thread-safe: after ``load`` it is only touched from the event loop.
+    """
+
+    def __init__(self) -> None:
+        self.texts: List[str] = []       # display form, as first seen
+        self.norms: List[str] = []
+        self.kinds = bytearray()
+        self.counts = array("l")         # live books carrying the value
+        self.entries = array("Q")        # value << 8 | offset, sorted by norms[value][offset:]
+        self.pending: List[Tuple[str, int]] = []  # (suffix, entry) for values added since the build
+        # book id -> value of its title / author, -1 when the book is not live
+        self.book_title = array("l")
+        self.book_author = array("l")
+        self.seq = 0
+        self.books = 0
+        self.dead = 0
+        self.build_seconds = 0.0
+        self.base_bytes = 0
+        self.pending_bytes = 0
+
+    # -- building -------------------------------------------------------------
+
+    @classmethod
+    def load(cls) -> "PrefixIndex":
+        """Read every live book and build the index (blocking; run it in a thread)."""
+        t0 = time.perf_counter()
+        index = cls()
+        slots: Dict[Tuple[int, str], int] = {}
+        with engine.connect() as conn:
+            # Everything committed up to here is in the snapshot below or replayed from the feed later
+            index.seq = _head_seq(conn)
+            rows = conn.execution_options(yield_per=LOAD_BATCH).execute(
+                select(Book.id, Book.title, Book.author).where(Book.deleted_at.is_(None))
+            )
+            for book_id, title, author in rows:
+                index._assign(book_id, index._intern(slots, TITLE, title), index._intern(slots, AUTHOR, author))
+        del slots
+
+        # Sorted one two-letter head at a time, so only that bucket's suffix strings exist at once
+        buckets: Dict[str, array] = {}
+        for value, norm in enumerate(index.norms):
+            for offset in _word_starts(norm):
+                head = norm[offset:offset + 2]
+                bucket = buckets.get(head)
+                if bucket is None:
+                    bucket = buckets[head] = array("Q")
+                bucket.append(value << 8 | offset)
+        for head in sorted(buckets):
+            index.entries.extend(sorted(buckets.pop(head), key=index._key))
+        index.base_bytes = index._measure()
+        index.build_seconds = time.perf_counter() - t0
+        return index
+
+    def _intern(self, slots: Dict[Tuple[int, str], int], kind: int, text: str) -> int:
+        norm = normalize(text)
+        value = slots.get((kind, norm))
+        if value is None:
+            value = slots[(kind, norm)] = self._new_value(kind, text, norm)
+        self.counts[value] += 1
+        return value
+
+    def _new_value(self, kind: int, text: str, norm: str) -> int:
+        self.texts.append(text)
+        self.norms.append(norm)
+        self.kinds.append(kind)
+        self.counts.append(0)
+        return len(self.texts) - 1
+
+    def _assign(self, book_id: int, title: int, author: int) -> None:
+        if book_id >= len(self.book_title):
+            grow = book_id + 1 - len(self.book_title) + len(self.book_title) // 4
+            self.book_title.extend([-1] * grow)
+            self.book_author.extend([-1] * grow)
+        self.book_title[book_id] = title
+        self.book_author[book_id] = author
+        self.books += 1
+
+    def _measure(self) -> int:
+        strings = sum(sys.getsizeof(s) for s in self.texts) + sum(sys.getsizeof(s) for s in self.norms)
+        containers = sum(
+            sys.getsizeof(c)
+            for c in (self.texts, self.norms, self.kinds, self.counts, self.entries, self.book_title, self.book_author)
+        )
+        return strings + containers
+
+    # -- following changes ----------------------------------------------------
+
+    def _key(self, entry: int) -> str:
+        return self.norms[entry >> 8][entry & 0xFF:]
+
+    def _find(self, kind: int, norm: str) -> Optional[int]:
+        """The value with exactly this normalized text, from the array or the side list."""
+        i = bisect.bisect_left(self.entries, norm, key=self._key)
+        while i < len(self.entries) and self._key(self.entries[i]) == norm:
+            entry = self.entries[i]
+            if entry & 0xFF == 0 and self.kinds[entry >> 8] == kind:
+                return entry >> 8
+            i += 1
+        i = bisect.bisect_left(self.pending, (norm,))
+        while i < len(self.pending) and self.pending[i][0] == norm:
+            entry = self.pending[i][1]
+            if entry & 0xFF == 0 and self.kinds[entry >> 8] == kind:
+                return entry >> 8
+            i += 1
+        return None
+
+    def _acquire(self, kind: int, text: str) -> int:
+        norm = normalize(text)
+        value = self._find(kind, norm)
+        if value is None:
+            value = self._new_value(kind, text, norm)
+            for offset in _word_starts(norm):
+                bisect.insort(self.pending, (norm[offset:], value << 8 | offset))
+            self.pending_bytes += sys.getsizeof(text) + sys.getsizeof(norm) + 100 * len(_word_starts(norm))
+        elif self.counts[value] == 0:
+            self.dead -= 1
+        self.counts[value] += 1
+        return value
+
+    def _release(self, value: int) -> None:
+        self.counts[value] -= 1
+        if self.counts[value] == 0:
+            self.dead += 1
+
+    def remove(self, book_id: int) -> None:
+        if book_id < len(self.book_title) and self.book_title[book_id] >= 0:
+            self._release(self.book_title[book_id])
+            self._release(self.book_author[book_id])
+            self.book_title[book_id] = self.book_author[book_id] = -1
+            self.books -= 1
+
+    def upsert(self, book_id: int, title: str, author: str) -> None:
+        # Acquire before releasing so an unchanged value is never counted as dead in between
+        values = self._acquire(TITLE, title), self._acquire(AUTHOR, author)
+        self.remove(book_id)
+        self._assign(book_id, *values)
+
+    def needs_rebuild(self) -> bool:
+        return (
+            len(self.pending) > settings.SUGGEST_REBUILD_PENDING
+            or self.dead > MAX_DEAD_RATIO * max(len(self.texts), 1_000)
+        )
+
+    # -- lookups --------------------------------------------------------------
+
+    def _matches(self, prefix: str) -> Iterable[int]:
+        start = bisect.bisect_left(self.entries, prefix, key=self._key)
+        for i in range(start, len(self.entries)):
+            entry = self.entries[i]
+            if not self.norms[entry >> 8].startswith(prefix, entry & 0xFF):
+                break
+            yield entry
+        for i in range(bisect.bisect_left(self.pending, (prefix,)), len(self.pending)):
+            suffix, entry = self.pending[i]
+            if not suffix.startswith(prefix):
+                break
+            yield entry
+
+    def search(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Up to ``limit`` titles and authors with a word starting with ``prefix``.
+
+        Values whose first word matches come first, then the ones used by the most
+        live books, then the shortest. Only the first max(20 x limit, 200) index
+        entries in prefix order are ranked, so a one-letter prefix stays as cheap
+        as a long one.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        budget = max(20 * limit, MIN_SCAN)
+        best: Dict[int, int] = {}
+        for entry in self._matches(prefix):
+            value, offset = entry >> 8, entry & 0xFF
+            if self.counts[value] and offset < best.get(value, MAX_OFFSET + 1):
+                best[value] = offset
+            budget -= 1
+            if not budget:
+                break
+        ranked = sorted(best, key=lambda v: (best[v] > 0, -self.counts[v], len(self.norms[v]), self.norms[v]))
+        return [
+            {"text": self.texts[v], "kind": KINDS[self.kinds[v]], "count": self.counts[v]}
+            for v in ranked[:limit]
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "seq": self.seq,
+            "values": len(self.texts) - self.dead,
+            "dead_values": self.dead,
+            "entries": len(self.entries),
+            "pending_entries": len(self.pending),
+            "books": self.books,
+            "build_seconds": round(self.build_seconds, 3),
+            "bytes": self.base_bytes + self.pending_bytes,
+        }
+
+
+def _head_seq(conn) -> int:
+    latest = conn.scalar(select(func.max(Book.change_seq)))
+    deleted = conn.scalar(select(func.max(BookTombstone.change_seq)))
+    return max(latest or 0, deleted or 0)
+
+
+def _read_changes(since: int) -> Tuple[List[Tuple[int, int, Optional[str], Optional[str]]], int, bool]:
+    """
+    Changes after ``since`` as (seq, book id, title, author) in feed order, title None
+    for anything that leaves the live set; plus the position reached and whether more remain.
+    """
+    with engine.connect() as conn:
+        upserts = conn.execute(
+            select(Book.change_seq, Book.id, Book.title, Book.author, Book.deleted_at)
+            .where(Book.change_seq > since)
+            .order_by(Book.change_seq)
+            .limit(CHANGES_BATCH)
+        ).all()
+        tombstones = conn.execute(
+            select(BookTombstone.change_seq, BookTombstone.book_id)
+            .where(BookTombstone.change_seq > since)
+            .order_by(BookTombstone.change_seq)
+            .limit(CHANGES_BATCH)
+        ).all()
+
+    # A full batch may stop short of the other list: only go as far as both are complete
+    cutoff = min(
+        (rows[-1][0] for rows in (upserts, tombstones) if len(rows) == CHANGES_BATCH),
+        default=None,
+    )
+    changes = []
+    for row in merge(
+        ((seq, book_id, None if deleted_at else title, author) for seq, book_id, title, author, deleted_at in upserts),
+        ((seq, book_id, None, None) for seq, book_id in tombstones),
+    ):
+        if cutoff is not None and row[0] > cutoff:
+            break
+        changes.append(row)
+    reached = changes[-1][0] if changes else since
+    return changes, reached, cutoff is not None
+
+
+class SuggestIndex:
+    """This worker's PrefixIndex and the lifespan task that builds it and keeps it current."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.index: Optional[PrefixIndex] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None
+
+    def search(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        return self.index.search(prefix, limit) if self.index is not None else []
+
+    def poke(self) -> None:
+        """Catch up with the change feed now rather than at the next interval (call after a commit)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ready": self.ready, **(self.index.stats() if self.index is not None else {})}
+
+    async def _build(self) -> PrefixIndex:
+        index = await run_in_threadpool(PrefixIndex.load)
+        await self._catch_up(index)
+        stats = index.stats()
+        SUGGEST_INDEX_BUILD_SECONDS.set(value=stats["build_seconds"])
+        SUGGEST_INDEX_BYTES.set(value=stats["bytes"])
+        SUGGEST_INDEX_ENTRIES.set(value=stats["entries"])
+        logger.info(
+            "suggest index built in {:.2f}s: {} values, {} entries, {:.1f} MiB",
+            stats["build_seconds"], stats["values"], stats["entries"], stats["bytes"] / 2**20,
+        )
+        return index
+
+    async def _catch_up(self, index: PrefixIndex) -> None:
+        more = True
+        while more:
+            changes, index.seq, more = await run_in_threadpool(_read_changes, index.seq)
+            for _, book_id, title, author in changes:
+                if title is None:
+                    index.remove(book_id)
+                else:
+                    index.upsert(book_id, title, author)
+
+    async def run(self) -> None:
+        """Lifespan task: build, then follow the change feed until cancelled; rebuild when fragmented."""
+        self._wake = asyncio.Event()
+        while True:
+            try:
+                if self.index is None or self.index.needs_rebuild():
+                    self.index = await self._build()
+                else:
+                    await self._catch_up(self.index)
+            except Exception:
+                logger.exception("suggest index refresh failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+
+suggest_index = SuggestIndex(settings.SUGGEST_REFRESH_INTERVAL)
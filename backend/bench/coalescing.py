@@ -0,0 +1,116 @@
+"""
+Concurrency check for single-flight reads: identical concurrent requests must share one query.
+
+Fires --clients identical requests at once, for each of a few read endpoints,
+--rounds times, against the app in-process (httpx over ASGI), first with
+COALESCE_READS off and then on, with the read cache off so nothing is
+answered from it. Counts the SQL statements the book queries issue (the
+per-request catalog version read is counted apart) and checks that every
+response in a wave has the same body. Exits non-zero if coalescing did not
+cut the book queries or a wave disagreed.
+
+    DATABASE_URL=sqlite:////tmp/books.db python -m bench.coalescing --clients 50
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, List
+
+# The point is queries shared while in flight, not answers kept afterwards; and every
+# wave must be served in full, not partly shed by admission control
+os.environ["CACHE_BACKEND"] = "off"
+os.environ["ADMISSION_ENABLED"] = "false"
+
+import httpx
+from sqlalchemy import event
+
+from app.core.cache import read_cache
+from app.db.session import async_engine, engine
+from app.main import app
+from app.models.catalog import CatalogVersion
+
+PATHS = [
+    "/api/books?limit=25",
+    "/api/books/count",
+    "/api/books/page?limit=25",
+    "/api/books/page?limit=25&q=garden",
+    "/api/books/trash/page?limit=25",
+]
+
+
+class StatementCounter:
+    VERSION_READ = f"SELECT {CatalogVersion.__tablename__}.version"
+
+    def __init__(self) -> None:
+        self.version = 0
+        self.books = 0
+        for target in (engine, async_engine.sync_engine if async_engine is not None else None):
+            if target is not None:
+                event.listen(target, "before_cursor_execute", self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.startswith(self.VERSION_READ):
+            self.version += 1
+        elif statement.lstrip().upper().startswith("SELECT"):
+            self.books += 1
+
+
+async def _wave(client: httpx.AsyncClient, path: str, clients: int) -> bool:
+    responses = await asyncio.gather(*(client.get(path) for _ in range(clients)))
+    bodies = {r.content for r in responses}
+    return all(r.status_code == 200 for r in responses) and len(bodies) == 1
+
+
+async def _run(coalesce: bool, clients: int, rounds: int, counter: StatementCounter) -> Dict[str, float]:
+    read_cache.coalesce = coalesce
+    counter.version = counter.books = 0
+    flights, coalesced = read_cache.flights, read_cache.coalesced
+    consistent = True
+    t0 = time.perf_counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(rounds):
+            for path in PATHS:
+                consistent &= await _wave(client, path, clients)
+    return {
+        "requests": rounds * len(PATHS) * clients,
+        "book_queries": counter.books,
+        "version_reads": counter.version,
+        "flights": read_cache.flights - flights,
+        "coalesced": read_cache.coalesced - coalesced,
+        "seconds": time.perf_counter() - t0,
+        "consistent": consistent,
+    }
+
+
+async def run(clients: int, rounds: int) -> int:
+    counter = StatementCounter()
+    results: List[Dict[str, float]] = []
+    print(f"{len(PATHS)} endpoints x {rounds} rounds x {clients} concurrent identical requests")
+    print(f"{'coalesce':>8} {'requests':>9} {'book SQL':>9} {'version':>8} {'flights':>8} {'joined':>7} {'s':>7} {'same body':>10}")
+    # One event loop for both runs: the DB_ASYNC pool is bound to the loop that opened it
+    for coalesce in (False, True):
+        r = await _run(coalesce, clients, rounds, counter)
+        results.append(r)
+        print(
+            f"{'on' if coalesce else 'off':>8} {r['requests']:>9} {r['book_queries']:>9} {r['version_reads']:>8} "
+            f"{r['flights']:>8} {r['coalesced']:>7} {r['seconds']:>7.2f} {str(r['consistent']):>10}"
+        )
+
+    off, on = results
+    ok = on["book_queries"] < off["book_queries"] and off["consistent"] and on["consistent"]
+    if off["book_queries"]:
+        print(f"book queries: {off['book_queries']} -> {on['book_queries']} "
+              f"({100 * (1 - on['book_queries'] / off['book_queries']):.0f}% fewer)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.clients, args.rounds)))
@@ -0,0 +1,344 @@
+"""
+Latency and throughput of every /api/books* endpoint, written as JSON for comparison across commits.
+
+Drives the app in-process (httpx over ASGI, no network) or a running server
+(--base-url), with a fixed number of requests per scenario spread over
+--concurrency clients, and records p50/p95/p99, requests/s and rows/s.
+Request parameters (ids, search terms, cursors, date windows) are sampled
+from the catalog with a fixed seed, so runs over the same data are
+comparable. Pair with bench.generate_catalog for large catalogs; set
+CACHE_BACKEND=off to measure the database path rather than the read cache.
+
+    python -m bench.endpoints --out before.json
+    python -m bench.endpoints --base-url http://127.0.0.1:8000 --writes --out after.json
+    python -m bench.endpoints --compare before.json after.json
+
+--writes adds create/update/delete/restore, batch and import scenarios. They
+remove what they create, except imported rows (created_by "bench").
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from bench.generate_catalog import ADJECTIVES, LAST_NAMES, NOUNS
+
+Request = Tuple[str, str, Dict[str, Any]]
+
+BATCH_ITEMS = 50
+IMPORT_ROWS = 1000
+
+
+@dataclass
+class Context:
+    """Catalog samples and per-run state shared by the scenarios."""
+
+    run_id: str
+    rng: random.Random
+    live_ids: List[int] = field(default_factory=list)
+    trash_ids: List[int] = field(default_factory=list)
+    cursors: List[str] = field(default_factory=list)
+    terms: List[str] = field(default_factory=list)
+    export_from: str = ""
+    created: Dict[int, int] = field(default_factory=dict)
+    batches: Dict[int, List[int]] = field(default_factory=dict)
+
+    def term(self) -> str:
+        return self.rng.choice(self.terms)
+
+    def window(self) -> Dict[str, str]:
+        start = date.today() - timedelta(days=self.rng.randint(30, 3650))
+        return {"created_from": start.isoformat(), "created_to": (start + timedelta(days=365)).isoformat()}
+
+
+@dataclass
+class Scenario:
+    name: str
+    request: Callable[[Context, int], Request]
+    rows: Callable[[httpx.Response], int] = lambda res: 0
+    after: Optional[Callable[[Context, int, httpx.Response], None]] = None
+    # Requests per run as a fraction of --requests (heavy scenarios run fewer)
+    share: float = 1.0
+
+
+def _items(res: httpx.Response) -> int:
+    body = res.json()
+    return len(body["items"] if isinstance(body, dict) else body)
+
+def _lines(res: httpx.Response) -> int:
+    return res.text.count("\n")
+
+def _batch_rows(res: httpx.Response) -> int:
+    return res.json()["succeeded"]
+
+def _get(path: str, **params: Any) -> Request:
+    return "GET", path, {"params": params}
+
+def _record_created(ctx: Context, i: int, res: httpx.Response) -> None:
+    ctx.created[i] = res.json()["id"]
+
+def _record_batch(ctx: Context, i: int, res: httpx.Response) -> None:
+    ctx.batches[i] = [r["id"] for r in res.json()["results"] if r["id"] is not None]
+
+def _import_body(ctx: Context, i: int) -> Request:
+    body = "title,author,created_by\n" + "".join(
+        f"bench-{ctx.run_id} import {i}-{n},Bench Author,bench\n" for n in range(IMPORT_ROWS)
+    )
+    return "POST", "/api/books:import", {"params": {"format": "csv"}, "content": body.encode()}
+
+
+READS = [
+    Scenario("list", lambda c, i: _get("/api/books", limit=50), _items),
+    Scenario("list_offset", lambda c, i: _get("/api/books", limit=50, offset=c.rng.randint(0, 10_000)), _items),
+    Scenario("list_cursor", lambda c, i: _get("/api/books", limit=50, cursor=c.rng.choice(c.cursors)), _items),
+    Scenario("list_created_range", lambda c, i: _get("/api/books", limit=50, **c.window()), _items),
+    Scenario("search", lambda c, i: _get("/api/books", limit=50, q=c.term()), _items),
+    Scenario("search_ranked", lambda c, i: _get("/api/books", limit=50, q=c.term(), rank="true"), _items),
+    Scenario("search_short", lambda c, i: _get("/api/books", limit=50, q=c.term()[:2]), _items),
+    Scenario("count", lambda c, i: _get("/api/books/count")),
+    Scenario("count_search", lambda c, i: _get("/api/books/count", q=c.term())),
+    Scenario("page", lambda c, i: _get("/api/books/page", limit=50), _items),
+    Scenario("page_estimate", lambda c, i: _get("/api/books/page", limit=50, total="estimate"), _items),
+    Scenario("page_search", lambda c, i: _get("/api/books/page", limit=50, q=c.term()), _items),
+    Scenario("get", lambda c, i: _get(f"/api/books/{c.rng.choice(c.live_ids)}"), lambda res: 1),
+    Scenario("trash", lambda c, i: _get("/api/books/trash", limit=50), _items),
+    Scenario("trash_count", lambda c, i: _get("/api/books/trash/count")),
+    Scenario("trash_page", lambda c, i: _get("/api/books/trash/page", limit=50), _items),
+    Scenario("export", lambda c, i: _get("/api/books/export", created_from=c.export_from), _lines, share=0.02),
+]
+
+WRITES = [
+    Scenario(
+        "create",
+        lambda c, i: ("POST", "/api/books", {"json": {"title": f"bench-{c.run_id} {i}", "author": "Bench Author"}}),
+        lambda res: 1,
+        _record_created,
+    ),
+    Scenario(
+        "update",
+        lambda c, i: ("PATCH", f"/api/books/{c.created[i]}", {"json": {"author": "Bench Author II"}}),
+        lambda res: 1,
+    ),
+    Scenario("delete", lambda c, i: ("DELETE", f"/api/books/{c.created[i]}", {}), lambda res: 1),
+    Scenario("restore", lambda c, i: ("PUT", f"/api/books/{c.created[i]}/restore", {}), lambda res: 1),
+    Scenario(
+        "batch_create",
+        lambda c, i: ("POST", "/api/books:batch", {"json": {"items": [
+            {"title": f"bench-{c.run_id} batch {i}-{n}", "author": "Bench Author"} for n in range(BATCH_ITEMS)
+        ]}}),
+        _batch_rows,
+        _record_batch,
+        share=0.05,
+    ),
+    Scenario(
+        "batch_update",
+        lambda c, i: ("PATCH", "/api/books:batch", {"json": {"items": [
+            {"id": book_id, "author": "Bench Author II"} for book_id in c.batches[i]
+        ]}}),
+        _batch_rows,
+        share=0.05,
+    ),
+    Scenario(
+        "batch_delete",
+        lambda c, i: ("DELETE", "/api/books:batch", {"json": {"ids": c.batches[i]}}),
+        _batch_rows,
+        share=0.05,
+    ),
+    Scenario(
+        "batch_restore",
+        lambda c, i: ("PUT", "/api/books/trash:restore", {"json": {"ids": c.batches[i]}}),
+        _batch_rows,
+        share=0.05,
+    ),
+    Scenario("import", _import_body, lambda res: res.json()["inserted"], share=0.02),
+]
+
+
+def _quantiles(samples: List[float]) -> Dict[str, float]:
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": q[49], "p95": q[94], "p99": q[98]}
+
+
+async def _measure(client: httpx.AsyncClient, scenario: Scenario, ctx: Context, n: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    rows = errors = 0
+    indexes = iter(range(n))
+
+    async def worker() -> None:
+        nonlocal rows, errors
+        for i in indexes:
+            try:
+                method, path, kwargs = scenario.request(ctx, i)
+            except KeyError:
+                # The earlier step this one builds on (e.g. create before update) failed
+                errors += 1
+                continue
+            t0 = time.perf_counter()
+            res = await client.request(method, path, **kwargs)
+            elapsed = (time.perf_counter() - t0) * 1000
+            if res.status_code >= 400:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            rows += scenario.rows(res)
+            if scenario.after:
+                scenario.after(ctx, i, res)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+
+    out = {"requests": n, "errors": errors, **{k: round(v, 3) for k, v in _quantiles(latencies).items()}}
+    out["req_per_s"] = round(len(latencies) / wall, 1)
+    out["rows_per_s"] = round(rows / wall, 1) if rows else None
+    return out
+
+
+async def _prepare(client: httpx.AsyncClient, ctx: Context, export_days: int) -> Dict[str, int]:
+    """Sample ids and keyset cursors from the catalog; returns its live/trash sizes."""
+    live = (await client.get("/api/books/page", params={"limit": 500})).json()
+    trash = (await client.get("/api/books/trash/page", params={"limit": 500})).json()
+    ctx.live_ids = [b["id"] for b in live["items"]]
+    ctx.trash_ids = [b["id"] for b in trash["items"]]
+    if not ctx.live_ids:
+        raise SystemExit("the catalog is empty; load one with python -m bench.generate_catalog")
+
+    cursor = live["next_cursor"]
+    for _ in range(50):
+        if not cursor:
+            break
+        ctx.cursors.append(cursor)
+        res = await client.get("/api/books", params={"limit": 100, "cursor": cursor})
+        cursor = res.headers.get("X-Next-Cursor")
+    if not ctx.cursors:
+        ctx.cursors.append(live["next_cursor"] or "")
+
+    ctx.terms = [w.lower() for w in ADJECTIVES + NOUNS + LAST_NAMES]
+    ctx.export_from = (date.today() - timedelta(days=export_days)).isoformat()
+    return {"live_rows": live["total"], "trash_rows": trash["total"]}
+
+
+async def _cleanup(client: httpx.AsyncClient, ctx: Context) -> None:
+    """Remove the books the write scenarios created (soft delete, then hard delete)."""
+    ids = list(ctx.created.values()) + [i for batch in ctx.batches.values() for i in batch]
+    for lo in range(0, len(ids), BATCH_ITEMS):
+        await client.request("DELETE", "/api/books:batch", json={"ids": ids[lo:lo + BATCH_ITEMS]})
+    for book_id in ids:
+        await client.delete(f"/api/books/{book_id}/hard_delete")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _client(base_url: Optional[str]) -> httpx.AsyncClient:
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=120)
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+
+
+async def run(
+    base_url: Optional[str], requests: int, concurrency: int, writes: bool,
+    only: Optional[List[str]], export_days: int, seed: int,
+) -> dict:
+    ctx = Context(run_id=f"{int(time.time()):x}", rng=random.Random(seed))
+    meta: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "started_at": datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
+        "target": base_url or "in-process",
+        "requests": requests,
+        "concurrency": concurrency,
+    }
+    if not base_url:
+        from app.core.config import settings
+        from app.db.session import engine
+        meta.update(dialect=engine.dialect.name, db_async=settings.DB_ASYNC, cache_backend=settings.CACHE_BACKEND)
+
+    scenarios = READS + (WRITES if writes else [])
+    if only:
+        scenarios = [s for s in scenarios if s.name in only]
+
+    results: Dict[str, dict] = {}
+    async with _client(base_url) as client:
+        meta.update(await _prepare(client, ctx, export_days))
+        try:
+            for scenario in scenarios:
+                n = max(1, int(requests * scenario.share))
+                results[scenario.name] = await _measure(client, scenario, ctx, n, min(concurrency, n))
+                _print_row(scenario.name, results[scenario.name])
+        finally:
+            await _cleanup(client, ctx)
+    return {"meta": meta, "results": results}
+
+
+def _print_row(name: str, r: dict) -> None:
+    rows = f"{r['rows_per_s']:>12.1f}" if r["rows_per_s"] else f"{'-':>12}"
+    print(
+        f"{name:<20} {r['p50']:>9.2f} {r['p95']:>9.2f} {r['p99']:>9.2f} "
+        f"{r['req_per_s']:>9.1f} {rows} {r['errors']:>7}",
+        flush=True,
+    )
+
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    print(f"{'scenario':<20} {'p50 ms':>18} {'p99 ms':>18} {'req/s':>18}")
+    for name, r in new["results"].items():
+        base = old["results"].get(name)
+        if base is None:
+            continue
+        cells = []
+        for key in ("p50", "p99", "req_per_s"):
+            change = (r[key] - base[key]) / base[key] * 100 if base[key] else 0.0
+            cells.append(f"{r[key]:>9.2f} {change:>+7.1f}%")
+        print(f"{name:<20} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", help="benchmark a running server instead of the app in-process")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario (heavy ones run fewer)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--writes", action="store_true", help="include write scenarios")
+    parser.add_argument("--only", help="comma-separated scenario names")
+    parser.add_argument("--export-days", type=int, default=30, help="export window: books created in the last N days")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="print the change between two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        raise SystemExit
+
+    print(f"{'scenario':<20} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'rows/s':>12} {'errors':>7}")
+    report = asyncio.run(run(
+        args.base_url, args.requests, args.concurrency, args.writes,
+        args.only.split(",") if args.only else None, args.export_days, args.seed,
+    ))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.out}")
@@ -0,0 +1,85 @@
+"""
+Offset vs. keyset paging latency as the book table grows.
+
+Loads synthetic rows into the database given by --url (a scratch Postgres is
+recommended; the book table is emptied first) and times fetching one page
+near the end of the listing, once with ``OFFSET`` and once with the keyset
+predicate used by ``/api/books?cursor=``.
+
+    python -m bench.keyset_pagination --url postgresql+psycopg2://.../books_bench \\
+        --sizes 10000,100000,1000000,5000000
+"""
+from __future__ import annotations
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, delete, insert, select
+
+from app.api.pagination import encode_cursor, keyset_after
+from app.db.base import Base
+from app.models.book import Book
+
+BATCH = 10_000
+
+def _load(engine, target: int, have: int) -> None:
+    start = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as conn:
+        for lo in range(have, target, BATCH):
+            rows = [
+                {
+                    "title": f"Book {i}",
+                    "author": f"Author {i % 997}",
+                    "created_by": "bench",
+                    "created_at": start + timedelta(seconds=i),
+                }
+                for i in range(lo, min(lo + BATCH, target))
+            ]
+            conn.execute(insert(Book), rows)
+
+def _time(engine, stmt, repeat: int) -> float:
+    samples = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            conn.execute(stmt).all()
+            samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+def run(url: str, sizes: list[int], page_size: int, repeat: int) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(delete(Book))
+
+    ordered = select(Book).where(Book.deleted_at.is_(None)).order_by(Book.created_at.desc(), Book.id.desc())
+    print(f"{'rows':>10} {'offset':>10} {'offset ms':>10} {'keyset ms':>10}")
+    have = 0
+    for size in sizes:
+        _load(engine, size, have)
+        have = size
+
+        offset = max(0, size - page_size)
+        with engine.connect() as conn:
+            anchor = conn.execute(ordered.offset(offset - 1).limit(1)).one() if offset else None
+        cursor = encode_cursor("created", anchor.created_at, anchor.id) if anchor else None
+
+        offset_stmt = ordered.offset(offset).limit(page_size)
+        keyset_stmt = ordered.limit(page_size)
+        if cursor:
+            keyset_stmt = keyset_stmt.where(keyset_after(Book.created_at, Book.id, "created", cursor))
+
+        print(
+            f"{size:>10} {offset:>10} "
+            f"{_time(engine, offset_stmt, repeat):>10.2f} {_time(engine, keyset_stmt, repeat):>10.2f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", required=True, help="scratch database; its book table is emptied")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.url, [int(s) for s in args.sizes.split(",")], args.page_size, args.repeat)
@@ -0,0 +1,147 @@
+"""
+Tail latency under a traffic spike, with and without admission control.
+
+Starts one uvicorn process per mode against the same database, with the read
+cache and read coalescing off so every request reaches the database. Drives it
+with --concurrency clients for --duration seconds; each client gives up after
+--client-timeout seconds, as a browser or proxy would. A side task polls
+/health/ready meanwhile.
+
+For each mode it prints the answered requests/s, p50/p99/max latency of the
+200s as the clients saw them, the server's own p99 for the route (histogram
+bucket bound from /metrics, admission wait included; the clients' numbers also
+hold their own scheduling delay when they share cores with the server), how
+many were shed (503), how many failed otherwise (timeouts, 500s from pool
+timeouts), and the share of readiness polls that said "not ready".
+
+    DATABASE_URL=sqlite:////tmp/books.db python -m bench.load_shedding --concurrency 200
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from bench.load_sync_async import _percentile, _wait_ready
+
+
+def _serve(port: int, admission: bool) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        ADMISSION_ENABLED="true" if admission else "false",
+        CACHE_BACKEND="off",
+        COALESCE_READS="false",
+        SUGGEST_ENABLED="false",
+        LOG_LEVEL="warning",
+    )
+    return subprocess.Popen(
+        # Don't wait out a backlog of abandoned requests on shutdown
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+         "--timeout-graceful-shutdown", "2"],
+        env=env,
+    )
+
+
+async def _spike(base: str, path: str, concurrency: int, duration: float, client_timeout: float) -> Dict[str, float]:
+    latencies: List[float] = []
+    counts = {"shed": 0, "failed": 0, "ready_polls": 0, "unready_polls": 0}
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=client_timeout) as client:
+        async def worker(i: int) -> None:
+            n = 0
+            while time.perf_counter() < deadline:
+                n += 1
+                t0 = time.perf_counter()
+                try:
+                    # Distinct pages, so nothing upstream can answer two requests with one query
+                    res = await client.get(f"{path}&offset={(i * 7919 + n) % 500}")
+                except httpx.HTTPError:
+                    counts["failed"] += 1
+                    continue
+                if res.status_code == 200:
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                elif res.status_code == 503:
+                    counts["shed"] += 1
+                    # A well-behaved client backs off for a moment before its next try
+                    await asyncio.sleep(min(float(res.headers.get("retry-after", "1")), 1.0) / 10)
+                else:
+                    counts["failed"] += 1
+
+        async def poll_ready() -> None:
+            while time.perf_counter() < deadline:
+                try:
+                    res = await client.get("/health/ready")
+                    counts["ready_polls"] += 1
+                    counts["unready_polls"] += res.status_code == 503
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.25)
+
+        await asyncio.gather(poll_ready(), *(worker(i) for i in range(concurrency)))
+
+    return {
+        "rps": len(latencies) / duration,
+        "p50": _percentile(latencies, 50) if latencies else 0.0,
+        "p99": _percentile(latencies, 99) if latencies else 0.0,
+        "max": max(latencies, default=0.0),
+        **counts,
+    }
+
+
+def _server_p99(base: str, path: str) -> Optional[float]:
+    """Upper bound (ms) of the latency bucket holding the route's 99th percentile, from /metrics."""
+    route = path.split("?")[0]
+    pattern = re.compile(
+        rf'^http_request_duration_seconds_bucket{{method="GET",route="{re.escape(route)}",le="([^"]+)"}} (\S+)$'
+    )
+    try:
+        # /metrics runs in the threadpool too; without admission it waits behind the backlog
+        text = httpx.get(f"{base}/metrics", timeout=60).text
+    except httpx.HTTPError:
+        return None
+    buckets = [(float(m.group(1)), float(m.group(2))) for m in map(pattern.match, text.splitlines()) if m]
+    if not buckets or not buckets[-1][1]:
+        return None
+    total = buckets[-1][1]
+    return next(le for le, count in buckets if count >= 0.99 * total) * 1000
+
+
+def run(path: str, concurrency: int, duration: float, client_timeout: float, port: int) -> None:
+    print(f"GET {path}  concurrency={concurrency}  duration={duration}s  client timeout={client_timeout}s")
+    print(f"{'admission':>9} {'ok/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'server p99':>10} {'shed':>7} {'failed':>7} {'unready':>8}")
+    for admission in (False, True):
+        proc = _serve(port, admission)
+        try:
+            base = f"http://127.0.0.1:{port}"
+            _wait_ready(base)
+            asyncio.run(_spike(base, path, 4, 2, client_timeout))  # warm-up
+            r = asyncio.run(_spike(base, path, concurrency, duration, client_timeout))
+            server_p99 = _server_p99(base, path)
+        finally:
+            proc.terminate()
+            proc.wait()
+        server = "-" if server_p99 is None else f"{server_p99:.0f}"
+        unready = f"{100 * r['unready_polls'] / r['ready_polls']:.0f}%" if r["ready_polls"] else "-"
+        print(
+            f"{'on' if admission else 'off':>9} {r['rps']:>8.1f} {r['p50']:>9.1f} {r['p99']:>9.1f} {r['max']:>9.1f} "
+            f"{server:>10} {r['shed']:>7} {r['failed']:>7} {unready:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--path", default="/api/books?limit=25&q=the")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--client-timeout", type=float, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    run(args.path, args.concurrency, args.duration, args.client_timeout, args.port)
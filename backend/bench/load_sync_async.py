@@ -0,0 +1,101 @@
+"""
+Throughput and tail latency of the sync (threadpool) vs. async (DB_ASYNC) request path.
+
+Starts one uvicorn process per mode against the same database, drives it with a
+fixed number of concurrent clients for a fixed duration and prints requests/s
+and latency percentiles for each mode.
+
+    DATABASE_URL=postgresql+psycopg2://.../books \\
+        python -m bench.load_sync_async --concurrency 256 --duration 20
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def _drive(base: str, path: str, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        async def worker() -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    res = await client.get(path)
+                    ok = res.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return {
+        "rps": len(latencies) / duration,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p99": _percentile(latencies, 99) if latencies else 0.0,
+        "errors": errors,
+    }
+
+def _serve(port: int, async_mode: bool, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, DB_ASYNC="true" if async_mode else "false", LOG_LEVEL="warning")
+    # Raw capacity of each path: nothing shed unless asked for (see bench.load_shedding)
+    env.setdefault("ADMISSION_ENABLED", "false")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+
+def _wait_ready(base: str, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base}/health").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base} did not become ready")
+
+def run(path: str, concurrency: int, duration: float, workers: int, port: int) -> None:
+    print(f"GET {path}  concurrency={concurrency}  duration={duration}s  workers={workers}")
+    print(f"{'mode':>6} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'errors':>8}")
+    for async_mode in (False, True):
+        proc = _serve(port, async_mode, workers)
+        try:
+            base = f"http://127.0.0.1:{port}"
+            _wait_ready(base)
+            asyncio.run(_drive(base, path, min(concurrency, 8), 2))  # warm-up
+            stats = asyncio.run(_drive(base, path, concurrency, duration))
+        finally:
+            proc.terminate()
+            proc.wait()
+        mode = "async" if async_mode else "sync"
+        print(f"{mode:>6} {stats['rps']:>10.1f} {stats['p50']:>10.2f} {stats['p99']:>10.2f} {stats['errors']:>8}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--path", default="/api/books/page?limit=25")
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    run(args.path, args.concurrency, args.duration, args.workers, args.port)
@@ -0,0 +1,168 @@
+"""
+Plan regression check: no listing query may fall back to a full table scan plus a sort.
+
+Builds the statement for every filter combination /api/books and
+/api/books/trash can generate (search term, date window, include_deleted,
+cursor, rank), runs EXPLAIN for each against the database given by --url
+and exits non-zero if any plan both scans the whole book table and sorts
+the result. Listings without a search term must not sort at all: their
+order has to come straight from an index (sorting every live row found
+through some other index is the same problem in disguise). Search plans
+may sort their matches once the search index has narrowed them down.
+
+Plans on a small table are meaningless (a seq scan is the right choice
+there), so the table must hold at least --min-rows books; load one with
+bench.generate_catalog first. The ``total=exact`` page variant adds a
+window count that reads every matching row by design and is not checked.
+tests/test_query_plans.py runs the same checks on a seeded SQLite catalog.
+
+    python -m bench.generate_catalog --url postgresql+psycopg2://.../books_bench --rows 1000000
+    python -m bench.query_plans --url postgresql+psycopg2://.../books_bench -v
+"""
+from __future__ import annotations
+import argparse
+import re
+import sys
+from datetime import date, timedelta
+from itertools import product
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.api.books import _live_books, _page_stmt, _trash_books
+from app.api.pagination import encode_cursor
+from app.core.config import settings
+from app.models.book import Book
+from app.services.counting import explain_json
+from app.services.search import FTS_MIN_LENGTH
+from bench.generate_catalog import LAST_NAMES, NOUNS
+
+PAGE_SIZE = 100
+CURSOR_DEPTH = 1000
+
+# SQLite EXPLAIN QUERY PLAN details
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN book\b(?! USING)")
+_SQLITE_SORT = re.compile(r"USE TEMP B-TREE FOR .*ORDER BY")
+
+
+def _pg_plan(conn: Connection, stmt: Select) -> Tuple[List[str], bool, bool]:
+    lines, seq_scan, sort = [], False, False
+    stack = [(explain_json(conn, stmt), 0)]
+    while stack:
+        node, depth = stack.pop()
+        kind = node["Node Type"]
+        target = node.get("Index Name") or node.get("Relation Name") or ""
+        lines.append(f"{'  ' * depth}{kind} {target}".rstrip())
+        seq_scan |= kind.endswith("Seq Scan") and node.get("Relation Name") == Book.__tablename__
+        sort |= kind == "Sort"
+        stack.extend((child, depth + 1) for child in reversed(node.get("Plans", [])))
+    return lines, seq_scan, sort
+
+
+def _sqlite_plan(conn: Connection, stmt: Select) -> Tuple[List[str], bool, bool]:
+    # Named paramstyle so the compiled parameters can be passed as a dict
+    compiled = stmt.compile(dialect=sqlite.dialect(paramstyle="named"))
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", compiled.params).all()
+    lines = [row[3] for row in rows]
+    seq_scan = any(_SQLITE_FULL_SCAN.match(line) for line in lines)
+    sort = any(_SQLITE_SORT.search(line) for line in lines)
+    return lines, seq_scan, sort
+
+
+def _indexed(q: Optional[str]) -> bool:
+    """Whether the search index can narrow the rows down for this term."""
+    return q is not None and len(q) >= FTS_MIN_LENGTH
+
+
+def _cursor(conn: Connection, listing: Select, kind: str, sort_col) -> Optional[str]:
+    """A cursor from CURSOR_DEPTH rows into the unfiltered listing, as a client paging along would send."""
+    row = conn.execute(
+        listing.with_only_columns(Book.id, sort_col)
+        .order_by(sort_col.desc(), Book.id.desc())
+        .offset(CURSOR_DEPTH)
+        .limit(1)
+    ).first()
+    return encode_cursor(kind, row[1], row[0]) if row else None
+
+
+def combinations(db: Session) -> Iterator[Tuple[str, Select, bool]]:
+    """
+    Every (name, statement, sort allowed) the listing routes can build, with
+    representative parameter values.
+    """
+    conn = db.connection()
+    today = date.today()
+    terms = {
+        "none": None,
+        "short": NOUNS[0][:2].lower(),  # below the trigram minimum: unindexed LIKE
+        "common": NOUNS[0],
+        "rare": LAST_NAMES[-1],
+    }
+    windows = {
+        "none": (None, None),
+        "recent": (today - timedelta(days=30), None),
+        "old": (today - timedelta(days=3650), today - timedelta(days=3285)),
+    }
+
+    live_cursor = _cursor(conn, _live_books(db, None, None, None, False), "created", Book.created_at)
+    all_cursor = _cursor(conn, _live_books(db, None, None, None, True), "created", Book.created_at)
+    trash_cursor = _cursor(conn, _trash_books(db, None, None, None), "deleted", Book.deleted_at)
+
+    for (term, q), (window, (start, end)), include_deleted, paged, rank in product(
+        terms.items(), windows.items(), (False, True), (False, True), (False, True)
+    ):
+        # Ranking needs a term and cannot be combined with a cursor (the route answers 400);
+        # ranking by similarity to an unindexable term has to score every row
+        if rank and (not _indexed(q) or paged):
+            continue
+        name = f"live q={term} created={window} include_deleted={include_deleted} cursor={paged} rank={rank}"
+        stmt = _live_books(db, q, start, end, include_deleted, rank=rank)
+        token = (all_cursor if include_deleted else live_cursor) if paged else None
+        yield name, _page_stmt(stmt, "created", Book.created_at, token, rank).limit(PAGE_SIZE), _indexed(q)
+
+    for (term, q), (window, (start, end)), paged, rank in product(
+        terms.items(), windows.items(), (False, True), (False, True)
+    ):
+        if rank and (not _indexed(q) or paged):
+            continue
+        name = f"trash q={term} deleted={window} cursor={paged} rank={rank}"
+        stmt = _trash_books(db, q, start, end, rank=rank)
+        token = trash_cursor if paged else None
+        yield name, _page_stmt(stmt, "deleted", Book.deleted_at, token, rank).limit(PAGE_SIZE), _indexed(q)
+
+
+def run(url: str, min_rows: int, verbose: bool) -> int:
+    engine = create_engine(url)
+    explain = _pg_plan if engine.dialect.name == "postgresql" else _sqlite_plan
+    failures = 0
+    with Session(engine) as db:
+        rows = db.scalar(select(func.count(Book.id)))
+        if rows < min_rows:
+            print(f"book holds {rows} rows, need at least {min_rows}; load a catalog with bench.generate_catalog")
+            return 2
+
+        checked = 0
+        for name, stmt, may_sort in combinations(db):
+            lines, seq_scan, sort = explain(db.connection(), stmt)
+            checked += 1
+            bad = sort and (seq_scan or not may_sort)
+            failures += bad
+            if bad or verbose:
+                print(f"{'FAIL' if bad else 'ok':4} {name}")
+                for line in lines:
+                    print(f"       {line}")
+        print(f"{checked} plans checked on {rows} rows, {failures} not served in index order")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default=settings.SYNC_DATABASE_URL)
+    parser.add_argument("--min-rows", type=int, default=100_000)
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan, not just failures")
+    args = parser.parse_args()
+    sys.exit(run(args.url, args.min_rows, args.verbose))
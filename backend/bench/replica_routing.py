@@ -0,0 +1,142 @@
+"""
+Read replica routing check against two local SQLite databases (a primary and a copy of it).
+
+Replication is simulated: the replica file is refreshed from the primary with
+SQLite's backup API only when the script says so, which makes lag easy to
+produce. Runs the app in-process with a short check interval, lag limit and
+read-your-writes window and walks through:
+
+1. reads go to the replica while it is in sync;
+2. after a write, the writing client reads its own write from the primary;
+3. another client keeps reading the (stale) replica while its lag is under REPLICA_MAX_LAG;
+4. once the lag is over the limit, every read falls back to the primary;
+5. after replication catches up, reads return to the replica;
+6. a replica that fails its health check is skipped.
+
+Prints one line per step and exits non-zero if any step fails.
+
+    python -m bench.replica_routing
+"""
+from __future__ import annotations
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+WORKDIR = Path(tempfile.mkdtemp(prefix="replica-routing-"))
+PRIMARY, REPLICA = WORKDIR / "primary.db", WORKDIR / "replica.db"
+CHECK_INTERVAL, MAX_LAG, STICKY = 0.1, 1.0, 1.0
+
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{PRIMARY}",
+    REPLICA_URLS=f"sqlite:///{REPLICA}",
+    REPLICA_CHECK_INTERVAL=str(CHECK_INTERVAL),
+    REPLICA_MAX_LAG=str(MAX_LAG),
+    REPLICA_STICKY_SECONDS=str(STICKY),
+    # Answers must come from the database each time, so the source is visible in the counts
+    CACHE_BACKEND="off",
+    SUGGEST_ENABLED="false",
+)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+
+from app.db.base import Base
+from app.db.replicas import replicas
+from app.main import app
+from app.models.book import Book
+
+BOOKS = 20
+
+
+def _create_primary() -> None:
+    engine = create_engine(f"sqlite:///{PRIMARY}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Book), [{"title": f"Book {i}", "author": "Seed", "created_by": "bench"} for i in range(BOOKS)])
+    engine.dispose()
+
+
+def _replicate() -> None:
+    src, dst = sqlite3.connect(PRIMARY), sqlite3.connect(REPLICA)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(CHECK_INTERVAL / 2)
+    return False
+
+
+def _count_and_target(client: TestClient) -> tuple:
+    before = dict(replicas.routed)
+    total = client.get("/api/books/count").json()["total"]
+    after = replicas.routed
+    target = next(key for key in after if after[key] != before.get(key, 0))
+    return total, target
+
+
+def run() -> int:
+    _create_primary()
+    _replicate()
+    failures = 0
+
+    def step(name: str, ok: bool, detail: str) -> None:
+        nonlocal failures
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':4} {name}: {detail}")
+
+    # Two clients with their own cookies; only one runs the lifespan (and so the replica check)
+    reader = TestClient(app)
+    with TestClient(app) as writer:
+        replica = replicas.replicas[0]
+        if not _wait_for(lambda: replica.usable(MAX_LAG)):
+            print(f"replica never became usable: {replicas.stats()}")
+            return 1
+
+        total, target = _count_and_target(reader)
+        step("in sync", target == "replica0:replica" and total == BOOKS, f"{total} books via {target}")
+
+        res = writer.post("/api/books", json={"title": "Fresh", "author": "Writer"})
+        step("write sets cookie", res.status_code == 201 and "books_primary_until" in writer.cookies, str(res.status_code))
+        total, target = _count_and_target(writer)
+        step("read your writes", target == "primary:sticky" and total == BOOKS + 1, f"{total} books via {target}")
+
+        _wait_for(lambda: replica.lag is not None and replica.lag > 0)
+        total, target = _count_and_target(reader)
+        step("lag under limit", target == "replica0:replica" and total == BOOKS,
+             f"{total} books via {target}, lag {replica.lag:.2f}s")
+
+        _wait_for(lambda: replica.lag is not None and replica.lag > MAX_LAG)
+        total, target = _count_and_target(reader)
+        step("lag over limit", target == "primary:fallback" and total == BOOKS + 1,
+             f"{total} books via {target}, lag {replica.lag:.2f}s")
+
+        _replicate()
+        _wait_for(lambda: replica.lag == 0)
+        time.sleep(STICKY)  # let the writer's window run out too
+        total, target = _count_and_target(writer)
+        step("caught up", target == "replica0:replica" and total == BOOKS + 1, f"{total} books via {target}")
+
+        with sqlite3.connect(REPLICA) as broken:
+            broken.execute("DROP TABLE catalog_version")
+        _wait_for(lambda: not replica.healthy)
+        total, target = _count_and_target(reader)
+        step("replica down", target == "primary:fallback" and total == BOOKS + 1,
+             f"{total} books via {target} ({replica.error})")
+
+    print(f"{failures} step(s) failed" if failures else "all steps passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
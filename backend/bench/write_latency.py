@@ -0,0 +1,146 @@
+"""
+Write latency: read-modify-write through the ORM vs. one conditional statement per write.
+
+Creates --books scratch books in the database given by --url. Each book then
+goes through update, soft delete, restore, soft delete and hard delete.
+
+Two paths are measured, one book (and one session) per operation, alternating
+book by book:
+
+* ``orm``: the previous route code. ``db.get``, change the object, bump the
+  catalog version, commit, and ``db.refresh`` the result for update and restore.
+* ``single``: what the routes run now. One ``UPDATE``/``DELETE ... RETURNING``
+  from ``app.services.book_writes``, bump, commit.
+
+Prints the round trips per operation (statements plus the commit) and the
+median and p95 latency. --rtt-ms adds a sleep to every round trip, so a
+local SQLite file shows what a network hop to Postgres would cost.
+
+    python -m bench.write_latency --url sqlite:////tmp/write_latency.db --books 300 --rtt-ms 1
+"""
+from __future__ import annotations
+import argparse
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.responses import BOOK_COLUMNS
+from app.db.base import Base
+from app.models.book import Book
+from app.services.book_writes import delete_book_row, update_book_row
+from app.services.catalog_version import BUMP_CATALOG_VERSION
+
+OPS = ["update", "delete", "restore", "delete again", "hard delete"]
+
+
+class RoundTrips:
+    """Counts statements and commits on an engine; optionally sleeps on each to model network latency."""
+
+    def __init__(self, engine, rtt_ms: float):
+        self.count = 0
+        self.rtt = rtt_ms / 1000
+        event.listen(engine, "before_cursor_execute", self._trip)
+        event.listen(engine, "commit", self._trip)
+
+    def _trip(self, *args, **kwargs) -> None:
+        self.count += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+
+def _orm(s: Session, op: str, book_id: int) -> None:
+    book = s.get(Book, book_id)
+    if op == "update":
+        book.title = f"{book.title} (edited)"
+    elif op == "restore":
+        book.deleted_at, book.deleted_by = None, None
+    elif op == "hard delete":
+        s.delete(book)
+    else:
+        book.deleted_at, book.deleted_by = datetime.now(tz=timezone.utc), "bench"
+    s.execute(BUMP_CATALOG_VERSION)
+    s.commit()
+    if op in ("update", "restore"):
+        s.refresh(book)
+
+
+def _single(s: Session, op: str, book_id: int) -> None:
+    if op == "update":
+        stmt = update_book_row(book_id, {"title": Book.title + " (edited)"}).returning(*BOOK_COLUMNS.values())
+    elif op == "restore":
+        stmt = update_book_row(book_id, {"deleted_at": None, "deleted_by": None}, trashed=True).returning(
+            *BOOK_COLUMNS.values()
+        )
+    elif op == "hard delete":
+        stmt = delete_book_row(book_id).returning(Book.id)
+    else:
+        stmt = update_book_row(
+            book_id, {"deleted_at": datetime.now(tz=timezone.utc), "deleted_by": "bench"}
+        ).returning(Book.id)
+    assert s.execute(stmt).first() is not None, f"{op} matched no row"
+    s.execute(BUMP_CATALOG_VERSION)
+    s.commit()
+
+
+def _create(engine, books: int, tag: str) -> List[int]:
+    with engine.begin() as conn:
+        rows = [{"title": f"write-latency {tag} {i}", "author": "Bench", "created_by": "bench"} for i in range(books)]
+        return list(conn.scalars(insert(Book).returning(Book.id), rows))
+
+
+def _time(factory, trips: RoundTrips, path: Callable, op: str, book_id: int, into: dict) -> None:
+    before = trips.count
+    with factory() as s:
+        t0 = time.perf_counter()
+        path(s, op, book_id)
+        into["ms"].append((time.perf_counter() - t0) * 1000)
+    into["trips"] += trips.count - before
+
+
+def _summary(result: dict, books: int) -> Dict[str, float]:
+    samples = sorted(result["ms"])
+    return {
+        "trips": result["trips"] / books,
+        "p50": statistics.median(samples),
+        "p95": samples[int(0.95 * (len(samples) - 1))],
+    }
+
+
+def run(url: str, books: int, rtt_ms: float) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    trips = RoundTrips(engine, rtt_ms)
+
+    stamp = f"{time.time():.0f}"
+    paths = {"orm": _orm, "single": _single}
+    ids = {name: _create(engine, books, f"{name} {stamp}") for name in paths}
+    results = {op: {name: {"ms": [], "trips": 0} for name in paths} for op in OPS}
+    for op in OPS:
+        # Alternate the paths book by book, so a database that slows down as it grows slows both alike
+        for pair in zip(*ids.values()):
+            for (name, path), book_id in zip(paths.items(), pair):
+                _time(factory, trips, path, op, book_id, results[op][name])
+
+    print(f"{books} books per operation, {rtt_ms:g} ms added per round trip ({engine.dialect.name})")
+    print(f"{'operation':<12} {'trips orm':>9} {'single':>7} {'p50 orm':>8} {'single':>7} {'p95 orm':>8} {'single':>7} {'p50 saved':>10}")
+    for op in OPS:
+        orm, single = (_summary(results[op][name], books) for name in paths)
+        print(
+            f"{op:<12} {orm['trips']:>9.1f} {single['trips']:>7.1f} {orm['p50']:>8.2f} {single['p50']:>7.2f} "
+            f"{orm['p95']:>8.2f} {single['p95']:>7.2f} {100 * (1 - single['p50'] / orm['p50']):>9.0f}%"
+        )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", required=True, help="scratch database to write to (not the app's own)")
+    parser.add_argument("--books", type=int, default=300)
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    run(args.url, args.books, args.rtt_ms)
@@ -0,0 +1,46 @@
+"""
+Test setup: the app runs against a throwaway SQLite file.
+
+Settings and engines are built at import time, so the environment is set here,
+before anything from ``app`` is imported. Every test starts from empty tables
+and an empty read cache. ``DB_ASYNC=true python -m pytest`` runs the same tests
+on the async path.
+"""
+import os
+import tempfile
+
+_DIR = tempfile.mkdtemp(prefix="books-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_DIR}/books.db",
+    REPLICA_URLS="",
+    ADMISSION_ENABLED="false",
+    SUGGEST_ENABLED="false",
+    PURGE_IN_APP="false",
+    SLOW_QUERY_MS="0",
+    LOG_LEVEL="warning",
+)
+os.environ.setdefault("DB_ASYNC", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.cache import MemoryStore, read_cache
+from app.core.config import settings
+from app.db.base import Base
+from app.db.session import engine
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    read_cache.store = MemoryStore(settings.CACHE_MAX_ENTRIES)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(database):
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,46 @@
+def _create(client, *books) -> list:
+    items = [{"title": title, "author": author} for title, author in books]
+    return client.post("/api/books:batch", json={"items": items}).json()["results"]
+
+
+def test_batch_create_dedups_in_the_table_and_the_batch(client):
+    client.post("/api/books", json={"title": "Dune", "author": "Herbert"})
+
+    results = _create(client, ("DUNE", "herbert"), ("Emma", "Austen"), ("emma", "AUSTEN"), ("Emma", "Austen"))
+    assert [r["status"] for r in results] == [409, 201, 409, 409]
+    assert results[1]["book"]["title"] == "Emma"
+
+
+def test_batch_create_folds_case_like_the_dedup_index(client):
+    # SQLite's lower() folds ASCII only: two books there, as two single creates would make
+    results = _create(client, ("Ärger", "Öde"), ("ärger", "öde"))
+    assert [r["status"] for r in results] == [201, 201]
+    assert len(client.get("/api/books").json()) == 2
+
+
+def test_batch_update_conflict_fails_only_that_item(client):
+    a, b, c = (r["id"] for r in _create(client, ("Dune", "Herbert"), ("Emma", "Austen"), ("Ulysses", "Joyce")))
+
+    res = client.patch("/api/books:batch", json={"items": [
+        {"id": a, "title": "Dune Messiah"},
+        {"id": b, "title": "ulysses", "author": "JOYCE"},
+        {"id": 99, "title": "Nothing"},
+        {"id": c, "author": "James Joyce"},
+    ]}).json()
+
+    assert [r["status"] for r in res["results"]] == [200, 409, 404, 200]
+    assert (res["succeeded"], res["failed"]) == (2, 2)
+    assert res["results"][0]["book"]["version"] == 2
+    assert client.get(f"/api/books/{b}").json()["title"] == "Emma"
+    assert client.get(f"/api/books/{b}").json()["version"] == 1
+    assert client.get(f"/api/books/{c}").json()["author"] == "James Joyce"
+
+
+def test_batch_update_without_changes_writes_nothing(client):
+    (book,) = _create(client, ("Dune", "Herbert"))
+    since = client.get("/api/books/changes", params={"since": 0}).json()["next_since"]
+
+    res = client.patch("/api/books:batch", json={"items": [{"id": book["id"]}]}).json()
+    assert res["results"][0]["status"] == 200
+    assert res["results"][0]["book"]["version"] == 1
+    assert client.get("/api/books/changes", params={"since": since}).json()["changes"] == []
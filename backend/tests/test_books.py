@@ -0,0 +1,68 @@
+def _create(client, title: str, author: str = "A") -> dict:
+    res = client.post("/api/books", json={"title": title, "author": author})
+    assert res.status_code == 201
+    return res.json()
+
+
+def test_get_book_etag_is_per_row(client):
+    a, b = _create(client, "First"), _create(client, "Second")
+    etag = client.get(f"/api/books/{a['id']}").headers["ETag"]
+    assert etag == f'"{a["version"]}"'
+
+    # A write to another book leaves this one's ETag valid
+    assert client.patch(f"/api/books/{b['id']}", json={"title": "Second (2nd ed.)"}).status_code == 200
+    assert client.get(f"/api/books/{a['id']}", headers={"If-None-Match": etag}).status_code == 304
+
+    # A write to this book does not
+    assert client.patch(f"/api/books/{a['id']}", json={"title": "First (2nd ed.)"}).status_code == 200
+    res = client.get(f"/api/books/{a['id']}", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] == f'"{a["version"] + 1}"'
+
+
+def test_get_missing_book_is_404(client):
+    assert client.get("/api/books/99").status_code == 404
+
+
+def test_etag_from_get_is_accepted_by_if_match(client):
+    book = _create(client, "Refactoring", "Fowler")
+    etag = client.get(f"/api/books/{book['id']}").headers["ETag"]
+
+    res = client.put(f"/api/books/{book['id']}", json={"title": "Refactoring (2nd ed.)"}, headers={"If-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] == f'"{book["version"] + 1}"'
+
+    # The old ETag no longer matches; the 412 carries the current one
+    res = client.put(f"/api/books/{book['id']}", json={"title": "Refactoring"}, headers={"If-Match": etag})
+    assert res.status_code == 412
+    assert res.headers["ETag"] == f'"{book["version"] + 1}"'
+
+
+def test_create_sends_etag(client):
+    res = client.post("/api/books", json={"title": "Dune", "author": "Herbert"})
+    assert res.headers["ETag"] == f'"{res.json()["version"]}"'
+
+
+def test_empty_patch_writes_nothing(client):
+    book = _create(client, "SICP", "Abelson")
+    since = client.get("/api/books/changes", params={"since": 0}).json()["next_since"]
+
+    res = client.patch(f"/api/books/{book['id']}", json={})
+    assert res.status_code == 200
+    assert res.json()["version"] == book["version"]
+    assert res.headers["ETag"] == f'"{book["version"]}"'
+    assert client.get("/api/books/changes", params={"since": since}).json()["changes"] == []
+
+    # If-Match still applies
+    res = client.patch(f"/api/books/{book['id']}", json={}, headers={"If-Match": '"99"'})
+    assert res.status_code == 412
+    assert client.patch("/api/books/99", json={}).status_code == 404
+
+
+def test_export_carries_version(client):
+    book = _create(client, "Dune", "Herbert")
+    client.patch(f"/api/books/{book['id']}", json={"author": "Frank Herbert"})
+
+    header, row = client.get("/api/books/export", params={"format": "csv"}).text.splitlines()
+    assert header.split(",")[-1] == "version"
+    assert row.split(",")[-1] == "2"
@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+
+from app.core.cache import MemoryStore, read_cache
+from app.core.config import settings
+
+
+@contextmanager
+def worker(store: MemoryStore):
+    """Serve the requests inside from ``store``, as a separate worker process with its own memory cache would."""
+    own = read_cache.store
+    read_cache.store = store
+    try:
+        yield
+    finally:
+        read_cache.store = own
+
+
+def test_write_in_one_worker_is_seen_by_another(client):
+    a, b = MemoryStore(settings.CACHE_MAX_ENTRIES), MemoryStore(settings.CACHE_MAX_ENTRIES)
+    with worker(a):
+        book = client.post("/api/books", json={"title": "Dune", "author": "Herbert"}).json()
+        assert [x["title"] for x in client.get("/api/books").json()] == ["Dune"]
+        assert client.get("/api/books/count").json() == {"total": 1}
+        assert client.get(f"/api/books/{book['id']}").json()["title"] == "Dune"
+
+    with worker(b):
+        client.patch(f"/api/books/{book['id']}", json={"title": "Dune Messiah"})
+        client.post("/api/books", json={"title": "Emma", "author": "Austen"})
+
+    with worker(a):
+        assert sorted(x["title"] for x in client.get("/api/books").json()) == ["Dune Messiah", "Emma"]
+        assert client.get("/api/books/count").json() == {"total": 2}
+        assert client.get(f"/api/books/{book['id']}").json()["title"] == "Dune Messiah"
+
+
+def test_etag_and_body_come_from_the_same_version(client):
+    a, b = MemoryStore(settings.CACHE_MAX_ENTRIES), MemoryStore(settings.CACHE_MAX_ENTRIES)
+    with worker(a):
+        book = client.post("/api/books", json={"title": "Dune", "author": "Herbert"}).json()
+        list_etag = client.get("/api/books").headers["ETag"]
+        book_etag = client.get(f"/api/books/{book['id']}").headers["ETag"]
+
+    with worker(b):
+        client.patch(f"/api/books/{book['id']}", json={"title": "Dune Messiah"})
+
+    with worker(a):
+        res = client.get("/api/books", headers={"If-None-Match": list_etag})
+        assert res.status_code == 200
+        assert res.headers["ETag"] != list_etag
+        assert [x["title"] for x in res.json()] == ["Dune Messiah"]
+        # The fresh ETag now names the fresh body
+        assert client.get("/api/books", headers={"If-None-Match": res.headers["ETag"]}).status_code == 304
+
+        res = client.get(f"/api/books/{book['id']}", headers={"If-None-Match": book_etag})
+        assert res.status_code == 200
+        assert res.json()["title"] == "Dune Messiah"
+        assert res.headers["ETag"] == f'"{res.json()["version"]}"'
@@ -0,0 +1,140 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+
+from app.api import changes
+from app.api.changes import ChangeWatcher
+from app.db.session import async_engine, get_session
+from app.main import app
+
+
+class Stream:
+    """One GET /api/books/changes/stream, driven over raw ASGI so events can be read while it stays open."""
+
+    def __init__(self, query: str = "", headers=()):
+        self.scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "server": ("test", 80),
+            "client": ("test", 1234),
+            "root_path": "",
+            "path": "/api/books/changes/stream",
+            "raw_path": b"/api/books/changes/stream",
+            "query_string": query.encode(),
+            "headers": [(k.encode(), v.encode()) for k, v in headers],
+        }
+        self.status = None
+        self._buffer = ""
+        self._chunks: asyncio.Queue = asyncio.Queue()
+        self._gone = asyncio.Event()
+        self._task = asyncio.create_task(app(self.scope, self._receive, self._send))
+
+    async def _receive(self):
+        await self._gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        elif message.get("body"):
+            await self._chunks.put(message["body"].decode())
+
+    async def event(self, timeout: float = 5) -> dict:
+        """The next event (keepalive comments skipped) as its fields, with ``data`` parsed."""
+        while "\n\n" not in self._buffer:
+            self._buffer += await asyncio.wait_for(self._chunks.get(), timeout)
+        raw, self._buffer = self._buffer.split("\n\n", 1)
+        fields = dict(line.split(": ", 1) for line in raw.splitlines() if not line.startswith(":"))
+        if not fields:
+            return await self.event(timeout)
+        fields["data"] = json.loads(fields["data"])
+        return fields
+
+    async def close(self) -> None:
+        self._gone.set()
+        await asyncio.wait_for(self._task, 5)
+
+
+@pytest.fixture
+def fast_watcher(monkeypatch):
+    monkeypatch.setattr(changes, "watcher", ChangeWatcher(asynccontextmanager(get_session), 0.02))
+
+
+def test_stream_delivers_writes_and_resumes(database, fast_watcher):
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            async def create(title):
+                res = await client.post("/api/books", json={"title": title, "author": "A"})
+                assert res.status_code == 201
+                return res.json()
+
+            async def seq_after(since):
+                return (await client.get("/api/books/changes", params={"since": since})).json()["changes"][-1]["seq"]
+
+            dune = await create("Dune")
+            stream = Stream("since=0")
+            try:
+                first = await stream.event()
+                assert stream.status == 200
+                assert first["event"] == "changes"
+                assert [c["book"]["title"] for c in first["data"]["changes"]] == ["Dune"]
+                assert int(first["id"]) == first["data"]["next_since"] == await seq_after(0)
+
+                # Nothing new: the stream waits on the watcher until a write lands
+                emma = await create("Emma")
+                second = await stream.event()
+                expected = await seq_after(int(first["id"]))
+                assert [(c["seq"], c["op"], c["id"]) for c in second["data"]["changes"]] == [
+                    (expected, "upsert", emma["id"])
+                ]
+                assert int(second["id"]) == expected
+
+                assert (await client.delete(f"/api/books/{dune['id']}")).status_code == 204
+                assert (await client.delete(f"/api/books/{dune['id']}/hard_delete")).status_code == 204
+                # The soft delete may come in an event of its own, before the tombstone
+                third = await stream.event()
+                if third["data"]["changes"][-1]["op"] != "delete":
+                    third = await stream.event()
+                assert [(c["op"], c["id"]) for c in third["data"]["changes"]][-1] == ("delete", dune["id"])
+            finally:
+                await stream.close()
+
+            # A reconnecting EventSource sends the last id it saw; it wins over since
+            resumed = Stream("since=0", headers=[("last-event-id", first["id"])])
+            try:
+                event = await resumed.event()
+                assert event["data"]["changes"][0]["seq"] == int(second["id"])
+                assert event["id"] == third["id"]
+            finally:
+                await resumed.close()
+
+        if async_engine is not None:
+            await async_engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_watcher_wakes_waiters_past_their_position(database, fast_watcher):
+    async def main():
+        watcher = changes.watcher
+        assert not await watcher.wait_past(0, 0.1)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            waiter = asyncio.create_task(watcher.wait_past(0, 5))
+            await asyncio.sleep(0.05)
+            assert not waiter.done()
+            await client.post("/api/books", json={"title": "Dune", "author": "A"})
+            assert await waiter
+        assert watcher.latest > 0
+        # Already past: no wait at all
+        assert await watcher.wait_past(0, 0)
+        await asyncio.sleep(0.05)
+        assert watcher._task.done()
+        if async_engine is not None:
+            await async_engine.dispose()
+
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import MemoryStore, ReadCache, read_version
+
+
+class Query:
+    """A loader that counts its runs and holds each one open until released."""
+
+    def __init__(self, result=None, error=None):
+        self.runs = 0
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.runs += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+async def _read(cache: ReadCache, version: int, loader, **params):
+    read_version.set(version)
+    return await cache.get_or_load("list", {"q": "dune", **params}, ("live",), loader)
+
+
+async def _settle() -> None:
+    """Let every started task reach its load, or its wait on one."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.parametrize("backend", ["off", "memory"])
+def test_concurrent_identical_reads_run_one_query(backend):
+    async def main():
+        cache = ReadCache(MemoryStore(16) if backend == "memory" else None, ttl=60)
+        query = Query(result=[{"id": 1}])
+        readers = [asyncio.create_task(_read(cache, 1, query)) for _ in range(10)]
+        await _settle()
+        query.release.set()
+        results = await asyncio.gather(*readers)
+
+        assert query.runs == 1
+        assert all(r == [{"id": 1}] for r in results)
+        assert (cache.flights, cache.coalesced) == (1, 9)
+        assert not cache._flights
+
+    asyncio.run(main())
+
+
+def test_different_reads_are_not_coalesced():
+    async def main():
+        cache = ReadCache(None, ttl=60)
+        query = Query(result=[])
+        readers = [asyncio.create_task(_read(cache, 1, query, limit=n)) for n in (10, 20)]
+        await _settle()
+        query.release.set()
+        await asyncio.gather(*readers)
+        assert query.runs == 2
+
+    asyncio.run(main())
+
+
+def test_leader_error_reaches_every_waiter():
+    async def main():
+        cache = ReadCache(None, ttl=60)
+        query = Query(error=RuntimeError("connection reset"))
+        readers = [asyncio.create_task(_read(cache, 1, query)) for _ in range(5)]
+        await _settle()
+        query.release.set()
+        results = await asyncio.gather(*readers, return_exceptions=True)
+
+        assert query.runs == 1
+        assert all(isinstance(r, RuntimeError) and str(r) == "connection reset" for r in results)
+        assert not cache._flights
+
+    asyncio.run(main())
+
+
+def test_write_between_reads_starts_a_new_flight():
+    async def main():
+        cache = ReadCache(None, ttl=60)
+        before, after = Query(result="stale"), Query(result="fresh")
+        early = asyncio.create_task(_read(cache, 1, before))
+        await _settle()
+        # A write bumped the catalog version while the first load is still running
+        late = asyncio.create_task(_read(cache, 2, after))
+        await _settle()
+        before.release.set()
+        after.release.set()
+
+        assert await asyncio.gather(early, late) == ["stale", "fresh"]
+        assert (before.runs, after.runs) == (1, 1)
+        assert cache.coalesced == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_leader_hands_the_load_to_a_waiter():
+    async def main():
+        cache = ReadCache(None, ttl=60)
+        query = Query(result="rows")
+        leader = asyncio.create_task(_read(cache, 1, query))
+        await _settle()
+        follower = asyncio.create_task(_read(cache, 1, query))
+        await _settle()
+        leader.cancel()
+        await _settle()
+        query.release.set()
+
+        assert await follower == "rows"
+        assert query.runs == 2
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(main())
+
+
+def test_reads_without_a_version_load_on_their_own():
+    async def main():
+        cache = ReadCache(None, ttl=60)
+        query = Query(result=[])
+        readers = [asyncio.create_task(cache.get_or_load("list", {}, ("live",), query)) for _ in range(3)]
+        await _settle()
+        query.release.set()
+        await asyncio.gather(*readers)
+        assert query.runs == 3
+
+    asyncio.run(main())
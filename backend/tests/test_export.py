@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.core.config import settings
+from app.models.book import Book
+
+BOOKS = 120
+
+
+@pytest.fixture
+def catalog(database, monkeypatch):
+    """BOOKS books, every tenth one trashed, streamed in many small partitions."""
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 7)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rows = [
+        {
+            "title": f'Title {i}, "quoted"' if i % 3 else f"Titel {i} – Straße",
+            "author": f"Author {i % 5}",
+            "created_at": start + timedelta(hours=i // 2),
+            "created_by": "tests",
+            "deleted_at": start + timedelta(days=30) if i % 10 == 0 else None,
+        }
+        for i in range(BOOKS)
+    ]
+    with database.begin() as conn:
+        conn.execute(insert(Book), rows)
+        return [tuple(r) for r in conn.execute(
+            select(Book.id, Book.title, Book.deleted_at.is_(None)).order_by(Book.created_at.desc(), Book.id.desc())
+        )]
+
+
+def test_ndjson_export_streams_every_match(client, catalog):
+    res = client.get("/api/books/export", params={"format": "ndjson"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    books = [json.loads(line) for line in res.text.splitlines()]
+    live = [(book_id, title) for book_id, title, is_live in catalog if is_live]
+    assert [(b["id"], b["title"]) for b in books] == live
+    assert set(books[0]) == {"id", "title", "author", "created_at", "created_by", "deleted_at", "deleted_by", "version"}
+    assert all(b["deleted_at"] is None for b in books)
+
+    res = client.get("/api/books/export", params={"format": "ndjson", "include_deleted": True})
+    assert [b["id"] for b in map(json.loads, res.text.splitlines())] == [book_id for book_id, _, _ in catalog]
+
+    res = client.get("/api/books/export", params={"format": "ndjson", "q": "straße", "created_to": "2024-01-02"})
+    books = [json.loads(line) for line in res.text.splitlines()]
+    assert books and all("Straße" in b["title"] and b["created_at"] < "2024-01-03" for b in books)
+
+
+def test_csv_export_streams_every_match(client, catalog):
+    res = client.get("/api/books/export", params={"format": "csv", "include_deleted": True})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/csv")
+    assert res.headers["content-disposition"] == 'attachment; filename="books.csv"'
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    # One header only, however many partitions; quotes, commas and non-ASCII round-trip
+    assert [(int(r["id"]), r["title"]) for r in rows] == [(book_id, title) for book_id, title, _ in catalog]
+    assert sum(1 for r in rows if r["deleted_at"]) == BOOKS // 10
+
+
+def test_export_of_nothing(client, catalog):
+    assert client.get("/api/books/export", params={"format": "ndjson", "q": "no such book"}).text == ""
+    assert client.get("/api/books/export", params={"format": "csv", "q": "no such book"}).text.splitlines() == [
+        "id,title,author,created_at,created_by,deleted_at,deleted_by,version"
+    ]
@@ -0,0 +1,21 @@
+def _import(client, body: str, **params) -> dict:
+    res = client.post("/api/books:import", params={"format": "csv", **params}, content=body.encode())
+    assert res.status_code == 200
+    return res.json()
+
+
+def test_import_skips_duplicates(client):
+    client.post("/api/books", json={"title": "Dune", "author": "Frank Herbert"})
+
+    report = _import(client, "title,author\nDUNE,frank herbert\nEmma,Jane Austen\nEmma,Jane Austen\n,Nobody\n")
+    assert (report["received"], report["inserted"], report["skipped"], report["invalid"]) == (4, 1, 2, 1)
+
+
+def test_import_is_visible_after_a_cached_404(client):
+    assert client.get("/api/books/1").status_code == 404
+    assert client.get("/api/books").json() == []
+
+    assert _import(client, "title,author\nEmma,Jane Austen\n")["inserted"] == 1
+
+    assert client.get("/api/books/1").json()["title"] == "Emma"
+    assert [b["title"] for b in client.get("/api/books").json()] == ["Emma"]
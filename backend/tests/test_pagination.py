@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app.models.book import Book
+
+
+def _walk(client, path: str, limit: int, pages: int = 20) -> list:
+    """Ids of every page of a cursor walk; fails instead of looping when paging never ends."""
+    ids, cursor = [], None
+    for _ in range(pages):
+        res = client.get(path, params={"limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert res.status_code == 200
+        ids += [book["id"] for book in res.json()]
+        cursor = res.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+    raise AssertionError(f"no last page after {pages} pages: {ids}")
+
+
+def test_cursor_walks_rows_with_db_defaulted_timestamps(client, database):
+    # One statement, so every row gets the same CURRENT_TIMESTAMP (no fraction on SQLite)
+    with database.begin() as conn:
+        conn.execute(insert(Book), [{"title": f"Book {i}", "author": "A", "created_by": "t"} for i in range(7)])
+
+    assert _walk(client, "/api/books", limit=3) == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_cursor_walks_rows_with_equal_fractional_timestamps(client, database):
+    stamp = datetime(2026, 3, 1, 12, 30, 15, 250000)
+    with database.begin() as conn:
+        conn.execute(
+            insert(Book),
+            [{"title": f"Book {i}", "author": "A", "created_by": "t", "created_at": stamp} for i in range(5)],
+        )
+
+    assert _walk(client, "/api/books", limit=2) == [5, 4, 3, 2, 1]
+
+
+def test_cursor_orders_across_distinct_timestamps(client, database):
+    with database.begin() as conn:
+        conn.execute(insert(Book), [
+            {"title": "Old", "author": "A", "created_by": "t", "created_at": datetime(2026, 1, 1, 9)},
+            {"title": "New", "author": "A", "created_by": "t", "created_at": datetime(2026, 1, 2, 9)},
+            {"title": "Mid", "author": "A", "created_by": "t", "created_at": datetime(2026, 1, 1, 9, 0, 0, 1)},
+        ])
+
+    assert _walk(client, "/api/books", limit=1) == [2, 3, 1]
+
+
+def test_invalid_cursor_is_400(client):
+    assert client.get("/api/books", params={"cursor": "nope"}).status_code == 400
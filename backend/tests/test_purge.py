@@ -0,0 +1,53 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+from app.core.metrics import PURGE_BACKLOG, PURGE_BATCH_SECONDS, PURGE_LAST_SUCCESS, PURGED_ROWS
+from app.models.book import Book, BookTombstone
+from app.services import purge
+
+
+def _batches() -> int:
+    counts, _ = PURGE_BATCH_SECONDS._values.get((), ([0], 0.0))
+    return sum(counts)
+
+
+def test_purge_removes_only_expired_trash_in_batches(client, database, monkeypatch):
+    ids = [client.post("/api/books", json={"title": f"Book {i}", "author": "A"}).json()["id"] for i in range(8)]
+    expired, recent, live = ids[:5], ids[5:7], ids[7]
+    for book_id in expired + recent:
+        assert client.delete(f"/api/books/{book_id}").status_code == 204
+    now = datetime.now(tz=timezone.utc)
+    with database.begin() as conn:
+        for age, book_id in enumerate(expired):
+            conn.execute(update(Book).where(Book.id == book_id).values(deleted_at=now - timedelta(days=40 + age)))
+        conn.execute(update(Book).where(Book.id.in_(recent)).values(deleted_at=now - timedelta(days=20)))
+    assert len(client.get("/api/books/trash").json()) == 7
+    assert purge.backlog(now - timedelta(days=30)) == 5
+
+    runs = []
+    batch = purge.purge_batch
+    monkeypatch.setattr(purge, "purge_batch", lambda cutoff, limit: runs.append(batch(cutoff, limit)) or runs[-1])
+    purged_before, batches_before = PURGED_ROWS._values.get((), 0), _batches()
+
+    assert asyncio.run(purge.purge_expired(30, batch_size=2, pause=0)) == 5
+
+    # Oldest first, two per transaction
+    assert [sorted(run) for run in runs] == [sorted(expired[3:]), sorted(expired[1:3]), expired[:1]]
+    assert PURGED_ROWS._values[()] - purged_before == 5
+    assert _batches() - batches_before == 3
+    assert PURGE_BACKLOG._values[()] == 0
+    assert PURGE_LAST_SUCCESS._values[()] >= now.timestamp()
+
+    with database.connect() as conn:
+        assert sorted(conn.scalars(select(Book.id))) == sorted(recent + [live])
+        # Every purged book leaves a tombstone for the change feed
+        assert sorted(conn.scalars(select(BookTombstone.book_id))) == sorted(expired)
+    assert sorted(b["id"] for b in client.get("/api/books/trash").json()) == sorted(recent)
+    changes = client.get("/api/books/changes", params={"since": 0}).json()["changes"]
+    assert sorted(c["id"] for c in changes if c["op"] == "delete") == sorted(expired)
+
+    # Nothing left past retention: one empty batch
+    assert asyncio.run(purge.purge_expired(30, batch_size=2, pause=0)) == 0
+    assert runs[-1] == []
@@ -0,0 +1,137 @@
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.db.replicas import SEEN_MIN, STICKY_COOKIE, ReadYourWritesMiddleware, ReplicaSet
+from app.db.session import engine
+from app.services.catalog_version import BUMP_CATALOG_VERSION
+
+MAX_LAG = 0.2
+
+
+def _replicate(replica: Path) -> None:
+    """Bring the replica file up to date with the primary."""
+    replica.parent.mkdir(exist_ok=True)
+    with sqlite3.connect(engine.url.database) as src, sqlite3.connect(replica) as dst:
+        src.backup(dst)
+
+
+def _write() -> None:
+    with engine.begin() as conn:
+        conn.execute(BUMP_CATALOG_VERSION)
+
+
+def _request(cookies: str = "") -> Request:
+    headers = [(b"cookie", cookies.encode())] if cookies else []
+    return Request({"type": "http", "method": "GET", "path": "/api/books", "headers": headers})
+
+
+@pytest.fixture
+def replica_file(tmp_path):
+    return tmp_path / "replica" / "books.db"
+
+
+@pytest.fixture
+def replica_set(replica_file):
+    rs = ReplicaSet([f"sqlite:///{replica_file}"], max_lag=MAX_LAG, sticky_seconds=5, interval=0.01)
+    yield rs
+    asyncio.run(rs.dispose())
+
+
+def test_reads_go_to_an_in_sync_replica(replica_set, replica_file):
+    _replicate(replica_file)
+    asyncio.run(replica_set.check())
+    assert replica_set.route(_request()) is replica_set.replicas[0]
+
+
+def test_lagging_replica_falls_back_to_the_primary(replica_set, replica_file):
+    _replicate(replica_file)
+    asyncio.run(replica_set.check())
+    _write()
+    asyncio.run(replica_set.check())
+    # Stale, but not for longer than the limit yet
+    assert replica_set.route(_request()) is not None
+
+    time.sleep(MAX_LAG * 1.5)
+    asyncio.run(replica_set.check())
+    assert replica_set.replicas[0].lag > MAX_LAG
+    assert replica_set.route(_request()) is None
+    assert replica_set.routed["primary:fallback"] == 1
+
+    _replicate(replica_file)
+    asyncio.run(replica_set.check())
+    assert replica_set.replicas[0].lag == 0
+    assert replica_set.route(_request()) is not None
+
+
+def test_client_reads_its_own_write_from_the_primary(replica_set, replica_file):
+    _replicate(replica_file)
+    asyncio.run(replica_set.check())
+
+    assert replica_set.route(_request(f"{STICKY_COOKIE}={time.time() + 5:.3f}")) is None
+    assert replica_set.routed["primary:sticky"] == 1
+    # Once the window is over (or for anyone else) the replica serves again
+    assert replica_set.route(_request(f"{STICKY_COOKIE}={time.time() - 1:.3f}")) is not None
+
+
+def test_write_response_sets_the_sticky_cookie():
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    async def missing(request):
+        return PlainTextResponse("no", status_code=404)
+
+    app = Starlette(routes=[Route("/ok", ok, methods=["GET", "POST"]), Route("/missing", missing, methods=["POST"])])
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=5)
+    with TestClient(app) as c:
+        assert STICKY_COOKIE in c.post("/ok").cookies
+        assert STICKY_COOKIE not in c.get("/ok").cookies
+        assert STICKY_COOKIE not in c.post("/missing").cookies
+
+
+def test_replica_that_was_down_recovers(replica_set, replica_file):
+    # The replica's file is not there yet: every check fails
+    asyncio.run(replica_set.check())
+    replica = replica_set.replicas[0]
+    assert not replica.healthy and replica.error
+    assert replica_set.route(_request()) is None
+
+    _replicate(replica_file)
+    asyncio.run(replica_set.check())
+    assert replica.healthy and replica.error is None
+    assert replica.lag == 0
+    assert replica_set.route(_request()) is replica
+
+
+def test_down_replica_does_not_grow_lag_history(replica_set, replica_file):
+    _replicate(replica_file)
+    asyncio.run(replica_set.check())
+    replica = replica_set.replicas[0]
+    applied = replica.version
+    # Down: its file goes away (and so do pooled connections to it)
+    stale = replica_file.parent.rename(replica_file.parent.with_name("stale"))
+    replica.engine.dispose()
+    if replica.async_engine is not None:
+        asyncio.run(replica.async_engine.dispose())
+
+    for _ in range(SEEN_MIN * 2):
+        _write()
+        asyncio.run(replica_set.check())
+        time.sleep(replica_set.interval)
+    assert not replica.healthy
+    assert len(replica_set._seen) == replica_set._seen.maxlen
+
+    # Back with the copy it had: still measured as far behind, so not used
+    stale.rename(replica_file.parent)
+    asyncio.run(replica_set.check())
+    assert replica.healthy and replica.version == applied < replica_set.primary_version
+    assert replica.lag > MAX_LAG
+    assert replica_set.route(_request()) is None
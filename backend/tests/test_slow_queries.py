@@ -0,0 +1,26 @@
+import pytest
+
+from app.db.slow_queries import explain_command, normalize
+
+
+@pytest.mark.parametrize("statement, command", [
+    ("SELECT book.id FROM book WHERE book.id = %(id)s", "EXPLAIN (ANALYZE, BUFFERS)"),
+    ("  select count(*) from book", "EXPLAIN (ANALYZE, BUFFERS)"),
+    ("SELECT catalog_version.version FROM catalog_version FOR UPDATE", "EXPLAIN"),
+    ("SELECT book.id FROM book FOR NO KEY UPDATE", "EXPLAIN"),
+    ("SELECT book.id FROM book FOR SHARE SKIP LOCKED", "EXPLAIN"),
+    ("UPDATE book SET version=(book.version + %(v)s) WHERE book.id = %(id)s RETURNING book.id", "EXPLAIN"),
+    ("DELETE FROM book WHERE book.id = %(id)s RETURNING book.id", "EXPLAIN"),
+    ("INSERT INTO book (title) VALUES (%(t)s) ON CONFLICT DO NOTHING RETURNING book.id", "EXPLAIN"),
+    ("WITH gone AS (DELETE FROM book RETURNING id) SELECT count(*) FROM gone", "EXPLAIN"),
+    ("COPY book (title) FROM STDIN", None),
+    ("SET LOCAL statement_timeout = 100", None),
+])
+def test_only_plain_reads_are_explained_with_analyze(statement, command):
+    assert explain_command(statement) == command
+
+
+def test_normalize_folds_literals_and_in_lists():
+    assert normalize("SELECT *\n  FROM book WHERE id IN (%(id_1)s, %(id_2)s) LIMIT 25") == (
+        "SELECT * FROM book WHERE id IN (...) LIMIT ?"
+    )
@@ -0,0 +1,104 @@
+import asyncio
+
+from app.core.config import settings
+from app.services.suggest import PrefixIndex, SuggestIndex
+
+
+def _texts(index, prefix: str, limit: int = 10):
+    return [s["text"] for s in index.search(prefix, limit)]
+
+
+def test_prefix_matches_any_word_start():
+    index = PrefixIndex()
+    index.upsert(1, "The Silent Garden", "Anna Schmidt")
+    index.upsert(2, "Gardening for Beginners", "Émile Zola")
+    assert _texts(index, "gard") == ["Gardening for Beginners", "The Silent Garden"]
+    assert _texts(index, "SCHM") == ["Anna Schmidt"]
+    assert _texts(index, "emile") == ["Émile Zola"]
+    assert _texts(index, "arden") == []
+    assert index.search("  ", 10) == []
+
+
+def test_ranking_first_word_then_books_then_length():
+    index = PrefixIndex()
+    index.upsert(1, "Old Roads", "Rhea Long")
+    index.upsert(2, "Roads and Rivers", "Rhea Long")
+    index.upsert(3, "Roads", "Ray Short")
+    index.upsert(4, "Roads", "Rhea Long")
+    results = index.search("r", 10)
+    # Whole-value prefix matches first, the most used ones before the shorter ones
+    assert [s["text"] for s in results] == ["Rhea Long", "Roads", "Ray Short", "Roads and Rivers", "Old Roads"]
+    assert results[0] == {"text": "Rhea Long", "kind": "author", "count": 3}
+    assert _texts(index, "r", 2) == ["Rhea Long", "Roads"]
+
+
+def test_rename_and_remove():
+    index = PrefixIndex()
+    index.upsert(1, "Dune", "Frank Herbert")
+    index.upsert(2, "Dune Messiah", "Frank Herbert")
+
+    index.upsert(1, "Children of Dune", "Frank Herbert")
+    assert _texts(index, "dune") == ["Dune Messiah", "Children of Dune"]
+    assert index.dead == 1
+
+    index.remove(2)
+    assert _texts(index, "dune") == ["Children of Dune"]
+    assert index.search("frank", 10)[0]["count"] == 1
+
+    index.remove(1)
+    index.remove(1)
+    assert _texts(index, "frank") == []
+    assert index.books == 0
+
+    # A value nobody used any more comes back to life
+    index.upsert(3, "Dune", "Frank Herbert")
+    assert _texts(index, "dune") == ["Dune"]
+    assert index.dead == 2
+
+
+def test_follows_the_change_feed(client, monkeypatch):
+    dune = client.post("/api/books", json={"title": "Dune", "author": "Frank Herbert"}).json()
+    emma = client.post("/api/books", json={"title": "Emma", "author": "Jane Austen"}).json()
+
+    async def main():
+        suggest = SuggestIndex(interval=60)
+        task = asyncio.create_task(suggest.run())
+
+        async def settled(prefix, expected):
+            suggest.poke()
+            for _ in range(200):
+                if suggest.ready and _texts(suggest, prefix) == expected:
+                    return
+                await asyncio.sleep(0.01)
+            assert _texts(suggest, prefix) == expected
+
+        async def write(method, *args, **kwargs):
+            res = await asyncio.to_thread(getattr(client, method), *args, **kwargs)
+            assert res.status_code < 300
+
+        try:
+            await settled("dune", ["Dune"])
+            await settled("emma", ["Emma"])
+
+            await write("patch", f"/api/books/{dune['id']}", json={"title": "Dune Messiah"})
+            await write("delete", f"/api/books/{emma['id']}")
+            await write("post", "/api/books", json={"title": "Persuasion", "author": "Jane Austen"})
+            await settled("dune", ["Dune Messiah"])
+            await settled("emma", [])
+            await settled("pers", ["Persuasion"])
+
+            # Past the side-list limit the next poke rebuilds from the database
+            monkeypatch.setattr(settings, "SUGGEST_REBUILD_PENDING", 0)
+            before = suggest.index
+            await write("put", f"/api/books/{emma['id']}/restore")
+            await settled("emma", ["Emma"])
+            for _ in range(200):
+                if suggest.index is not before:
+                    break
+                await asyncio.sleep(0.01)
+            assert suggest.index is not before
+            assert _texts(suggest, "dune") == ["Dune Messiah"]
+        finally:
+            task.cancel()
+
+    asyncio.run(main())
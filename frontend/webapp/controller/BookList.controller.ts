@@ -12,6 +12,10 @@ declare global { interface Window { __API_BASE_URL?: string; } }
 
 type PageSizeKey = "10" | "25" | "50" | "alle";
 
+// Upper bound of the backend's `limit` parameter; "alle" loads the list in pages of this size
+const MAX_PAGE_SIZE = 500;
+const SUGGEST_LIMIT = 10;
+
 type TabKey = "active" | "trash";
 type TabState = {
   page: number;
@@ -22,6 +26,8 @@ type TabState = {
 
 export default class BookList extends Controller {
   private _debounce?: number;
+  // Only the answer to the latest keystroke may replace the suggestion list
+  private _suggestSeq = 0;
 
   private _state: Record<TabKey, TabState> = {
     active: { page: 1, pageSizeKey: "10", pageSize: 10, total: 0 },
@@ -42,6 +48,7 @@ export default class BookList extends Controller {
 
     this.getView()?.setModel(new JSONModel({}), "edit");
     this.getView()?.setModel(new JSONModel({}), "create");
+    this.getView()?.setModel(new JSONModel({ items: [] }), "suggest");
 
     void this.refresh();
   }
@@ -99,40 +106,33 @@ export default class BookList extends Controller {
     }
   }
 
-  private async fetchTotal(tab: TabKey, q?: string, from?: string, to?: string): Promise<number> {
-    const base = this.baseUrl.replace(/\/+$/, "");
-    const path = tab === "trash" ? "/api/books/trash/count" : "/api/books/count";
-    const url = new URL(path, base);
-    if (q && q.trim()) url.searchParams.set("q", q.trim());
-    if (from) url.searchParams.set(tab === "trash" ? "deleted_from" : "created_from", from);
-    if (to) url.searchParams.set(tab === "trash" ? "deleted_to" : "created_to", to);
-
-    const res = await fetch(url.toString());
-    if (!res.ok) throw new Error(`HTTP ${res.status}`);
-    const { total } = await res.json();
-    return total ?? 0;
-  }
-
   private async loadPage(tab: TabKey, q?: string, from?: string, to?: string): Promise<void> {
     const st = this._state[tab];
     const base = this.baseUrl.replace(/\/+$/, "");
-    const url = new URL(tab === "trash" ? "/api/books/trash" : "/api/books", base);
+    const url = new URL(tab === "trash" ? "/api/books/trash/page" : "/api/books/page", base);
 
     if (q && q.trim()) url.searchParams.set("q", q.trim());
     if (from) url.searchParams.set(tab === "trash" ? "deleted_from" : "created_from", from);
     if (to) url.searchParams.set(tab === "trash" ? "deleted_to" : "created_to", to);
 
-    const limit = st.pageSizeKey === "alle" ? st.total || 1 : st.pageSize;
-    const offset = st.pageSizeKey === "alle" ? 0 : (st.page - 1) * st.pageSize;
-
-    url.searchParams.set("limit", String(limit));
-    url.searchParams.set("offset", String(offset));
+    if (st.pageSizeKey === "alle") {
+      url.searchParams.set("limit", String(MAX_PAGE_SIZE));
+    } else {
+      url.searchParams.set("limit", String(st.pageSize));
+      url.searchParams.set("offset", String((st.page - 1) * st.pageSize));
+    }
 
-    const res = await fetch(url.toString());
-    if (!res.ok) throw new Error(`HTTP ${res.status}`);
-    const data = await res.json();
+    let page = await this.fetchPage(url);
+    st.total = page.total ?? 0;
+    let rows: any[] = page.items;
+    // "alle": follow next_cursor until the list is done, so nothing past the first page is cut off
+    while (st.pageSizeKey === "alle" && page.next_cursor) {
+      url.searchParams.set("cursor", page.next_cursor);
+      page = await this.fetchPage(url);
+      rows = rows.concat(page.items);
+    }
 
-    const items = data.map((b: any) => ({
+    const items = rows.map((b: any) => ({
       ...b,
       created_at: b.created_at ? new Date(b.created_at) : null,
       deleted_at: b.deleted_at ? new Date(b.deleted_at) : null
@@ -151,6 +151,14 @@ export default class BookList extends Controller {
     }
   }
 
+  private async fetchPage(url: URL): Promise<any> {
+    // Credentials: sends the backend's read-your-writes cookie, so a list reloaded right
+    // after an edit comes from the primary database rather than a lagging replica
+    const res = await fetch(url.toString(), { credentials: "include" });
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    return res.json();
+  }
+
   private updatePagerUI(): void {
     const st = this.curr();
     const start = st.total === 0 ? 0 : ((st.page - 1) * st.pageSize) + 1;
@@ -174,32 +182,68 @@ export default class BookList extends Controller {
     const q = this.getSearchText();
     const { from, to } = this.getDateRange();
 
-    const total = await this.fetchTotal(tab, q, from, to);
-    this._state[tab].total = total;
-
+    // One request returns both the page and the total
+    await this.loadPage(tab, q, from, to);
     this._recomputePageSizeFor(tab);
 
+    // The page may have shrunk away (e.g. after a delete) — reload the last one
     const st = this._state[tab];
     const totalPages = st.pageSizeKey === "alle" ? 1 : Math.max(1, Math.ceil(st.total / st.pageSize));
-    if (st.page > totalPages) st.page = totalPages;
+    if (st.page > totalPages) {
+      st.page = totalPages;
+      await this.loadPage(tab, q, from, to);
+    }
 
-    await this.loadPage(tab, q, from, to);
     this.updatePagerUI();
   }
 
   onSearch(): void {
+    // Enter or a picked suggestion filters at once; drop the reload still pending from typing
+    if (this._debounce) window.clearTimeout(this._debounce);
     this._state[this._currentTab].page = 1;
     void this.refresh();
   }
 
   onLiveChange(): void {
     if (this._debounce) window.clearTimeout(this._debounce);
+    // Both tabs filter as you type; on the books tab suggestions (onSuggest) show alongside
     this._debounce = window.setTimeout(() => {
       this._state[this._currentTab].page = 1;
       void this.refresh();
     }, 300);
   }
 
+  onSuggest(e: any): void {
+    const prefix = (e.getParameter("suggestValue") || "").trim();
+    const field = e.getSource();
+    const model = this.getView()?.getModel("suggest") as JSONModel;
+    const seq = ++this._suggestSeq;
+    if (!prefix || this._currentTab !== "active") {
+      model.setData({ items: [] });
+      return;
+    }
+    void this.loadSuggestions(prefix, seq).then((items) => {
+      if (items === null || seq !== this._suggestSeq) return;
+      model.setData({ items });
+      field.suggest();
+    });
+  }
+
+  private async loadSuggestions(prefix: string, seq: number): Promise<any[] | null> {
+    const url = new URL("/api/books/suggest", this.baseUrl.replace(/\/+$/, ""));
+    url.searchParams.set("prefix", prefix);
+    url.searchParams.set("limit", String(SUGGEST_LIMIT));
+    try {
+      const res = await fetch(url.toString());
+      // 503 while the index loads: no suggestions, searching still works
+      if (!res.ok || seq !== this._suggestSeq) return null;
+      const data = await res.json();
+      return data.map((s: any) => ({ ...s, kind: s.kind === "author" ? "Autor" : "Titel" }));
+    } catch {
+      return null;
+    }
+  }
+
   onDateChanged(): void {
     this._state[this._currentTab].page = 1;
     void this.refresh();
@@ -259,7 +303,7 @@ export default class BookList extends Controller {
     }
     const ctx = item.getBindingContext();
     const data = ctx?.getObject() as any;
-    const clone = { id: data.id, title: data.title, author: data.author, created_by: data.created_by };
+    const clone = { id: data.id, version: data.version, title: data.title, author: data.author, created_by: data.created_by };
     (this.getView()?.getModel("edit") as JSONModel).setData(clone);
 
     (this.byId("editDialog") as Dialog).open();
@@ -269,6 +313,7 @@ export default class BookList extends Controller {
     const editModel = this.getView()?.getModel("edit") as JSONModel;
     const payload = editModel.getData() as {
       id: number;
+      version?: number;
       title?: string;
       author?: string;
       created_by?: string | null;
@@ -284,10 +329,21 @@ export default class BookList extends Controller {
     try {
       const res = await fetch(`${this.baseUrl}/api/books/${payload.id}`, {
         method: "PUT",                  
-        headers: { "Content-Type": "application/json" },
+        credentials: "include",
+        headers: {
+          "Content-Type": "application/json",
+          // Only save over the version the dialog was opened with
+          ...(payload.version !== undefined ? { "If-Match": `"${payload.version}"` } : {}),
+        },
         body: JSON.stringify(body),
       });
 
+      if (res.status === 412) {
+        (this.byId("editDialog") as Dialog).close();
+        await this.refresh();
+        MessageToast.show("Book was changed by someone else; reloaded, please edit again.");
+        return;
+      }
       if (!res.ok) {
         const detail = await res.text();
         throw new Error(`HTTP ${res.status}: ${detail}`);
@@ -324,6 +380,7 @@ export default class BookList extends Controller {
     try {
       const res = await fetch(`${this.baseUrl}/api/books`, {
         method: "POST",
+        credentials: "include",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
           title: payload.title.trim(),
@@ -363,7 +420,8 @@ export default class BookList extends Controller {
         if (action === MessageBox.Action.OK) {
           try {
             const res = await fetch(`${this.baseUrl}/api/books/${data.id}`, {
-              method: "DELETE"
+              method: "DELETE",
+              credentials: "include"
             });
             if (!res.ok) throw new Error(`HTTP ${res.status}`);
             await this.refresh();
@@ -385,7 +443,7 @@ export default class BookList extends Controller {
       return;
     }
     const data = item.getBindingContext("trash")?.getObject() as any;
-    const res = await fetch(`${this.baseUrl}/api/books/${data.id}/restore`, { method: "PUT" });
+    const res = await fetch(`${this.baseUrl}/api/books/${data.id}/restore`, { method: "PUT", credentials: "include" });
     if (!res.ok) throw new Error(`HTTP ${res.status}`);
     MessageToast.show("Buch wiederhergestellt.");
 
@@ -414,7 +472,8 @@ export default class BookList extends Controller {
         if (action === MessageBox.Action.OK) {
           try {
             const res = await fetch(`${this.baseUrl}/api/books/${data.id}/hard_delete`, {
-              method: "DELETE"
+              method: "DELETE",
+              credentials: "include"
             });
             if (!res.ok) throw new Error(`HTTP ${res.status}`);
 